@@ -0,0 +1,442 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Headless batch entry point.
+
+Run with ``mayapy -m CameraSequencer`` to sequence cameras without building
+the Qt dialog::
+
+    mayapy -m CameraSequencer --scene shot.ma --output shot_seq.ma "cam_*"
+    mayapy -m CameraSequencer --scene shot.ma --manifest shots.json
+    python -m CameraSequencer --backend memory --scene scene.json "cam_*"
+
+A JSON manifest is either a list of camera names, a single shot object or
+``{"shots": [...]}`` where each shot has ``cameras`` and optionally
+``scene``, ``start_frame``, ``hold``, ``sample``, ``images``,
+``image_mode``, ``link_images``, ``proxy``, ``output`` and ``name``. A CSV
+manifest has the camera name in the first column and an optional shot name
+in the second.
+
+Each named shot gets its own uber camera, ``sh010_uber_cam`` for shot
+``sh010``, so several shots can be sequenced into one scene and each re-run
+updates only its own camera.
+
+The ``memory`` backend needs no Maya: ``--scene`` and ``--output`` are JSON
+scenes as read and written by
+:class:`CameraSequencer.backends.memory_backend.MemoryBackend`.
+"""
+
+import sys
+import csv
+import json
+import logging
+import argparse
+from collections import OrderedDict
+
+log = logging.getLogger("CameraSequencer")
+
+WILDCARDS = ("*", "?", "[")
+
+
+def read_manifest(path):
+    """
+    Reads shots from a JSON or CSV manifest.
+
+    :param path(str): manifest file
+
+    :raises: ``RuntimeError`` if the manifest cannot be parsed
+
+    :return: shot dictionaries with at least a ``cameras`` key
+    :rtype: list
+    """
+    if path.lower().endswith(".csv"):
+        shots = OrderedDict()
+
+        with open(path) as f:
+            for row in csv.reader(f):
+                row = [col.strip() for col in row]
+                if not row or not row[0] or row[0].startswith("#"):
+                    continue
+
+                shot = row[1] if len(row) > 1 and row[1] else "default"
+                shots.setdefault(shot, {"name": shot, "cameras": []})
+                shots[shot]["cameras"].append(row[0])
+
+        return list(shots.values())
+
+    with open(path) as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            log.error("Could not parse manifest %s: %s" % (path, e))
+            raise RuntimeError("Could not parse manifest %s: %s" % (path, e))
+
+    if isinstance(data, list):
+        return [{"cameras": data}]
+
+    if "shots" in data:
+        return data["shots"]
+
+    if "cameras" in data:
+        return [data]
+
+    log.error("Manifest %s has no cameras or shots." % path)
+    raise RuntimeError("Manifest %s has no cameras or shots." % path)
+
+
+def resolve_cameras(patterns):
+    """
+    Expands camera names and glob patterns to snapshots.
+
+    Explicit names keep their given order, wildcard matches are sorted by
+    name. A camera matched more than once is only sequenced once.
+
+    :param patterns(str list): camera names or patterns
+
+    :raises: ``RuntimeError`` if a name or pattern matches no camera
+
+    :return: snapshots in sequence order
+    :rtype: list
+    """
+    from CameraSequencer import snapshot
+    from CameraSequencer.backends import get_backend
+
+    backend = get_backend()
+    seen = set()
+    cameras = []
+
+    for pattern in patterns:
+        if any(char in pattern for char in WILDCARDS):
+            shapes = backend.ls(pattern, type="camera")
+            nodes = sorted(
+                shapes
+                + [
+                    node
+                    for node in backend.ls(pattern, type="transform")
+                    if backend.list_relatives(node, type="camera")
+                ]
+            )
+
+        else:
+            nodes = backend.ls(pattern)
+
+        if not nodes:
+            log.error("%s does not exist." % pattern)
+            raise RuntimeError("%s does not exist." % pattern)
+
+        for node in nodes:
+            transform, shape = snapshot.resolve_camera(node)
+
+            if transform in seen:
+                continue
+
+            seen.add(transform)
+            cameras.append(snapshot.capture(transform, shape))
+
+    return cameras
+
+
+def run_shot(
+    shot,
+    start_frame=1001,
+    bulk=True,
+    update=True,
+    hold=None,
+    sample=False,
+    image_mode="copy",
+    verify=False,
+    proxy=None,
+    link_images=False,
+    made=None,
+):
+    """
+    Sequences one shot through the api.
+
+    :param shot(dict): shot from a manifest or the command line
+    :param start_frame(int): default start frame
+    :param bulk(bool): write animCurves in bulk
+    :param update(bool): re-sequence an existing uber camera in place
+    :param hold(int): default frames given to each camera
+    :param sample(bool): sample animated cameras over their frame range
+    :param image_mode(str): write images by ``copy``, ``hardlink`` or
+        ``symlink``
+    :param verify(bool): hash the images as they are copied and check them
+        against their manifest
+    :param proxy(str): make ``half`` or ``quarter`` resolution proxies of
+        the images and show them on the image plane
+    :param link_images(bool): without ``images``, play the cameras' own
+        plates on the image plane through a symlink farm
+    :param made(set): uber cameras made for earlier shots of this scene,
+        which are never updated
+
+    :raises: ``RuntimeError`` if the shot has no cameras or frames of its
+        image sequence or their proxies could not be written
+
+    :return: uber camera transform and shape
+    :rtype: list
+    """
+    from CameraSequencer import api
+
+    name = shot.get("name", "shot")
+    uber_name = api.uber_camera_name(shot.get("name"))
+    cameras = resolve_cameras(shot.get("cameras", []))
+
+    if not cameras:
+        log.error("No cameras to sequence for %s." % name)
+        raise RuntimeError("No cameras to sequence for %s." % name)
+
+    start_frame = int(shot.get("start_frame", start_frame))
+    img_sequence = shot.get("images")
+
+    log.info(
+        "Sequencing %d cameras for %s from frame %d."
+        % (len(cameras), name, start_frame)
+    )
+
+    if update and made:
+        # Shots sharing a name, or unnamed, would otherwise re-sequence the
+        # uber camera just made for the shot before them.
+        existing = api.find_uber_camera(uber_name)
+        update = existing is None or existing[0] not in made
+
+    uber_cam = api.sequence_cameras(
+        cameras,
+        start_frame=start_frame,
+        bulk=bulk,
+        update=update,
+        hold=shot.get("hold", hold),
+        sample=shot.get("sample", sample),
+        link_images=shot.get("link_images", link_images),
+        name=uber_name,
+    )
+
+    if made is not None:
+        made.add(uber_cam[0])
+
+    if img_sequence:
+        # Images follow the frames the cameras were actually given, which
+        # with sampling are only known once they are keyed.
+        result = api.sequence_images(
+            cameras,
+            start_frame=start_frame,
+            img_sequence=img_sequence,
+            mode=shot.get("image_mode", image_mode),
+            hold=api.sequence_info(uber_cam[0])["frames"],
+            checksum=verify,
+        )
+
+        if not result.ok:
+            msg = "%d of %d frames failed for %s." % (
+                len(result.failed),
+                len(result),
+                name,
+            )
+            log.error(msg)
+            raise RuntimeError(msg)
+
+        if verify and not api.verify_images(img_sequence).ok:
+            msg = "Images for %s do not match their manifest." % name
+            log.error(msg)
+            raise RuntimeError(msg)
+
+        api.bind_image_sequence(uber_cam, result.first)
+
+        proxy = shot.get("proxy", proxy)
+        if proxy:
+            proxies = api.generate_proxies(
+                result, resolutions=[proxy], block=True
+            ).result
+
+            if not proxies.ok:
+                msg = "%d of %d %s proxies failed for %s." % (
+                    len(proxies.failed),
+                    len(proxies),
+                    proxy,
+                    name,
+                )
+                log.error(msg)
+                raise RuntimeError(msg)
+
+            api.set_image_resolution(uber_cam, proxy)
+
+    return uber_cam
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="CameraSequencer",
+        description="Sequence cameras onto an uber camera without the UI.",
+    )
+    parser.add_argument(
+        "cameras",
+        nargs="*",
+        help="camera names or glob patterns, in sequence order",
+    )
+    parser.add_argument(
+        "-m", "--manifest", help="JSON or CSV manifest of shots and cameras"
+    )
+    parser.add_argument(
+        "-s", "--scene", help="Maya scene to open before sequencing"
+    )
+    parser.add_argument(
+        "-f",
+        "--start-frame",
+        type=int,
+        default=1001,
+        help="frame to start animation (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-i",
+        "--images",
+        help="image sequence path, e.g. /plates/shot.<frame>.<ext>",
+    )
+    parser.add_argument(
+        "--image-mode",
+        choices=("copy", "hardlink", "symlink"),
+        default="copy",
+        help="how images are written (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="hash copied images and check them against their manifest",
+    )
+    parser.add_argument(
+        "--link-images",
+        action="store_true",
+        help="without --images, play the original plates on the image "
+        "plane through symlinks instead of copying them",
+    )
+    parser.add_argument(
+        "--proxy",
+        choices=("half", "quarter"),
+        help="make proxies of the images and play them on the image plane",
+    )
+    parser.add_argument(
+        "-o", "--output", help="save the sequenced scene to this .ma/.mb"
+    )
+    parser.add_argument(
+        "--no-bulk",
+        dest="bulk",
+        action="store_false",
+        help="key with one setKeyframe call per key",
+    )
+    parser.add_argument(
+        "--hold",
+        type=int,
+        help="frames to hold each camera for (default: 1, or the camera's "
+        "frame range with --sample)",
+    )
+    parser.add_argument(
+        "--sample",
+        action="store_true",
+        help="sample animated cameras over their own frame range",
+    )
+    parser.add_argument(
+        "--new",
+        dest="update",
+        action="store_false",
+        help="create a new uber camera instead of updating an existing one",
+    )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        choices=("maya", "memory"),
+        default="maya",
+        help="scene backend; memory reads and writes JSON scenes "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="log per-stage timings for every api call",
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="log debug messages"
+    )
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Command line entry point.
+
+    :param argv(str list): arguments, defaults to ``sys.argv[1:]``
+
+    :raises: None
+
+    :return: exit code
+    :rtype: int
+    """
+    from CameraSequencer import instrument
+    from CameraSequencer.backends import set_backend
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    log.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+
+    if args.profile:
+        instrument.enable()
+
+    if not args.cameras and not args.manifest:
+        parser.error("give camera names or a --manifest")
+
+    shots = []
+
+    if args.cameras:
+        shots.append({"cameras": args.cameras, "images": args.images})
+
+    try:
+        if args.manifest:
+            shots.extend(read_manifest(args.manifest))
+
+        backend = set_backend(args.backend)
+        backend.initialize()
+
+        if args.scene:
+            backend.open_scene(args.scene)
+
+        made = set()
+
+        for shot in shots:
+            if shot.get("scene"):
+                backend.open_scene(shot["scene"])
+                made.clear()
+
+            run_shot(
+                shot,
+                start_frame=args.start_frame,
+                bulk=args.bulk,
+                update=args.update,
+                hold=args.hold,
+                sample=args.sample,
+                image_mode=args.image_mode,
+                verify=args.verify,
+                proxy=args.proxy,
+                link_images=args.link_images,
+                made=made,
+            )
+
+            if shot.get("output"):
+                backend.save_scene(shot["output"])
+                log.info("Saved %s" % shot["output"])
+
+        if args.output:
+            backend.save_scene(args.output)
+            log.info("Saved %s" % args.output)
+
+    except RuntimeError:
+        return 1
+
+    except (IOError, OSError) as e:
+        # A missing or unreadable manifest, scene or output path.
+        log.error(str(e))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
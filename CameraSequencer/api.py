@@ -2,117 +2,1125 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
+import json
+import math
+import zlib
+import shutil
+import tempfile
+import difflib
 import logging
+from functools import partial
+from itertools import islice
+from contextlib import contextmanager
 
-try:
-    from maya import cmds
-except ImportError:
-    pass
+from CameraSequencer import (
+    images,
+    instrument,
+    keying,
+    preflight,
+    prefetch,
+    probe,
+    proxies,
+    scan,
+    sequence,
+    snapshot,
+)
+from CameraSequencer.backends import get_backend
 
 log = logging.getLogger("CameraSequencer")
 
+# Uber camera attributes keyed on the transform, the rest go on the shape.
+TRANSFORM_ATTRIBUTES = (
+    "translateX",
+    "translateY",
+    "translateZ",
+    "rotateX",
+    "rotateY",
+    "rotateZ",
+)
 
-def sequence_images(cameras, start_frame=1001, img_sequence=None):
+UBER_CAMERA = "uber_cam"
+
+# String attribute on the uber camera transform recording what is keyed, so
+# a later run can rewrite only the frames that changed.
+SEQUENCE_ATTRIBUTE = "cameraSequence"
+
+# Each cut, move and rekeyed camera touches the curves once, so past this
+# many edits per camera rewriting every curve in one pass is cheaper. Short
+# sequences are always allowed RESEQUENCE_EDITS, so a small edit to a short
+# list stays a small edit.
+RESEQUENCE_LIMIT = 0.05
+RESEQUENCE_EDITS = 10
+
+# String attribute on the uber image plane holding the full resolution
+# image, so imageName can be switched to a proxy and back.
+IMAGE_ATTRIBUTE = "sequenceImage"
+
+# Scratch directory holding a symlink farm per uber camera made with
+# link_images, and the string attribute on the image plane naming its farm.
+LINK_ROOT = os.environ.get(
+    "CAMERASEQUENCER_LINK_ROOT",
+    os.path.join(tempfile.gettempdir(), "CameraSequencer"),
+)
+LINK_ATTRIBUTE = "sequenceLinks"
+
+# Farm directory to the callback removing it with its uber camera.
+_link_callbacks = {}
+
+
+def sequence_images(
+    cameras,
+    start_frame=1001,
+    img_sequence=None,
+    mode="copy",
+    hold=None,
+    padding=images.DEFAULT_PADDING,
+    workers=None,
+    manifest=True,
+    checksum=False,
+):
     """
-    Creates an uber camera from input cameras
+    Writes the cameras' images out as one numbered sequence, in camera
+    order from start_frame.
 
-    :param cameras(models.Camera list): list of camera objects
+    Frames are recorded in a manifest next to the sequence, so a re-run
+    only rewrites frames whose source moved or changed and an interrupted
+    run picks up where it stopped.
+
+    :param cameras(list|sequence.CameraSequence): models.Camera or
+        snapshot.CameraSnapshot objects, or a columnar sequence
     :param start_frame(int): Frame to start animation
-    :param img_sequence(str): str of image naming with directory
+    :param img_sequence(str): output path with ``<frame>`` and ``<ext>``
+        tokens, see :func:`images.expand_path`
+    :param mode(str): ``copy``, ``hardlink`` or ``symlink``
+    :param hold(int|list): frames given to every camera, or to each camera
+    :param padding(int): digits for ``<frame>``
+    :param workers(int): transfer threads
+    :param manifest(bool): sync against the sequence's manifest
+    :param checksum(bool): hash each copied frame for the manifest, while
+        it is copied, so :func:`verify_images` can compare contents. Copies
+        then go through user space instead of the kernel
+
+    :raises: ``RuntimeError`` if img_sequence is empty, for an unknown mode
+        or if a hold is not a positive frame count
+
+    :return: per-frame outcomes, ``first`` is the starting image
+    :rtype: images.SequenceResult
+    """
+    if not img_sequence:
+        log.error("No image sequence path given.")
+        raise RuntimeError("No image sequence path given.")
+
+    with instrument.run("sequence_images"):
+        with instrument.span("snapshot"):
+            paths = _cameras_to_images(cameras)
+            frames = _holds(hold, len(paths))
+            sources = [
+                path for path, count in zip(paths, frames) for _ in range(count)
+            ]
+
+        instrument.count("cameras", len(paths))
+        instrument.count("frames", len(sources))
+
+        with instrument.span("write"):
+            result = images.assemble(
+                sources,
+                img_sequence,
+                start_frame=start_frame,
+                mode=mode,
+                padding=padding,
+                workers=workers,
+                manifest=manifest,
+                checksum=checksum,
+            )
+
+        instrument.count("bytes", result.size)
+        instrument.count("transferred", result.transferred)
+        instrument.count(
+            "skipped", sum(1 for f in result if f.status == "skipped")
+        )
+
+    return result
+
+
+def generate_proxies(
+    img_sequence,
+    resolutions=("half", "quarter"),
+    processes=None,
+    callback=None,
+    block=False,
+):
+    """
+    Makes reduced resolution proxies of an image sequence in a process
+    pool, skipping frames whose proxies are up to date.
+
+    By default the proxies are made on a background thread and the call
+    returns straight away. Switch the uber image plane to them with
+    :func:`set_image_resolution` once the job is done, from the callback
+    for instance.
+
+    :param img_sequence(list|images.SequenceResult): full resolution
+        images, or what :func:`sequence_images` returned
+    :param resolutions(list): ``half`` and/or ``quarter``
+    :param processes(int): worker processes, all cores by default
+    :param callback(callable): called with the
+        :class:`images.SequenceResult` when done, on Maya's main thread
+    :param block(bool): wait for the proxies before returning
+
+    :raises: ``RuntimeError`` for an unknown resolution
+
+    :return: the proxy job, ``result`` is set once it is done
+    :rtype: proxies.ProxyJob
+    """
+    for resolution in resolutions:
+        proxies.proxy_path("", resolution)
+
+    job = proxies.generate_async(
+        img_sequence, resolutions, processes=processes, callback=callback
+    )
+
+    if block:
+        job.wait()
+        if job.error is not None:
+            raise job.error
+
+    return job
+
+
+def check_plates(cameras, tolerance=probe.ASPECT_TOLERANCE, workers=None):
+    """
+    Checks every camera's plate before sequencing, reading only image
+    headers.
+
+    A plate is flagged when its display aspect does not match its camera's
+    filmback, the one keyed onto the uber camera, or when its resolution
+    differs from the one most plates share.
+
+    :param cameras(list|sequence.CameraSequence): models.Camera or
+        snapshot.CameraSnapshot objects, or a columnar sequence
+    :param tolerance(float): allowed relative aspect difference
+    :param workers(int): probing threads
 
     :raises: None
 
-    :return: filepath to starting image
-    :rtype: str
+    :return: one check per camera, in order
+    :rtype: list
+    """
+    with instrument.run("check_plates"):
+        with instrument.span("snapshot"):
+            if isinstance(cameras, sequence.CameraSequence):
+                names = list(cameras.names)
+                filmbacks = [tuple(f) for f in cameras.filmback.tolist()]
+                paths = cameras.image_paths
+            else:
+                snapshots = snapshot.snapshots(cameras)
+                names = [cam.name for cam in snapshots]
+                filmbacks = [cam.filmback for cam in snapshots]
+                paths = [cam.image_path for cam in snapshots]
+
+        with instrument.span("probe"):
+            # Missing plates are found from directory listings and not
+            # probed.
+            exists = scan.present(paths)
+            infos = probe.probe_many(
+                [path if found else None for path, found in zip(paths, exists)],
+                workers=workers,
+            )
+
+        resolutions = {}
+        for info in infos:
+            if info.ok:
+                resolutions[info.resolution] = (
+                    resolutions.get(info.resolution, 0) + 1
+                )
+
+        common = max(resolutions, key=resolutions.get) if resolutions else None
+
+        checks = []
+
+        for name, path, found, info, filmback in zip(
+            names, paths, exists, infos, filmbacks
+        ):
+            if not found:
+                status = "missing"
+            elif not info.ok:
+                status = "unreadable"
+            elif not probe.check_filmback(info, filmback, tolerance):
+                status = "filmback"
+            elif info.resolution != common:
+                status = "resolution"
+            else:
+                status = "ok"
+
+            checks.append(probe.PlateCheck(name, path, info, filmback, status))
+
+        instrument.count("cameras", len(checks))
+        instrument.count("flagged", sum(1 for c in checks if not c.ok))
+
+    flagged = [check for check in checks if not check.ok]
+    if flagged:
+        log.warning(
+            "%d of %d plates flagged, first %s: %s."
+            % (len(flagged), len(checks), flagged[0].camera, flagged[0].status)
+        )
+
+    return checks
+
+
+def check_cameras(cameras, check_images=True, workers=None):
     """
-    dir_path = os.path.dirname(img_sequence)
-    images = [cam.image_path for cam in cameras]
-    return images
+    Checks every queued camera in one batch before anything is sequenced:
+    that it still exists, its attributes can be read and, with
+    check_images, that it has an image plane whose file is on disk.
+
+    Build the sequence from the report's ``snapshots`` so the cameras are
+    not read again.
 
+    :param cameras(list): models.Camera or snapshot.CameraSnapshot objects,
+        or camera node names
+    :param check_images(bool): require an image plane with a file on disk
+    :param workers(int): threads listing plate directories
+
+    :raises: None
 
-def sequence_cameras(cameras, start_frame=1001, img_sequence=None):
+    :return: one check per camera, in order
+    :rtype: preflight.PreflightReport
     """
-    Creates an uber camera from input cameras
+    with instrument.run("check_cameras"):
+        report = preflight.run(cameras, check_images, workers)
+        instrument.count("cameras", len(report))
+        instrument.count("failed", len(report.failed))
 
-    :param cameras(models.Camera list): list of camera objects
-    :param start_frame(int): Frame to start animation
+    if report.ok:
+        log.info(report.summary())
+    else:
+        log.warning(report.summary())
+
+    return report
+
+
+def verify_images(img_sequence, workers=None, checksum=True):
+    """
+    Checks a sequence written by :func:`sequence_images` against its
+    manifest.
+
+    :param img_sequence(str): output path the sequence was written with
+    :param workers(int): threads
+    :param checksum(bool): compare content hashes, not only sizes
+
+    :raises: ``RuntimeError`` if the sequence has no manifest
+
+    :return: ``verified``, ``missing`` or ``changed`` for every frame
+    :rtype: images.SequenceResult
+    """
+    with instrument.run("verify_images"):
+        result = images.verify(img_sequence, workers=workers, checksum=checksum)
+        instrument.count("frames", len(result))
+
+    return result
+
+
+@contextmanager
+def batch_edit(name="CameraSequencer", enabled=True):
+    """
+    Groups scene edits into one undo chunk with viewport refresh and graph
+    evaluation suspended. Everything is restored on exit, including when an
+    exception is raised.
+
+    :param name(str): undo chunk name
+    :param enabled(bool): do nothing when False
 
     :raises: None
 
     :return: None
     :rtype: NoneType
     """
-    uber_cam = cmds.camera(name="uber_cam")
-    uber_cam[0] = cmds.rename(uber_cam[0], "uber_cam")
-    uber_cam[1] = cmds.listRelatives(uber_cam[0], children=True)[0]
+    if not enabled:
+        yield
+        return
 
-    imgPlane = cmds.imagePlane(camera=uber_cam[1])
-    cmds.imagePlane(imgPlane[1], edit=True, showInAllViews=False)
-    imgPlane[0] = cmds.rename(imgPlane[0], "uber_IMGPLNE")
-    imgPlane[1] = cmds.listRelatives(imgPlane[0], children=True)[0]
+    backend = get_backend()
+    backend.open_undo_chunk(name)
 
-    cmds.setAttr("%s.fit" % imgPlane[1], 4)
-    cmds.setAttr("%s.displayOnlyIfCurrent" % imgPlane[1], 1)
-    cmds.connectAttr(
-        "%s.horizontalFilmAperture" % uber_cam[1], "%s.sizeX" % imgPlane[1]
+    try:
+        backend.suspend_refresh(True)
+
+        try:
+            state = backend.suspend_evaluation()
+
+            try:
+                yield
+            finally:
+                backend.resume_evaluation(state)
+
+        finally:
+            backend.suspend_refresh(False)
+
+    finally:
+        backend.close_undo_chunk()
+
+
+def sequence_cameras(
+    cameras,
+    start_frame=1001,
+    img_sequence=None,
+    bulk=True,
+    undo_chunk=True,
+    update=True,
+    hold=None,
+    sample=False,
+    link_images=False,
+    name=UBER_CAMERA,
+):
+    """
+    Creates an uber camera from input cameras
+
+    Each camera is given ``hold`` frames, one by default. With ``sample``
+    animated cameras are evaluated over their own frame range, the span of
+    the keys on their transform and shape, and the samples are keyed back
+    to back; ``hold`` then limits how many frames of each range are used.
+    Cameras without keys are sampled once at the start of the playback
+    range. Sampling takes one backend call per camera and never changes the
+    current time.
+
+    When ``update`` is set and an uber camera from an earlier run exists,
+    the new camera order is diffed against what it has keyed. Keys of
+    removed or changed cameras are cut, unchanged runs of cameras are
+    shifted to their new frames in bulk and only new or changed cameras are
+    keyed.
+
+    With ``link_images`` the image plane plays the cameras' own plates
+    through a farm of symlinks in :data:`LINK_ROOT`, so no image is copied.
+    A re-run only relinks the frames that changed, and the farm is removed
+    when the uber camera is deleted. Undoing the delete does not bring it
+    back; sequencing again does.
+
+    :param cameras(list|sequence.CameraSequence): models.Camera or
+        snapshot.CameraSnapshot objects, or a columnar sequence
+    :param start_frame(int): Frame to start animation
+    :param img_sequence(str): first image of a sequence numbered from
+        start_frame, played on the uber image plane, see
+        :func:`bind_image_sequence`
+    :param bulk(bool): write each animCurve in one pass instead of
+        calling setKeyframe per key
+    :param undo_chunk(bool): make the whole operation a single undo step
+        with refresh and evaluation suspended, see :func:`batch_edit`
+    :param update(bool): re-sequence an existing uber camera in place
+    :param hold(int|list): frames given to every camera, or to each camera
+    :param sample(bool): sample animated cameras over their frame range
+    :param link_images(bool): without img_sequence, play the cameras' own
+        plates through a symlink farm in :data:`LINK_ROOT`
+    :param name(str): uber camera name, see :func:`uber_camera_name`
+
+    :raises: ``RuntimeError`` if a hold is not a positive frame count
+
+    :return: uber camera transform and shape
+    :rtype: list
+    """
+    with instrument.run("sequence_cameras"):
+        with instrument.span("snapshot"):
+            names, frames, columns = _camera_frames(cameras, hold, sample)
+            keys = _sequence_keys(names, frames, columns)
+
+        count = len(columns["focalLength"])
+        instrument.count("cameras", len(keys))
+        instrument.count("frames", count)
+
+        backend = get_backend()
+        uber_cam = find_uber_camera(name) if update else None
+
+        with batch_edit("sequence_cameras", enabled=undo_chunk):
+            if uber_cam is not None:
+                with instrument.span("resequence"):
+                    keyed = _resequence(
+                        backend,
+                        uber_cam,
+                        keys,
+                        frames,
+                        columns,
+                        start_frame,
+                        bulk,
+                    )
+
+            else:
+                with instrument.span("uber_camera"):
+                    uber_cam = backend.create_camera(name)
+                    backend.add_attr(uber_cam[0], SEQUENCE_ATTRIBUTE)
+
+                with instrument.span("image_plane"):
+                    _create_image_plane(backend, uber_cam)
+
+                with instrument.span("keyframes"):
+                    _key_cameras(uber_cam, columns, start_frame, bulk)
+                    keyed = count
+
+            _write_sequence_info(backend, uber_cam, keys, frames, start_frame)
+
+            if link_images and not img_sequence:
+                with instrument.span("link_images"):
+                    img_sequence = _link_images(
+                        backend, uber_cam, cameras, frames, start_frame
+                    )
+
+            if img_sequence:
+                with instrument.span("image_plane"):
+                    _bind_image_sequence(
+                        backend, uber_cam, img_sequence, start_frame, count
+                    )
+
+            instrument.count("keys", keyed * len(columns))
+            instrument.count("curves", len(columns))
+
+        with instrument.span("refresh"):
+            backend.refresh()
+
+    return uber_cam
+
+
+def uber_camera_name(shot=None):
+    """
+    :param shot(str): shot name, None for the default uber camera
+
+    :raises: None
+
+    :return: name of the shot's uber camera, ``sh010_uber_cam`` for shot
+        ``sh010``, so each shot of a scene updates only its own
+    :rtype: str
+    """
+    if not shot:
+        return UBER_CAMERA
+
+    # Node names are letters, digits and underscores, not starting with a
+    # digit.
+    name = re.sub(r"[^A-Za-z0-9_]", "_", shot)
+    if name[0].isdigit():
+        name = "_" + name
+
+    return "%s_%s" % (name, UBER_CAMERA)
+
+
+def find_uber_camera(name=UBER_CAMERA):
+    """
+    Finds an uber camera made by an earlier :func:`sequence_cameras` run.
+
+    :param name(str): uber camera name, numbered copies are also matched
+
+    :raises: None
+
+    :return: uber camera transform and shape, None if there is none
+    :rtype: list
+    """
+    backend = get_backend()
+
+    candidates = [name] + [
+        node
+        for node in backend.ls("%s*" % name, type="transform")
+        if node != name
+    ]
+
+    for transform in candidates:
+        if not backend.exists("%s.%s" % (transform, SEQUENCE_ATTRIBUTE)):
+            continue
+
+        if _read_sequence_info(backend, transform) is None:
+            continue
+
+        shapes = backend.list_relatives(transform, type="camera")
+        if shapes:
+            return [transform, shapes[0]]
+
+    return None
+
+
+def bind_image_sequence(uber_cam, image):
+    """
+    Plays an image sequence on the uber camera's image plane, frame for
+    frame over the sequenced range.
+
+    :param uber_cam(list): uber camera transform and shape
+    :param image(str): first image of a sequence numbered from the uber
+        camera's start frame, as written by :func:`sequence_images`
+
+    :raises: ``RuntimeError`` if the camera was not sequenced or has no
+        image plane
+
+    :return: image plane shape
+    :rtype: str
+    """
+    backend = get_backend()
+    info = sequence_info(uber_cam[0])
+
+    if info is None:
+        msg = "%s was not made by sequence_cameras." % uber_cam[0]
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    with batch_edit("bind_image_sequence"):
+        return _bind_image_sequence(
+            backend,
+            uber_cam,
+            image,
+            info["start_frame"],
+            sum(info["frames"]),
+        )
+
+
+def set_image_resolution(uber_cam, resolution):
+    """
+    Switches the uber image plane between the full resolution sequence and
+    its proxies, see :func:`generate_proxies`.
+
+    :param uber_cam(list): uber camera transform and shape
+    :param resolution(str): ``full``, ``half`` or ``quarter``
+
+    :raises: ``RuntimeError`` for an unknown resolution, if no sequence is
+        bound to the image plane or its proxies do not exist
+
+    :return: image now shown
+    :rtype: str
+    """
+    backend = get_backend()
+    img_plane = _image_plane(backend, uber_cam)
+    plug = "%s.%s" % (img_plane, IMAGE_ATTRIBUTE)
+
+    if not backend.exists(plug) or not backend.get_attr(plug):
+        msg = "No image sequence is bound to %s." % img_plane
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    image = proxies.proxy_path(backend.get_attr(plug), resolution)
+
+    if not os.path.isfile(image):
+        msg = "No %s resolution proxies at %s." % (resolution, image)
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    backend.set_attr("%s.imageName" % img_plane, image)
+
+    return image
+
+
+def prefetch_images(
+    uber_cam=None,
+    radius=prefetch.DEFAULT_RADIUS,
+    budget=prefetch.DEFAULT_BUDGET,
+    workers=prefetch.DEFAULT_WORKERS,
+):
+    """
+    Warms the page cache with the uber image plane's images around the
+    current time while scrubbing, see :class:`prefetch.Prefetcher`.
+
+    The images are those the image plane shows when this is called, start
+    it again after :func:`set_image_resolution`.
+
+    :param uber_cam(list): uber camera transform and shape, found with
+        :func:`find_uber_camera` by default
+    :param radius(int): frames warmed on each side of the current one
+    :param budget(int): bytes of images warmed at a time
+    :param workers(int): warming threads
+
+    :raises: ``RuntimeError`` if there is no sequenced uber camera or no
+        image sequence is bound to its image plane
+
+    :return: the running prefetcher, stop it with ``stop()``
+    :rtype: prefetch.Prefetcher
+    """
+    backend = get_backend()
+    uber_cam = uber_cam or find_uber_camera()
+    info = sequence_info(uber_cam[0]) if uber_cam else None
+
+    if info is None:
+        msg = "No sequenced uber camera to prefetch images for."
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    img_plane = _image_plane(backend, uber_cam)
+    image = backend.get_attr("%s.imageName" % img_plane)
+
+    if not image or not backend.get_attr("%s.useFrameExtension" % img_plane):
+        msg = "No image sequence is bound to %s." % img_plane
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    first = info["start_frame"]
+    last = first + sum(info["frames"]) - 1
+
+    return prefetch.Prefetcher(
+        partial(images.frame_path, image),
+        first,
+        last,
+        radius=radius,
+        budget=budget,
+        workers=workers,
+    ).start()
+
+
+def sequence_info(transform):
+    """
+    Reads what an uber camera has keyed.
+
+    :param transform(str): uber camera transform
+
+    :raises: None
+
+    :return: ``start_frame``, camera ``cameras`` keys and the ``frames``
+        given to each camera, None if the camera was not sequenced
+    :rtype: dict
+    """
+    backend = get_backend()
+
+    if not backend.exists("%s.%s" % (transform, SEQUENCE_ATTRIBUTE)):
+        return None
+
+    return _read_sequence_info(backend, transform)
+
+
+def _cameras_to_columns(cameras):
+    if isinstance(cameras, sequence.CameraSequence):
+        return list(cameras.names), cameras.columns()
+
+    cameras = snapshot.snapshots(cameras)
+    return [cam.name for cam in cameras], sequence.snapshot_columns(cameras)
+
+
+def _camera_frames(cameras, hold=None, sample=False):
+    """
+    Reads cameras into keyable columns with one row per uber camera frame.
+
+    :param cameras(list|sequence.CameraSequence): cameras to read
+    :param hold(int|list): frames given to every camera, or to each camera
+    :param sample(bool): sample animated cameras over their frame range
+
+    :raises: ``RuntimeError`` if a hold is not a positive frame count
+
+    :return: camera names, frames given to each camera and the columns
+    :rtype: tuple
+    """
+    if sample:
+        return _sample_cameras(cameras, hold)
+
+    names, columns = _cameras_to_columns(cameras)
+    frames = _holds(hold, len(names))
+
+    if any(count != 1 for count in frames):
+        columns = dict(
+            (
+                attribute,
+                [
+                    value
+                    for value, count in zip(values, frames)
+                    for _ in range(count)
+                ],
+            )
+            for attribute, values in columns.items()
+        )
+
+    return names, frames, columns
+
+
+def _holds(hold, count):
+    if hold is None:
+        hold = 1
+
+    if isinstance(hold, int):
+        holds = [hold] * count
+    else:
+        holds = [int(frames) for frames in hold]
+
+    if len(holds) != count or any(frames < 1 for frames in holds):
+        msg = "Holds must be %d positive frame counts, got %s." % (count, hold)
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    return holds
+
+
+def _sample_cameras(cameras, hold=None):
+    """
+    Samples each camera over its own frame range with one backend call per
+    camera.
+    """
+    backend = get_backend()
+
+    if isinstance(cameras, sequence.CameraSequence):
+        nodes = list(zip(cameras.names, cameras.shapes))
+    else:
+        nodes = [(cam.transform, cam.shape) for cam in cameras]
+
+    holds = None if hold is None else _holds(hold, len(nodes))
+    start = None
+
+    frames = []
+    samples = ([], [], [], [])
+
+    for i, (transform, shape) in enumerate(nodes):
+        key_range = backend.key_range([transform, shape])
+
+        if key_range is not None:
+            first = int(math.floor(key_range[0]))
+            count = int(math.ceil(key_range[1])) - first + 1
+        else:
+            if start is None:
+                start = backend.playback_range()[0]
+            first, count = start, 1
+
+        if holds is not None:
+            count = holds[i]
+
+        times = [first + t for t in range(count)]
+        for column, values in zip(
+            samples, backend.sample_camera(transform, shape, times)
+        ):
+            column.extend(values)
+
+        frames.append(count)
+
+    names = [transform for transform, _ in nodes]
+
+    if not frames:
+        return names, frames, sequence.snapshot_columns([])
+
+    columns = sequence.channel_columns(
+        list(zip(*samples[0])),
+        list(zip(*samples[1])),
+        samples[2],
+        list(zip(*samples[3])),
     )
-    cmds.connectAttr(
-        "%s.verticalFilmAperture" % uber_cam[1], "%s.sizeY" % imgPlane[1]
+
+    return names, frames, columns
+
+
+def _cameras_to_images(cameras):
+    if isinstance(cameras, sequence.CameraSequence):
+        return cameras.image_paths
+    return [cam.image_path for cam in snapshot.snapshots(cameras)]
+
+
+def _sequence_keys(names, frames, columns):
+    """
+    Identifies each camera by its name and a checksum of the values keyed
+    for it, so a camera that moved since the last run is seen as changed.
+
+    :param names(list): camera names
+    :param frames(list): frames given to each camera
+    :param columns(dict): attribute name to per-frame values
+
+    :raises: None
+
+    :return: one key per camera
+    :rtype: list
+    """
+    rows = zip(*columns.values())
+    keys = []
+
+    for name, count in zip(names, frames):
+        block = repr(tuple(islice(rows, count))).encode("utf-8")
+        keys.append("%s:%08x" % (name, zlib.crc32(block) & 0xFFFFFFFF))
+
+    return keys
+
+
+def _read_sequence_info(backend, transform):
+    try:
+        info = json.loads(
+            backend.get_attr("%s.%s" % (transform, SEQUENCE_ATTRIBUTE))
+        )
+        cameras = list(info["cameras"])
+        frames = [int(count) for count in info.get("frames", [])]
+
+        # Uber cameras keyed before holds were added have no frame counts.
+        if not frames:
+            frames = [1] * len(cameras)
+
+        if len(frames) != len(cameras):
+            return None
+
+        return {
+            "start_frame": int(info["start_frame"]),
+            "cameras": cameras,
+            "frames": frames,
+        }
+    except (TypeError, ValueError, KeyError, AttributeError):
+        return None
+
+
+def _write_sequence_info(backend, uber_cam, keys, frames, start_frame):
+    backend.set_attr(
+        "%s.%s" % (uber_cam[0], SEQUENCE_ATTRIBUTE),
+        json.dumps(
+            {"start_frame": start_frame, "cameras": keys, "frames": frames}
+        ),
     )
 
-    for t, cam in enumerate(cameras):
-        frameNumber = t + start_frame
-        translation = cam.translation
-        rotation = cam.rotation
-
-        for i, direction in enumerate(["X", "Y", "Z"]):
-            cmds.setKeyframe(
-                uber_cam[0],
-                value=translation[i],
-                attribute="translate%s" % direction,
-                inTangentType="spline",
-                outTangentType="spline",
-                time=frameNumber,
+
+def _offsets(start_frame, frames):
+    """
+    :return: first frame of each camera, followed by the end frame
+    :rtype: list
+    """
+    offsets = [start_frame]
+
+    for count in frames:
+        offsets.append(offsets[-1] + count)
+
+    return offsets
+
+
+def _attribute_nodes(uber_cam, columns):
+    """
+    :return: uber camera node and the keyed attributes on it
+    :rtype: list
+    """
+    transform = [a for a in columns if a in TRANSFORM_ATTRIBUTES]
+    shape = [a for a in columns if a not in TRANSFORM_ATTRIBUTES]
+
+    return [(uber_cam[0], transform), (uber_cam[1], shape)]
+
+
+def _key_cameras(uber_cam, columns, start_frame, bulk, first=0, last=None):
+    """
+    Keys rows ``first`` to ``last`` of the columns, row 0 being
+    ``start_frame``.
+    """
+    if last is None:
+        last = len(columns["focalLength"])
+
+    writer = keying.KeyWriter(bulk=bulk)
+    times = [t + start_frame for t in range(first, last)]
+
+    for node, attributes in _attribute_nodes(uber_cam, columns):
+        for attribute in attributes:
+            writer.extend(
+                node, attribute, times, columns[attribute][first:last]
             )
 
-            cmds.setKeyframe(
-                uber_cam[0],
-                value=rotation[i],
-                attribute="rotate%s" % direction,
-                inTangentType="spline",
-                outTangentType="spline",
-                time=frameNumber,
+    writer.flush()
+
+
+def _resequence(backend, uber_cam, keys, frames, columns, start_frame, bulk):
+    """
+    Brings an existing uber camera's keys in line with a new camera order.
+
+    :param backend(backends.Backend): scene backend
+    :param uber_cam(list): uber camera transform and shape
+    :param keys(list): camera keys from :func:`_sequence_keys`
+    :param frames(list): frames given to each camera
+    :param columns(dict): attribute name to per-frame values
+    :param start_frame(int): frame of the first camera
+    :param bulk(bool): write whole curves when most cameras changed
+
+    :raises: None
+
+    :return: number of frames keyed
+    :rtype: int
+    """
+    info = _read_sequence_info(backend, uber_cam[0])
+    old = _offsets(info["start_frame"], info["frames"])
+    new = _offsets(start_frame, frames)
+    nodes = _attribute_nodes(uber_cam, columns)
+
+    matcher = difflib.SequenceMatcher(None, info["cameras"], keys, False)
+    opcodes = matcher.get_opcodes()
+
+    changed = sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag != "equal")
+    cuts = [
+        (old[i1], old[i2] - 1)
+        for tag, i1, i2, j1, j2 in opcodes
+        if tag in ("delete", "replace")
+    ]
+
+    # Unchanged runs moving earlier go first, in order, then runs moving
+    # later in reverse, so no run lands on keys that have not moved yet.
+    moves = [
+        (old[i1], old[i2] - 1, new[j1] - old[i1])
+        for tag, i1, i2, j1, j2 in opcodes
+        if tag == "equal" and new[j1] != old[i1]
+    ]
+    moves = [m for m in moves if m[2] < 0] + [
+        m for m in reversed(moves) if m[2] > 0
+    ]
+
+    edits = changed + len(cuts) + len(moves)
+    limit = max(RESEQUENCE_EDITS, len(keys) * RESEQUENCE_LIMIT)
+
+    if edits > limit:
+        log.debug(
+            "%d of %d cameras changed in %d runs, rekeying."
+            % (changed, len(keys), len(moves))
+        )
+
+        if info["cameras"]:
+            for node, attributes in nodes:
+                backend.cut_keys(node, attributes, old[0], old[-1] - 1)
+
+        _key_cameras(uber_cam, columns, start_frame, bulk)
+        return new[-1] - start_frame
+
+    for start, end in cuts:
+        for node, attributes in nodes:
+            backend.cut_keys(node, attributes, start, end)
+
+    for start, end, offset in moves:
+        for node, attributes in nodes:
+            backend.shift_keys(node, attributes, start, end, offset)
+
+    # Key the cameras that were added or changed.
+    keyed = 0
+
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag in ("insert", "replace"):
+            _key_cameras(
+                uber_cam,
+                columns,
+                start_frame,
+                False,
+                new[j1] - start_frame,
+                new[j2] - start_frame,
             )
+            keyed += new[j2] - new[j1]
+
+    log.debug(
+        "Re-sequenced %s: %d cameras keyed, %d runs moved."
+        % (uber_cam[0], changed, len(moves))
+    )
+
+    return keyed
+
+
+def _image_plane(backend, uber_cam):
+    """
+    :raises: ``RuntimeError`` if the uber camera has no image plane
+
+    :return: image plane shape
+    :rtype: str
+    """
+    img_planes = backend.list_connections(uber_cam[1], type="imagePlane")
+
+    if not img_planes:
+        msg = "%s has no image plane." % uber_cam[0]
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    return backend.list_relatives(img_planes[0])[0]
 
-        cmds.setKeyframe(
-            uber_cam[1],
-            value=cam.focal_length,
-            attribute="focalLength",
-            inTangentType="spline",
-            outTangentType="spline",
-            time=frameNumber,
+
+def _bind_image_sequence(backend, uber_cam, image, start_frame, count):
+    """
+    Keys the image plane's frame extension to the scene time from
+    start_frame, so frame N shows image N.
+    """
+    img_plane = _image_plane(backend, uber_cam)
+    plug = "%s.%s" % (img_plane, IMAGE_ATTRIBUTE)
+
+    if not backend.exists(plug):
+        backend.add_attr(img_plane, IMAGE_ATTRIBUTE)
+
+    backend.set_attr(plug, image)
+    backend.set_attr("%s.imageName" % img_plane, image)
+    backend.set_attr("%s.useFrameExtension" % img_plane, 1)
+
+    last = start_frame + max(count, 2) - 1
+    backend.write_curve(
+        img_plane,
+        "frameExtension",
+        [start_frame, last],
+        [start_frame, last],
+        "linear",
+        "linear",
+    )
+
+    return img_plane
+
+
+def _link_images(backend, uber_cam, cameras, frames, start_frame):
+    """
+    Links every frame of the uber camera to its camera's plate in the
+    camera's symlink farm, making the farm on first use.
+
+    :return: first frame of the farm, None if no camera has an image
+    :rtype: str
+    """
+    img_plane = _image_plane(backend, uber_cam)
+    plug = "%s.%s" % (img_plane, LINK_ATTRIBUTE)
+    directory = backend.get_attr(plug) if backend.exists(plug) else None
+
+    if not directory:
+        if not os.path.isdir(LINK_ROOT):
+            os.makedirs(LINK_ROOT)
+
+        directory = tempfile.mkdtemp(prefix=uber_cam[0] + "_", dir=LINK_ROOT)
+        backend.add_attr(img_plane, LINK_ATTRIBUTE)
+        backend.set_attr(plug, directory)
+
+    paths = _cameras_to_images(cameras)
+    sources = [path for path, count in zip(paths, frames) for _ in range(count)]
+
+    extensions = set(images.split_ext(path) for path in paths if path)
+    if len(extensions) > 1:
+        log.warning(
+            "Plates of %s mix %s images, the image plane reads them all as "
+            "one format." % (uber_cam[0], ", ".join(sorted(extensions)))
         )
 
-        filmback = cam.filmback
+    result = images.assemble(
+        sources,
+        os.path.join(directory, "plate.<frame>.<ext>"),
+        start_frame=start_frame,
+        mode="symlink",
+        checksum=False,
+    )
 
-        cmds.setKeyframe(
-            uber_cam[1],
-            value=filmback[0],
-            attribute="horizontalFilmAperture",
-            inTangentType="spline",
-            outTangentType="spline",
-            time=frameNumber,
+    if not result.ok:
+        log.warning(
+            "%d of %d frames of %s have no plate."
+            % (len(result.failed), len(result), uber_cam[0])
         )
 
-        cmds.setKeyframe(
-            uber_cam[1],
-            value=filmback[1],
-            attribute="verticalFilmAperture",
-            inTangentType="spline",
-            outTangentType="spline",
-            time=frameNumber,
+    if directory not in _link_callbacks:
+        _link_callbacks[directory] = backend.add_about_to_delete_callback(
+            uber_cam[0], lambda: _remove_link_farm(directory)
         )
 
-    cmds.refresh()
+    return result.first
 
-    return uber_cam
+
+def _remove_link_farm(directory):
+    """
+    Deletes a symlink farm, the plates it points at are left alone.
+    """
+    _link_callbacks.pop(directory, None)
+
+    root = os.path.join(os.path.realpath(LINK_ROOT), "")
+    if not os.path.realpath(directory).startswith(root):
+        log.warning("Not removing %s, it is outside %s." % (directory, root))
+        return
+
+    shutil.rmtree(directory, ignore_errors=True)
+    log.debug("Removed symlink farm %s" % directory)
+
+
+def _create_image_plane(backend, uber_cam):
+    """
+    Creates the uber camera's image plane, sized by its filmback.
+
+    :param backend(backends.Backend): scene backend
+    :param uber_cam(list): uber camera transform and shape
+
+    :raises: None
+
+    :return: image plane transform and shape
+    :rtype: list
+    """
+    imgPlane = backend.create_image_plane(uber_cam[1], "uber_IMGPLNE")
+
+    backend.set_attr("%s.fit" % imgPlane[1], 4)
+    backend.set_attr("%s.displayOnlyIfCurrent" % imgPlane[1], 1)
+    backend.connect_attr(
+        "%s.horizontalFilmAperture" % uber_cam[1], "%s.sizeX" % imgPlane[1]
+    )
+    backend.connect_attr(
+        "%s.verticalFilmAperture" % uber_cam[1], "%s.sizeY" % imgPlane[1]
+    )
+
+    return imgPlane
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Scene backends.
+
+All scene access in the api, models and hooks goes through the backend
+returned by :func:`get_backend`. The Maya backend is used unless another
+one has been installed with :func:`set_backend`.
+"""
+
+from contextlib import contextmanager
+
+from .base import Backend, CURVE_TYPES, SCENE_EVENTS
+
+_backend = None
+
+
+def create_backend(name):
+    """
+    Creates a backend by name.
+
+    :param name(str): ``maya`` or ``memory``
+
+    :raises: ``RuntimeError`` for an unknown backend
+
+    :return: new backend
+    :rtype: Backend
+    """
+    if name == "maya":
+        from .maya_backend import MayaBackend
+
+        return MayaBackend()
+
+    if name == "memory":
+        from .memory_backend import MemoryBackend
+
+        return MemoryBackend()
+
+    raise RuntimeError("Unknown backend %s" % name)
+
+
+def get_backend():
+    """
+    Returns the active backend, creating the Maya backend on first use.
+
+    :raises: None
+
+    :return: active backend
+    :rtype: Backend
+    """
+    global _backend
+
+    if _backend is None:
+        _backend = create_backend("maya")
+
+    return _backend
+
+
+def set_backend(backend):
+    """
+    Installs the backend used for all scene access.
+
+    :param backend(Backend|str): backend or backend name
+
+    :raises: ``RuntimeError`` for an unknown backend name
+
+    :return: the installed backend
+    :rtype: Backend
+    """
+    global _backend
+
+    if not isinstance(backend, Backend):
+        backend = create_backend(backend)
+
+    _backend = backend
+
+    return backend
+
+
+@contextmanager
+def using(backend):
+    """
+    Temporarily installs a backend.
+
+    :param backend(Backend|str): backend or backend name
+
+    :raises: None
+
+    :return: the installed backend
+    :rtype: Backend
+    """
+    global _backend
+
+    previous = _backend
+
+    try:
+        yield set_backend(backend)
+    finally:
+        _backend = previous
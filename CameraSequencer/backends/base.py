@@ -0,0 +1,360 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import logging
+
+log = logging.getLogger("CameraSequencer")
+
+# animCurve node type driving each attribute keyed by the sequencer.
+CURVE_TYPES = {
+    "translateX": "animCurveTL",
+    "translateY": "animCurveTL",
+    "translateZ": "animCurveTL",
+    "rotateX": "animCurveTA",
+    "rotateY": "animCurveTA",
+    "rotateZ": "animCurveTA",
+    "focalLength": "animCurveTU",
+    "horizontalFilmAperture": "animCurveTU",
+    "verticalFilmAperture": "animCurveTU",
+}
+
+# Scene level events that can be passed to Backend.add_scene_callback.
+SCENE_EVENTS = ("before_open", "before_new", "before_remove_reference")
+
+
+class Backend(object):
+    """
+    Everything the sequencer needs from a scene.
+
+    Nodes and plugs are addressed by name (``node`` and ``node.attribute``)
+    the same way ``maya.cmds`` addresses them.
+    """
+
+    name = None
+
+    def __repr__(self):
+        return "<%s instance>" % self.__class__.__name__
+
+    def initialize(self):
+        """
+        Prepares the backend for use outside an interactive session.
+
+        :raises: ``RuntimeError`` if the scene host is unavailable
+
+        :return: None
+        :rtype: NoneType
+        """
+
+    # Scenes
+
+    def open_scene(self, path):
+        raise NotImplementedError
+
+    def save_scene(self, path):
+        raise NotImplementedError
+
+    def refresh(self):
+        raise NotImplementedError
+
+    def open_undo_chunk(self, name):
+        raise NotImplementedError
+
+    def close_undo_chunk(self):
+        raise NotImplementedError
+
+    def suspend_refresh(self, suspend):
+        """
+        :param suspend(bool): stop viewport redraws when True
+        """
+        raise NotImplementedError
+
+    def suspend_evaluation(self):
+        """
+        Stops graph evaluation from reacting to edits.
+
+        :return: state to hand back to :meth:`resume_evaluation`
+        """
+        raise NotImplementedError
+
+    def resume_evaluation(self, state):
+        raise NotImplementedError
+
+    def playback_range(self):
+        """
+        :return: min and max playback frames
+        :rtype: tuple
+        """
+        raise NotImplementedError
+
+    def get_time(self):
+        """
+        :return: current frame
+        :rtype: float
+        """
+        raise NotImplementedError
+
+    def workspace_root(self):
+        """
+        :return: directory relative file paths in the scene resolve from
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    # Node queries
+
+    def exists(self, node):
+        raise NotImplementedError
+
+    def node_type(self, node):
+        raise NotImplementedError
+
+    def node_uuid(self, node):
+        """
+        :param node(str): node name
+
+        :return: the node's UUID, which stays the same when it is renamed
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def node_from_uuid(self, uuid):
+        """
+        :param uuid(str): node UUID
+
+        :return: name of the node with the UUID, None if there is none
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def ls(self, pattern=None, type=None, selection=False):
+        """
+        :param pattern(str): name or glob pattern
+        :param type(str): only return nodes of this type
+        :param selection(bool): only return selected nodes
+
+        :return: matching node names
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    def selected_cameras(self):
+        """
+        Finds the selected cameras, and the cameras under selected groups,
+        in one query.
+
+        :return: transform, shape and transform UUID of every camera, in
+            selection order
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    def list_relatives(self, node, parent=False, type=None):
+        """
+        :param node(str): node to query
+        :param parent(bool): return the parent instead of the children
+        :param type(str): only return nodes of this type
+
+        :return: related node names
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    def list_connections(self, node, type=None, source=True, destination=True):
+        raise NotImplementedError
+
+    # Attributes
+
+    def get_attr(self, plug):
+        raise NotImplementedError
+
+    def world_translation(self, node):
+        raise NotImplementedError
+
+    def world_rotation(self, node):
+        raise NotImplementedError
+
+    def sample_camera(self, transform, shape, times):
+        """
+        Evaluates a camera at several times without changing the current
+        time.
+
+        :param transform(str): camera transform
+        :param shape(str): camera shape
+        :param times(list): frames to evaluate
+
+        :return: world translations, world rotations, focal lengths and
+            filmbacks, one entry per time in each
+        :rtype: tuple
+        """
+        raise NotImplementedError
+
+    def set_attr(self, plug, value):
+        raise NotImplementedError
+
+    def add_attr(self, node, attribute, data_type="string"):
+        raise NotImplementedError
+
+    def connect_attr(self, source, destination):
+        raise NotImplementedError
+
+    # Node creation
+
+    def create_node(self, node_type, name=None):
+        raise NotImplementedError
+
+    def create_camera(self, name):
+        """
+        :param name(str): transform name
+
+        :return: transform and shape
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    def create_image_plane(self, camera, name):
+        """
+        :param camera(str): camera shape to attach to
+        :param name(str): transform name
+
+        :return: transform and shape
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    def rename(self, node, name):
+        raise NotImplementedError
+
+    def delete(self, nodes):
+        raise NotImplementedError
+
+    # Keyframes
+
+    def set_keyframe(
+        self, node, attribute, time, value, in_tangent, out_tangent
+    ):
+        raise NotImplementedError
+
+    def write_curve(
+        self, node, attribute, times, values, in_tangent, out_tangent
+    ):
+        """
+        Replaces an attribute's animation with the given keys in one pass.
+
+        :return: name of the new animCurve
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def cut_keys(self, node, attributes, start, end):
+        """
+        Removes keys between start and end, inclusive.
+        """
+        raise NotImplementedError
+
+    def shift_keys(self, node, attributes, start, end, offset):
+        """
+        Moves keys between start and end, inclusive, by offset frames.
+        """
+        raise NotImplementedError
+
+    def key_range(self, nodes):
+        """
+        :param nodes(list): nodes to query
+
+        :return: first and last key time across the nodes, None when none
+            of them are keyed
+        :rtype: tuple
+        """
+        raise NotImplementedError
+
+    def get_keys(self, node, attribute):
+        """
+        :return: key times and values
+        :rtype: tuple
+        """
+        raise NotImplementedError
+
+    # Message callbacks
+
+    def add_scene_callback(self, event, callback):
+        """
+        :param event(str): one of :data:`SCENE_EVENTS`
+        :param callback(callable): called with no arguments
+
+        :return: callback id
+        """
+        raise NotImplementedError
+
+    def add_name_changed_callback(self, node, callback):
+        """
+        :param node(str): node to watch
+        :param callback(callable): called with the old and new names
+
+        :return: callback id
+        """
+        raise NotImplementedError
+
+    def add_about_to_delete_callback(self, node, callback):
+        """
+        :param node(str): node to watch
+        :param callback(callable): called with no arguments
+
+        :return: callback id
+        """
+        raise NotImplementedError
+
+    def add_node_removed_callback(self, callback, node_type="dependNode"):
+        """
+        Watches every node of a type in the scene with one callback.
+
+        :param callback(callable): called with the UUID and name of each
+            removed node
+        :param node_type(str): only nodes of this type
+
+        :return: callback id
+        """
+        raise NotImplementedError
+
+    def add_node_renamed_callback(self, callback):
+        """
+        Watches every node in the scene with one callback.
+
+        :param callback(callable): called with the UUID, old name and new
+            name of each renamed node
+
+        :return: callback id
+        """
+        raise NotImplementedError
+
+    def add_plug_changed_callback(self, callback):
+        """
+        Watches every node in the scene with one callback.
+
+        :param callback(callable): called with the node and attribute name
+            when an attribute is set, connected or disconnected
+
+        :return: callback id
+        """
+        raise NotImplementedError
+
+    def add_attribute_changed_callback(self, node, callback):
+        """
+        :param node(str): node to watch
+        :param callback(callable): called with the attribute name when an
+            attribute of the node is set, connected or disconnected
+
+        :return: callback id
+        """
+        raise NotImplementedError
+
+    def add_time_changed_callback(self, callback):
+        """
+        :param callback(callable): called with the new frame whenever the
+            current time changes
+
+        :return: callback id
+        """
+        raise NotImplementedError
+
+    def remove_callback(self, callback_id):
+        raise NotImplementedError
@@ -0,0 +1,635 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import math
+import logging
+from collections import OrderedDict
+
+from CameraSequencer.backends.base import Backend, CURVE_TYPES
+
+try:
+    from maya import cmds
+    from maya.api import OpenMaya
+except ImportError:
+    pass
+
+log = logging.getLogger("CameraSequencer")
+
+try:
+    STRING_TYPES = (str, unicode)
+except NameError:
+    STRING_TYPES = (str,)
+
+# First node.attribute named by a setAttr command.
+SETATTR_PATTERN = re.compile(r'^\s*setAttr\b.*?"?([A-Za-z_|:][\w|:]*)\.(\w+)')
+
+# Returned by _plug_value for plugs it does not read, which are left to
+# getAttr.
+UNREAD = object()
+
+
+class MayaBackend(Backend):
+    """
+    Scene backend on top of ``maya.cmds`` and ``maya.api.OpenMaya``.
+
+    Transforms and attributes are read through API 2.0 function sets and
+    plugs rather than parsed ``cmds`` strings. Nodes are looked up by name
+    once and then kept as MObjectHandles and MDagPaths, which are checked
+    to still be alive and named the same before they are reused.
+    """
+
+    name = "maya"
+
+    def __init__(self):
+        self._handles = {}
+        self._paths = {}
+
+    def initialize(self):
+        global cmds, OpenMaya
+
+        try:
+            cmds.about(version=True)
+            return
+
+        except (NameError, AttributeError):
+            pass
+
+        try:
+            import maya.standalone
+
+            maya.standalone.initialize(name="python")
+
+        except ImportError:
+            log.error("Maya is not available, run with mayapy.")
+            raise RuntimeError("Maya is not available, run with mayapy.")
+
+        from maya import cmds
+        from maya.api import OpenMaya
+
+    # Scenes
+
+    def open_scene(self, path):
+        cmds.file(path, open=True, force=True)
+
+    def save_scene(self, path):
+        file_type = (
+            "mayaBinary" if path.lower().endswith(".mb") else "mayaAscii"
+        )
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        cmds.file(rename=path)
+        cmds.file(save=True, force=True, type=file_type)
+
+    def refresh(self):
+        cmds.refresh()
+
+    def open_undo_chunk(self, name):
+        cmds.undoInfo(openChunk=True, chunkName=name)
+
+    def close_undo_chunk(self):
+        cmds.undoInfo(closeChunk=True)
+
+    def suspend_refresh(self, suspend):
+        cmds.refresh(suspend=suspend)
+
+    def suspend_evaluation(self):
+        # Switching the evaluation manager to DG mode stops it rebuilding
+        # the evaluation graph after every edit. Older Maya has no
+        # evaluation manager and nothing to suspend.
+        try:
+            mode = cmds.evaluationManager(query=True, mode=True)[0]
+        except (AttributeError, RuntimeError):
+            return None
+
+        if mode != "off":
+            cmds.evaluationManager(mode="off")
+
+        return mode
+
+    def resume_evaluation(self, state):
+        if state and state != "off":
+            cmds.evaluationManager(mode=state)
+
+    def playback_range(self):
+        return (
+            cmds.playbackOptions(query=True, minTime=True),
+            cmds.playbackOptions(query=True, maxTime=True),
+        )
+
+    def get_time(self):
+        return cmds.currentTime(query=True)
+
+    def workspace_root(self):
+        return cmds.workspace(query=True, rootDirectory=True)
+
+    # Node queries
+
+    def exists(self, node):
+        return cmds.objExists(node)
+
+    def node_type(self, node):
+        return OpenMaya.MFnDependencyNode(self._mobject(node)).typeName
+
+    def node_uuid(self, node):
+        return OpenMaya.MFnDependencyNode(self._mobject(node)).uuid().asString()
+
+    def node_from_uuid(self, uuid):
+        nodes = cmds.ls(uuid)
+        return nodes[0] if nodes else None
+
+    def ls(self, pattern=None, type=None, selection=False):
+        args = [pattern] if pattern else []
+        kwargs = {"selection": selection}
+
+        if type:
+            kwargs["type"] = type
+
+        return cmds.ls(*args, **kwargs) or []
+
+    def selected_cameras(self):
+        shapes = (
+            cmds.ls(selection=True, dag=True, type="camera", long=True) or []
+        )
+
+        if not shapes:
+            return []
+
+        transforms = [shape.rsplit("|", 1)[0] for shape in shapes]
+
+        # Names are shortened, and UUIDs read, for every node at once. ls
+        # returns explicitly named nodes in the order they are given.
+        nodes = list(OrderedDict.fromkeys(transforms + shapes))
+        names = dict(zip(nodes, cmds.ls(nodes)))
+        parents = list(OrderedDict.fromkeys(transforms))
+        uuids = dict(zip(parents, cmds.ls(parents, uuid=True)))
+
+        return [
+            (names[transform], names[shape], uuids[transform])
+            for transform, shape in zip(transforms, shapes)
+        ]
+
+    def list_relatives(self, node, parent=False, type=None):
+        kwargs = {"parent": True} if parent else {"children": True}
+
+        if type:
+            kwargs["type"] = type
+
+        return cmds.listRelatives(node, **kwargs) or []
+
+    def list_connections(self, node, type=None, source=True, destination=True):
+        kwargs = {"source": source, "destination": destination}
+
+        if type:
+            kwargs["type"] = type
+
+        return cmds.listConnections(node, **kwargs) or []
+
+    # Attributes
+
+    def get_attr(self, plug):
+        try:
+            mplug = self._mplug(plug)
+        except RuntimeError:
+            # Let getAttr raise its usual error for a missing plug.
+            return cmds.getAttr(plug)
+
+        value = _plug_value(mplug)
+
+        if value is UNREAD:
+            return cmds.getAttr(plug)
+
+        return value
+
+    def world_translation(self, node):
+        matrix = OpenMaya.MTransformationMatrix(
+            self._dag_path(node).inclusiveMatrix()
+        )
+        translation = matrix.translation(OpenMaya.MSpace.kWorld)
+
+        return [OpenMaya.MDistance.internalToUI(value) for value in translation]
+
+    def world_rotation(self, node):
+        path = self._dag_path(node)
+        rotation = OpenMaya.MTransformationMatrix(
+            path.inclusiveMatrix()
+        ).rotation()
+
+        # In the node's own rotate order, as xform reports it.
+        order = OpenMaya.MFnTransform(path).rotationOrder() - 1
+        rotation.reorderIt(order)
+
+        return [
+            math.degrees(rotation.x),
+            math.degrees(rotation.y),
+            math.degrees(rotation.z),
+        ]
+
+    def sample_camera(self, transform, shape, times):
+        # Plugs are evaluated in a DG context for each time, so the scene
+        # time never changes and nothing else in the scene is evaluated.
+        node = OpenMaya.MFnDependencyNode(self._mobject(transform))
+        matrix_plug = node.findPlug("worldMatrix", False)
+        matrix_plug = matrix_plug.elementByLogicalIndex(0)
+        order_plug = node.findPlug("rotateOrder", False)
+
+        camera = OpenMaya.MFnDependencyNode(self._mobject(shape))
+        plugs = (
+            matrix_plug,
+            order_plug,
+            camera.findPlug("focalLength", False),
+            camera.findPlug("horizontalFilmAperture", False),
+            camera.findPlug("verticalFilmAperture", False),
+        )
+
+        unit = OpenMaya.MTime.uiUnit()
+        guard = getattr(OpenMaya, "MDGContextGuard", None)
+        samples = ([], [], [], [])
+
+        for time in times:
+            context = OpenMaya.MDGContext(OpenMaya.MTime(time, unit))
+
+            # Maya 2019 and later evaluate in the context made current by
+            # a guard, older versions take it per read.
+            if guard is not None:
+                with guard(context):
+                    sample = _sample_plugs(plugs)
+            else:
+                sample = _sample_plugs(plugs, context)
+
+            for values, value in zip(samples, sample):
+                values.append(value)
+
+        return samples
+
+    def set_attr(self, plug, value):
+        if isinstance(value, STRING_TYPES):
+            cmds.setAttr(plug, value, type="string")
+        else:
+            cmds.setAttr(plug, value)
+
+    def add_attr(self, node, attribute, data_type="string"):
+        cmds.addAttr(node, longName=attribute, dataType=data_type)
+
+    def connect_attr(self, source, destination):
+        cmds.connectAttr(source, destination, force=True)
+
+    # Node creation
+
+    def create_node(self, node_type, name=None):
+        if name:
+            return cmds.createNode(node_type, name=name)
+        return cmds.createNode(node_type)
+
+    def create_camera(self, name):
+        camera = cmds.camera(name=name)
+        camera[0] = cmds.rename(camera[0], name)
+        camera[1] = cmds.listRelatives(camera[0], children=True)[0]
+
+        return camera
+
+    def create_image_plane(self, camera, name):
+        img_plane = cmds.imagePlane(camera=camera)
+        cmds.imagePlane(img_plane[1], edit=True, showInAllViews=False)
+        img_plane[0] = cmds.rename(img_plane[0], name)
+        img_plane[1] = cmds.listRelatives(img_plane[0], children=True)[0]
+
+        return img_plane
+
+    def rename(self, node, name):
+        return cmds.rename(node, name)
+
+    def delete(self, nodes):
+        cmds.delete(nodes)
+
+    # Keyframes
+
+    def set_keyframe(
+        self, node, attribute, time, value, in_tangent, out_tangent
+    ):
+        cmds.setKeyframe(
+            node,
+            value=value,
+            attribute=attribute,
+            inTangentType=in_tangent,
+            outTangentType=out_tangent,
+            time=time,
+        )
+
+    def write_curve(
+        self, node, attribute, times, values, in_tangent, out_tangent
+    ):
+        # All keys go in with a single multi-element setAttr on
+        # keyTimeValue, the same way Maya loads animation from an ascii
+        # scene, and one keyTangent edit covers the whole curve.
+        plug = "%s.%s" % (node, attribute)
+        count = len(times)
+
+        existing = cmds.listConnections(
+            plug, source=True, destination=False, type="animCurve"
+        )
+        if existing:
+            cmds.delete(existing)
+
+        curve = cmds.createNode(
+            CURVE_TYPES.get(attribute, "animCurveTU"),
+            name="%s_%s" % (node.split("|")[-1], attribute),
+        )
+
+        if count:
+            flat = []
+            for time, value in zip(times, values):
+                flat.append(time)
+                flat.append(value)
+
+            cmds.setAttr("%s.ktv[0:%d]" % (curve, count - 1), *flat, size=count)
+            cmds.keyTangent(
+                curve,
+                edit=True,
+                inTangentType=in_tangent,
+                outTangentType=out_tangent,
+            )
+
+        cmds.connectAttr(curve + ".output", plug, force=True)
+
+        return curve
+
+    def cut_keys(self, node, attributes, start, end):
+        cmds.cutKey(
+            node,
+            attribute=attributes,
+            time=(start, end),
+            option="keys",
+            clear=True,
+        )
+
+    def shift_keys(self, node, attributes, start, end, offset):
+        cmds.keyframe(
+            node,
+            attribute=attributes,
+            edit=True,
+            relative=True,
+            timeChange=offset,
+            time=(start, end),
+        )
+
+    def key_range(self, nodes):
+        times = cmds.keyframe(nodes, query=True, timeChange=True)
+
+        if not times:
+            return None
+
+        return min(times), max(times)
+
+    def get_keys(self, node, attribute):
+        plug = "%s.%s" % (node, attribute)
+
+        return (
+            cmds.keyframe(plug, query=True, timeChange=True) or [],
+            cmds.keyframe(plug, query=True, valueChange=True) or [],
+        )
+
+    # Message callbacks
+
+    def _mobject(self, node):
+        handle = self._handles.get(node)
+
+        if handle is not None and handle.isValid():
+            mobject = handle.object()
+            if _node_name(mobject) == node.split("|")[-1]:
+                return mobject
+
+        msel = OpenMaya.MSelectionList()
+        msel.add(node)
+        mobject = msel.getDependNode(0)
+
+        self._handles[node] = OpenMaya.MObjectHandle(mobject)
+
+        return mobject
+
+    def _dag_path(self, node):
+        path = self._paths.get(node)
+
+        if (
+            path is not None
+            and path.isValid()
+            and path.partialPathName() == node
+        ):
+            return path
+
+        msel = OpenMaya.MSelectionList()
+        msel.add(node)
+        path = msel.getDagPath(0)
+
+        self._paths[node] = path
+
+        return path
+
+    def _mplug(self, plug):
+        node, attribute = plug.split(".", 1)
+
+        if "." in attribute or "[" in attribute:
+            msel = OpenMaya.MSelectionList()
+            msel.add(plug)
+            return msel.getPlug(0)
+
+        return OpenMaya.MFnDependencyNode(self._mobject(node)).findPlug(
+            attribute, False
+        )
+
+    def add_scene_callback(self, event, callback):
+        messages = {
+            "before_open": OpenMaya.MSceneMessage.kBeforeOpen,
+            "before_new": OpenMaya.MSceneMessage.kBeforeNew,
+            "before_remove_reference": (
+                OpenMaya.MSceneMessage.kBeforeRemoveReference
+            ),
+        }
+
+        def maya_callback(*args):
+            callback()
+
+        return OpenMaya.MSceneMessage.addCallback(
+            messages[event], maya_callback
+        )
+
+    def add_name_changed_callback(self, node, callback):
+        def maya_callback(mobject, old_name, data):
+            new_name = OpenMaya.MFnDependencyNode(mobject).name()
+            callback(old_name, new_name)
+
+        return OpenMaya.MNodeMessage.addNameChangedCallback(
+            self._mobject(node), maya_callback
+        )
+
+    def add_about_to_delete_callback(self, node, callback):
+        def maya_callback(depend_node, dg_modifier, data):
+            callback()
+
+        return OpenMaya.MNodeMessage.addNodeAboutToDeleteCallback(
+            self._mobject(node), maya_callback
+        )
+
+    def add_node_removed_callback(self, callback, node_type="dependNode"):
+        def maya_callback(mobject, data):
+            node = OpenMaya.MFnDependencyNode(mobject)
+            callback(node.uuid().asString(), node.name())
+
+        return OpenMaya.MDGMessage.addNodeRemovedCallback(
+            maya_callback, node_type
+        )
+
+    def add_node_renamed_callback(self, callback):
+        def maya_callback(mobject, old_name, data):
+            # Nodes being created are named from nothing.
+            if not old_name:
+                return
+            node = OpenMaya.MFnDependencyNode(mobject)
+            callback(node.uuid().asString(), old_name, node.name())
+
+        # A null node watches every node in the scene.
+        return OpenMaya.MNodeMessage.addNameChangedCallback(
+            OpenMaya.MObject(), maya_callback
+        )
+
+    def add_plug_changed_callback(self, callback):
+        # Maya has no scene wide attribute changed message. Connections are
+        # watched through the DG, and values through the setAttr commands
+        # the UI and scripts run, so edits made with the API alone are not
+        # seen.
+        def connection_callback(source, destination, made, data):
+            for plug in (source, destination):
+                callback(
+                    OpenMaya.MFnDependencyNode(plug.node()).name(),
+                    plug.partialName(useLongNames=True),
+                )
+
+        def command_callback(command, data):
+            match = SETATTR_PATTERN.match(command)
+            if match:
+                callback(match.group(1).split("|")[-1], match.group(2))
+
+        return (
+            OpenMaya.MDGMessage.addConnectionCallback(connection_callback),
+            OpenMaya.MCommandMessage.addCommandCallback(command_callback),
+        )
+
+    def add_attribute_changed_callback(self, node, callback):
+        # Evaluations and other messages do not change what is stored.
+        changes = (
+            OpenMaya.MNodeMessage.kAttributeSet
+            | OpenMaya.MNodeMessage.kConnectionMade
+            | OpenMaya.MNodeMessage.kConnectionBroken
+        )
+
+        def maya_callback(message, plug, other_plug, data):
+            if message & changes:
+                callback(plug.partialName(useLongNames=True))
+
+        return OpenMaya.MNodeMessage.addAttributeChangedCallback(
+            self._mobject(node), maya_callback
+        )
+
+    def add_time_changed_callback(self, callback):
+        def maya_callback(time, data):
+            callback(time.asUnits(OpenMaya.MTime.uiUnit()))
+
+        return OpenMaya.MDGMessage.addTimeChangeCallback(maya_callback)
+
+    def remove_callback(self, callback_id):
+        if isinstance(callback_id, tuple):
+            OpenMaya.MMessage.removeCallbacks(list(callback_id))
+        else:
+            OpenMaya.MMessage.removeCallback(callback_id)
+
+
+def _node_name(mobject):
+    return OpenMaya.MFnDependencyNode(mobject).name()
+
+
+def _plug_value(plug):
+    """
+    Reads a plug the way getAttr would: numbers as int, float or bool,
+    distances, angles and times in UI units, strings, and compounds of
+    numbers as a list holding one tuple.
+    """
+    if plug.isArray:
+        return UNREAD
+
+    if plug.isCompound:
+        values = tuple(
+            _plug_value(plug.child(i)) for i in range(plug.numChildren())
+        )
+        if any(
+            value is UNREAD or isinstance(value, (tuple, list))
+            for value in values
+        ):
+            return UNREAD
+        return [values]
+
+    attribute = plug.attribute()
+
+    if attribute.hasFn(OpenMaya.MFn.kNumericAttribute):
+        numeric = OpenMaya.MFnNumericAttribute(attribute).numericType()
+        data = OpenMaya.MFnNumericData
+
+        if numeric == data.kBoolean:
+            return plug.asBool()
+        if numeric in (data.kByte, data.kChar, data.kShort, data.kInt):
+            return plug.asInt()
+        if numeric in (data.kFloat, data.kDouble):
+            return plug.asDouble()
+        return UNREAD
+
+    if attribute.hasFn(OpenMaya.MFn.kUnitAttribute):
+        unit = OpenMaya.MFnUnitAttribute(attribute).unitType()
+        units = OpenMaya.MFnUnitAttribute
+
+        if unit == units.kDistance:
+            return plug.asMDistance().asUnits(OpenMaya.MDistance.uiUnit())
+        if unit == units.kAngle:
+            return plug.asMAngle().asUnits(OpenMaya.MAngle.uiUnit())
+        if unit == units.kTime:
+            return plug.asMTime().asUnits(OpenMaya.MTime.uiUnit())
+        return UNREAD
+
+    if attribute.hasFn(OpenMaya.MFn.kEnumAttribute):
+        return plug.asShort()
+
+    if attribute.hasFn(OpenMaya.MFn.kTypedAttribute):
+        typed = OpenMaya.MFnTypedAttribute(attribute).attrType()
+        if typed == OpenMaya.MFnData.kString:
+            return plug.asString()
+
+    return UNREAD
+
+
+def _sample_plugs(plugs, *context):
+    """
+    :return: world translation and rotation, focal length and filmback read
+        from the plugs given to sample_camera
+    :rtype: tuple
+    """
+    matrix_plug, order_plug, focal_plug, width_plug, height_plug = plugs
+
+    matrix = OpenMaya.MFnMatrixData(matrix_plug.asMObject(*context)).matrix()
+    xform = OpenMaya.MTransformationMatrix(matrix)
+
+    translation = xform.translation(OpenMaya.MSpace.kWorld)
+    rotation = xform.rotation()
+    rotation.reorderIt(order_plug.asInt(*context))
+
+    return (
+        tuple(OpenMaya.MDistance.internalToUI(value) for value in translation),
+        (
+            math.degrees(rotation.x),
+            math.degrees(rotation.y),
+            math.degrees(rotation.z),
+        ),
+        focal_plug.asDouble(*context),
+        (width_plug.asDouble(*context), height_plug.asDouble(*context)),
+    )
@@ -0,0 +1,880 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import uuid
+import bisect
+import fnmatch
+import logging
+import functools
+from timeit import default_timer
+from collections import OrderedDict, defaultdict, namedtuple
+
+from CameraSequencer.backends.base import Backend, CURVE_TYPES
+
+log = logging.getLogger("CameraSequencer")
+
+Call = namedtuple("Call", ["name", "args", "kwargs", "elapsed"])
+
+# Compound attributes and the children they are made of.
+COMPOUNDS = {
+    "filmAperture": ("horizontalFilmAperture", "verticalFilmAperture"),
+    "translate": ("translateX", "translateY", "translateZ"),
+    "rotate": ("rotateX", "rotateY", "rotateZ"),
+}
+
+# Callbacks that watch the whole scene rather than one node.
+SCENE_CALLBACKS = ("scene", "time", "removed", "renamed", "plug")
+
+DEFAULT_ATTRS = {
+    "transform": {
+        "translateX": 0.0,
+        "translateY": 0.0,
+        "translateZ": 0.0,
+        "rotateX": 0.0,
+        "rotateY": 0.0,
+        "rotateZ": 0.0,
+    },
+    "camera": {
+        "focalLength": 35.0,
+        "horizontalFilmAperture": 1.41732,
+        "verticalFilmAperture": 0.94488,
+    },
+    "imagePlane": {
+        "imageName": "",
+        "useFrameExtension": 0,
+        "frameExtension": 1,
+        "frameOffset": 0,
+        "fit": 1,
+        "displayOnlyIfCurrent": 0,
+        "sizeX": 1.41732,
+        "sizeY": 0.94488,
+    },
+}
+
+
+def recorded(func):
+    """
+    Counts and times every call made to a backend method.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = default_timer()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            elapsed = default_timer() - start
+            self.counts[name] += 1
+            self.latency[name] += elapsed
+            if self.log_calls:
+                self.calls.append(Call(name, args, kwargs, elapsed))
+
+    return wrapper
+
+
+class MemoryNode(object):
+    """
+    A node in a :class:`MemoryBackend` scene.
+    """
+
+    __slots__ = ("name", "type", "parent", "children", "attrs", "uuid")
+
+    def __init__(self, name, node_type, parent=None):
+        self.name = name
+        self.type = node_type
+        self.parent = parent
+        self.children = []
+        self.attrs = dict(DEFAULT_ATTRS.get(node_type, {}))
+        self.uuid = str(uuid.uuid4()).upper()
+
+    def __repr__(self):
+        return "<%s %s (%s)>" % (self.__class__.__name__, self.name, self.type)
+
+    def is_type(self, node_type):
+        if node_type == "animCurve":
+            return self.type.startswith("animCurve")
+        return self.type == node_type
+
+
+class MemoryBackend(Backend):
+    """
+    Pure Python scene that stands in for Maya.
+
+    Every backend call is counted in :attr:`counts` with its accumulated
+    wall time in :attr:`latency`. With ``log_calls`` each call is also
+    appended to :attr:`calls` as a :class:`Call`.
+
+    Transforms are not parented for world space queries: a node's world
+    translation and rotation are its own channels. Animated channels are
+    evaluated with linear interpolation at :attr:`current_time`.
+    """
+
+    name = "memory"
+
+    def __init__(self, log_calls=True):
+        self.log_calls = log_calls
+        self.calls = []
+        self.counts = defaultdict(int)
+        self.latency = defaultdict(float)
+
+        self.callbacks = OrderedDict()
+        self._next_callback = 1
+
+        self.undo_chunks = []
+        self.closed_undo_chunks = []
+        self.refresh_suspended = False
+        self.evaluation_mode = "parallel"
+
+        self.new_scene(notify=False)
+
+    def reset_calls(self):
+        self.calls = []
+        self.counts = defaultdict(int)
+        self.latency = defaultdict(float)
+
+    def new_scene(self, notify=True):
+        """
+        Empties the scene.
+
+        :param notify(bool): run before_new scene callbacks first
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        if notify:
+            self._emit_scene("before_new")
+
+        self.nodes = OrderedDict()
+        self._uuids = {}
+        self.connections = OrderedDict()
+        self._node_plugs = defaultdict(OrderedDict)
+        self.selection = []
+        self.current_time = 1.0
+        self.workspace = os.getcwd()
+        self.min_time = 1.0
+        self.max_time = 120.0
+
+        for callback_id in [
+            cid
+            for cid, cb in self.callbacks.items()
+            if cb[0] not in SCENE_CALLBACKS
+        ]:
+            del self.callbacks[callback_id]
+        self._node_callbacks = defaultdict(list)
+
+    # Scene building helpers, these are not part of the backend interface.
+
+    def add_camera(
+        self,
+        name,
+        translation=(0.0, 0.0, 0.0),
+        rotation=(0.0, 0.0, 0.0),
+        focal_length=35.0,
+        filmback=(1.41732, 0.94488),
+        image_path=None,
+    ):
+        """
+        Adds a camera, and an image plane when image_path is given.
+
+        :raises: None
+
+        :return: transform and shape
+        :rtype: list
+        """
+        transform, shape = self._create_camera(name)
+        attrs = self.nodes[transform].attrs
+
+        for axis, t, r in zip("XYZ", translation, rotation):
+            attrs["translate" + axis] = float(t)
+            attrs["rotate" + axis] = float(r)
+
+        attrs = self.nodes[shape].attrs
+        attrs["focalLength"] = float(focal_length)
+        attrs["horizontalFilmAperture"] = float(filmback[0])
+        attrs["verticalFilmAperture"] = float(filmback[1])
+
+        if image_path is not None:
+            img_plane = self._create_image_plane(shape, name + "_IMGPLNE")
+            self.nodes[img_plane[1]].attrs["imageName"] = image_path
+
+        return [transform, shape]
+
+    def add_group(self, name, children=()):
+        """
+        Adds an empty transform and parents nodes under it.
+
+        :raises: None
+
+        :return: group name
+        :rtype: str
+        """
+        group = self._create("transform", name)
+
+        for child in children:
+            node = self.nodes[child]
+            if node.parent:
+                node.parent.children.remove(node)
+            node.parent = self.nodes[group]
+            self.nodes[group].children.append(node)
+
+        return group
+
+    def select(self, nodes):
+        self.selection = [node for node in nodes if node in self.nodes]
+
+    def set_time(self, time):
+        self.current_time = float(time)
+
+        for kind, node, callback in list(self.callbacks.values()):
+            if kind == "time":
+                callback(self.current_time)
+
+    # Internal scene helpers
+
+    def _unique(self, name):
+        if name not in self.nodes:
+            return name
+
+        base = re.sub(r"\d+$", "", name)
+        index = 1
+        while "%s%d" % (base, index) in self.nodes:
+            index += 1
+
+        return "%s%d" % (base, index)
+
+    def _create(self, node_type, name, parent=None):
+        name = self._unique(name)
+        node = MemoryNode(name, node_type, parent)
+        self.nodes[name] = node
+        self._uuids[node.uuid] = node
+
+        if parent is not None:
+            parent.children.append(node)
+
+        return name
+
+    def _create_camera(self, name):
+        transform = self._create("transform", name)
+        shape = self._create(
+            "camera", transform + "Shape", self.nodes[transform]
+        )
+        return [transform, shape]
+
+    def _create_image_plane(self, camera, name):
+        transform = self._create("transform", name, self.nodes[camera])
+        shape = self._create(
+            "imagePlane", transform + "Shape", self.nodes[transform]
+        )
+
+        index = 0
+        while "%s.imagePlane[%d]" % (camera, index) in self.connections:
+            index += 1
+
+        self._connect(shape + ".message", "%s.imagePlane[%d]" % (camera, index))
+        return [transform, shape]
+
+    def _connect(self, source, destination):
+        self._disconnect(destination)
+        self.connections[destination] = source
+        self._node_plugs[destination.split(".")[0]][destination] = None
+        self._node_plugs[source.split(".")[0]][destination] = None
+
+        self._emit_attribute(source)
+        self._emit_attribute(destination)
+
+    def _disconnect(self, destination):
+        source = self.connections.pop(destination, None)
+
+        if source is not None:
+            for name in (destination.split(".")[0], source.split(".")[0]):
+                plugs = self._node_plugs.get(name)
+                if plugs is not None:
+                    plugs.pop(destination, None)
+
+            self._emit_attribute(source)
+            self._emit_attribute(destination)
+
+    def _node(self, node):
+        try:
+            return self.nodes[node.split(".")[0]]
+        except KeyError:
+            raise RuntimeError("No object matches name: %s" % node)
+
+    def _curve(self, plug):
+        source = self.connections.get(plug)
+        if source:
+            node = self.nodes.get(source.split(".")[0])
+            if node is not None and node.is_type("animCurve"):
+                return node
+
+    def _evaluate(self, curve, time):
+        times, values = curve.attrs["keys"]
+
+        if not times:
+            return 0.0
+
+        index = bisect.bisect_left(times, time)
+
+        if index < len(times) and times[index] == time:
+            return values[index]
+        if index == 0:
+            return values[0]
+        if index == len(times):
+            return values[-1]
+
+        t0, t1 = times[index - 1], times[index]
+        v0, v1 = values[index - 1], values[index]
+
+        return v0 + (v1 - v0) * (time - t0) / float(t1 - t0)
+
+    def _get(self, plug, time=None):
+        node_name, attribute = plug.split(".", 1)
+        node = self._node(node_name)
+
+        if attribute in COMPOUNDS:
+            return [
+                tuple(
+                    self._get("%s.%s" % (node_name, child), time)
+                    for child in COMPOUNDS[attribute]
+                )
+            ]
+
+        curve = self._curve(plug)
+        if curve is not None:
+            if time is None:
+                time = self.current_time
+            return self._evaluate(curve, time)
+
+        try:
+            return node.attrs[attribute]
+        except KeyError:
+            raise RuntimeError("No attribute matches name: %s" % plug)
+
+    def _remove(self, node):
+        for child in list(node.children):
+            self._remove(child)
+
+        self._emit_node("delete", node)
+
+        if node.parent is not None:
+            node.parent.children.remove(node)
+
+        del self.nodes[node.name]
+        del self._uuids[node.uuid]
+
+        for kind, node_type, callback in list(self.callbacks.values()):
+            if kind == "removed" and (
+                node_type == "dependNode" or node.is_type(node_type)
+            ):
+                callback(node.uuid, node.name)
+
+        for destination in list(self._node_plugs.pop(node.name, ())):
+            self._disconnect(destination)
+
+        for callback_id in self._node_callbacks.pop(node, ()):
+            self.callbacks.pop(callback_id, None)
+
+        if node.name in self.selection:
+            self.selection.remove(node.name)
+
+    def _emit_scene(self, event):
+        for kind, node, callback in list(self.callbacks.values()):
+            if kind == "scene" and node == event:
+                callback()
+
+    def _emit_node(self, kind, node, *args):
+        for callback_id in list(self._node_callbacks.get(node, ())):
+            entry = self.callbacks.get(callback_id)
+            if entry is not None and entry[0] == kind:
+                entry[2](*args)
+
+    def _emit_attribute(self, plug):
+        node_name, attribute = plug.split(".", 1)
+        node = self.nodes.get(node_name)
+
+        for kind, _, callback in list(self.callbacks.values()):
+            if kind == "plug":
+                callback(node_name, attribute)
+
+        if node is not None and node in self._node_callbacks:
+            self._emit_node("attribute", node, attribute)
+
+    def _add_callback(self, kind, node, callback):
+        callback_id = self._next_callback
+        self._next_callback += 1
+        self.callbacks[callback_id] = (kind, node, callback)
+
+        if kind not in SCENE_CALLBACKS:
+            self._node_callbacks[node].append(callback_id)
+
+        return callback_id
+
+    # Scenes
+
+    @recorded
+    def open_scene(self, path):
+        """
+        Loads a JSON scene written by :meth:`save_scene`, or a camera
+        listing of the form ``{"cameras": [{"name": ..., ...}]}``.
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        self._emit_scene("before_open")
+        self.new_scene(notify=False)
+
+        for camera in data.get("cameras", []):
+            camera = dict(camera)
+            self.add_camera(camera.pop("name"), **camera)
+
+        for entry in data.get("nodes", []):
+            parent = self.nodes.get(entry.get("parent"))
+            name = self._create(entry["type"], entry["name"], parent)
+            attrs = entry.get("attrs", {})
+            if "keys" in attrs:
+                attrs["keys"] = (list(attrs["keys"][0]), list(attrs["keys"][1]))
+            self.nodes[name].attrs.update(attrs)
+
+        for destination, source in data.get("connections", {}).items():
+            self._connect(source, destination)
+
+        if "playback_range" in data:
+            self.min_time, self.max_time = data["playback_range"]
+
+    @recorded
+    def save_scene(self, path):
+        data = {
+            "nodes": [
+                {
+                    "name": node.name,
+                    "type": node.type,
+                    "parent": node.parent.name if node.parent else None,
+                    "attrs": node.attrs,
+                }
+                for node in self.nodes.values()
+            ],
+            "connections": self.connections,
+            "playback_range": [self.min_time, self.max_time],
+        }
+
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    @recorded
+    def refresh(self):
+        pass
+
+    @recorded
+    def open_undo_chunk(self, name):
+        self.undo_chunks.append(name)
+
+    @recorded
+    def close_undo_chunk(self):
+        self.closed_undo_chunks.append(self.undo_chunks.pop())
+
+    @recorded
+    def suspend_refresh(self, suspend):
+        self.refresh_suspended = suspend
+
+    @recorded
+    def suspend_evaluation(self):
+        mode = self.evaluation_mode
+        self.evaluation_mode = "off"
+        return mode
+
+    @recorded
+    def resume_evaluation(self, state):
+        if state is not None:
+            self.evaluation_mode = state
+
+    @recorded
+    def playback_range(self):
+        return self.min_time, self.max_time
+
+    @recorded
+    def get_time(self):
+        return self.current_time
+
+    @recorded
+    def workspace_root(self):
+        return self.workspace
+
+    # Node queries
+
+    @recorded
+    def exists(self, node):
+        if "." not in node:
+            return node in self.nodes
+
+        node_name, attribute = node.split(".", 1)
+        return (
+            node_name in self.nodes and attribute in self.nodes[node_name].attrs
+        )
+
+    @recorded
+    def node_type(self, node):
+        return self._node(node).type
+
+    @recorded
+    def node_uuid(self, node):
+        return self._node(node).uuid
+
+    @recorded
+    def node_from_uuid(self, uuid):
+        node = self._uuids.get(uuid)
+        return node.name if node is not None else None
+
+    @recorded
+    def ls(self, pattern=None, type=None, selection=False):
+        names = self.selection if selection else self.nodes
+
+        if pattern:
+            names = fnmatch.filter(names, pattern)
+
+        if type:
+            names = [name for name in names if self.nodes[name].is_type(type)]
+
+        return list(names)
+
+    @recorded
+    def selected_cameras(self):
+        cameras = []
+        stack = [self.nodes[name] for name in reversed(self.selection)]
+
+        while stack:
+            node = stack.pop()
+
+            if node.type == "camera" and node.parent is not None:
+                cameras.append((node.parent.name, node.name, node.parent.uuid))
+
+            stack.extend(reversed(node.children))
+
+        return cameras
+
+    @recorded
+    def list_relatives(self, node, parent=False, type=None):
+        node = self._node(node)
+
+        if parent:
+            nodes = [node.parent] if node.parent else []
+        else:
+            nodes = node.children
+
+        return [n.name for n in nodes if type is None or n.is_type(type)]
+
+    @recorded
+    def list_connections(self, node, type=None, source=True, destination=True):
+        node_name = node.split(".")[0]
+        plug = node if "." in node else None
+        found = []
+
+        for dst in self._node_plugs.get(node_name, ()):
+            src = self.connections[dst]
+            other = None
+            if source and dst.split(".")[0] == node_name:
+                if plug is None or dst == plug:
+                    other = src
+            if other is None and destination and src.split(".")[0] == node_name:
+                if plug is None or src == plug:
+                    other = dst
+
+            if other is None:
+                continue
+
+            other = self.nodes[other.split(".")[0]]
+            if type is not None and not other.is_type(type):
+                continue
+
+            # Like listConnections, shapes are reported by their transform.
+            if other.type not in ("transform",) and other.parent is not None:
+                other = other.parent
+
+            if other.name not in found:
+                found.append(other.name)
+
+        return found
+
+    # Attributes
+
+    @recorded
+    def get_attr(self, plug):
+        return self._get(plug)
+
+    @recorded
+    def world_translation(self, node):
+        return [self._get("%s.translate%s" % (node, axis)) for axis in "XYZ"]
+
+    @recorded
+    def world_rotation(self, node):
+        return [self._get("%s.rotate%s" % (node, axis)) for axis in "XYZ"]
+
+    @recorded
+    def sample_camera(self, transform, shape, times):
+        samples = ([], [], [], [])
+
+        for time in times:
+            samples[0].append(
+                tuple(
+                    self._get("%s.translate%s" % (transform, axis), time)
+                    for axis in "XYZ"
+                )
+            )
+            samples[1].append(
+                tuple(
+                    self._get("%s.rotate%s" % (transform, axis), time)
+                    for axis in "XYZ"
+                )
+            )
+            samples[2].append(self._get("%s.focalLength" % shape, time))
+            samples[3].append(self._get("%s.filmAperture" % shape, time)[0])
+
+        return samples
+
+    @recorded
+    def set_attr(self, plug, value):
+        node_name, attribute = plug.split(".", 1)
+        node = self._node(node_name)
+        node.attrs[attribute] = value
+
+        self._emit_attribute(plug)
+
+    @recorded
+    def add_attr(self, node, attribute, data_type="string"):
+        self._node(node).attrs.setdefault(
+            attribute, "" if data_type == "string" else 0.0
+        )
+
+    @recorded
+    def connect_attr(self, source, destination):
+        self._node(source)
+        self._node(destination)
+        self._connect(source, destination)
+
+    # Node creation
+
+    @recorded
+    def create_node(self, node_type, name=None):
+        return self._create(node_type, name or node_type + "1")
+
+    @recorded
+    def create_camera(self, name):
+        return self._create_camera(name)
+
+    @recorded
+    def create_image_plane(self, camera, name):
+        return self._create_image_plane(camera, name)
+
+    @recorded
+    def rename(self, node, name):
+        node = self._node(node)
+        old_name = node.name
+        name = self._unique(name)
+
+        del self.nodes[old_name]
+        self.nodes[name] = node
+        node.name = name
+
+        for dst in list(self._node_plugs.pop(old_name, ())):
+            src = self.connections[dst]
+            self._disconnect(dst)
+
+            if dst.split(".")[0] == old_name:
+                dst = name + dst[len(old_name) :]
+            if src.split(".")[0] == old_name:
+                src = name + src[len(old_name) :]
+
+            self._connect(src, dst)
+
+        self.selection = [name if n == old_name else n for n in self.selection]
+
+        self._emit_node("rename", node, old_name, name)
+
+        for kind, _, callback in list(self.callbacks.values()):
+            if kind == "renamed":
+                callback(node.uuid, old_name, name)
+
+        return name
+
+    @recorded
+    def delete(self, nodes):
+        if not isinstance(nodes, (list, tuple)):
+            nodes = [nodes]
+
+        for node in nodes:
+            if node in self.nodes:
+                self._remove(self.nodes[node])
+
+    # Keyframes
+
+    @recorded
+    def set_keyframe(
+        self, node, attribute, time, value, in_tangent, out_tangent
+    ):
+        plug = "%s.%s" % (node, attribute)
+        curve = self._curve(plug)
+
+        if curve is None:
+            name = self._create(
+                CURVE_TYPES.get(attribute, "animCurveTU"),
+                "%s_%s" % (node, attribute),
+            )
+            curve = self.nodes[name]
+            curve.attrs["keys"] = ([], [])
+            self._connect(name + ".output", plug)
+
+        times, values = curve.attrs["keys"]
+        index = bisect.bisect_left(times, time)
+
+        if index < len(times) and times[index] == time:
+            values[index] = value
+        else:
+            times.insert(index, time)
+            values.insert(index, value)
+
+        curve.attrs["inTangentType"] = in_tangent
+        curve.attrs["outTangentType"] = out_tangent
+
+    @recorded
+    def write_curve(
+        self, node, attribute, times, values, in_tangent, out_tangent
+    ):
+        plug = "%s.%s" % (node, attribute)
+        self._node(node)
+
+        existing = self._curve(plug)
+        if existing is not None:
+            self._remove(existing)
+
+        name = self._create(
+            CURVE_TYPES.get(attribute, "animCurveTU"),
+            "%s_%s" % (node, attribute),
+        )
+        curve = self.nodes[name]
+        curve.attrs["keys"] = (list(times), list(values))
+        curve.attrs["inTangentType"] = in_tangent
+        curve.attrs["outTangentType"] = out_tangent
+        self._connect(name + ".output", plug)
+
+        return name
+
+    @recorded
+    def cut_keys(self, node, attributes, start, end):
+        for attribute in attributes:
+            curve = self._curve("%s.%s" % (node, attribute))
+            if curve is None:
+                continue
+
+            times, values = curve.attrs["keys"]
+            first = bisect.bisect_left(times, start)
+            last = bisect.bisect_right(times, end)
+            del times[first:last]
+            del values[first:last]
+
+    @recorded
+    def shift_keys(self, node, attributes, start, end, offset):
+        for attribute in attributes:
+            curve = self._curve("%s.%s" % (node, attribute))
+            if curve is None:
+                continue
+
+            times, values = curve.attrs["keys"]
+            first = bisect.bisect_left(times, start)
+            last = bisect.bisect_right(times, end)
+            if first == last:
+                continue
+
+            moved = [
+                (time + offset, value)
+                for time, value in zip(times[first:last], values[first:last])
+            ]
+            del times[first:last]
+            del values[first:last]
+
+            # Moved keys replace any key already at their new time.
+            first = bisect.bisect_left(times, moved[0][0])
+            last = bisect.bisect_right(times, moved[-1][0])
+            merged = dict(zip(times[first:last], values[first:last]))
+            merged.update(moved)
+            keys = sorted(merged.items())
+            times[first:last] = [time for time, _ in keys]
+            values[first:last] = [value for _, value in keys]
+
+    @recorded
+    def key_range(self, nodes):
+        times = []
+
+        for node in nodes:
+            self._node(node)
+
+            for plug in self._node_plugs.get(node, ()):
+                if plug.split(".")[0] != node:
+                    continue
+
+                curve = self._curve(plug)
+                if curve is not None and curve.attrs["keys"][0]:
+                    keys = curve.attrs["keys"][0]
+                    times.extend((keys[0], keys[-1]))
+
+        if not times:
+            return None
+
+        return min(times), max(times)
+
+    @recorded
+    def get_keys(self, node, attribute):
+        curve = self._curve("%s.%s" % (node, attribute))
+
+        if curve is None:
+            return [], []
+
+        times, values = curve.attrs["keys"]
+        return list(times), list(values)
+
+    # Message callbacks
+
+    @recorded
+    def add_scene_callback(self, event, callback):
+        return self._add_callback("scene", event, callback)
+
+    @recorded
+    def add_name_changed_callback(self, node, callback):
+        return self._add_callback("rename", self._node(node), callback)
+
+    @recorded
+    def add_about_to_delete_callback(self, node, callback):
+        return self._add_callback("delete", self._node(node), callback)
+
+    @recorded
+    def add_node_removed_callback(self, callback, node_type="dependNode"):
+        return self._add_callback("removed", node_type, callback)
+
+    @recorded
+    def add_node_renamed_callback(self, callback):
+        return self._add_callback("renamed", None, callback)
+
+    @recorded
+    def add_plug_changed_callback(self, callback):
+        return self._add_callback("plug", None, callback)
+
+    @recorded
+    def add_attribute_changed_callback(self, node, callback):
+        return self._add_callback("attribute", self._node(node), callback)
+
+    @recorded
+    def add_time_changed_callback(self, callback):
+        return self._add_callback("time", None, callback)
+
+    @recorded
+    def remove_callback(self, callback_id):
+        entry = self.callbacks.pop(callback_id, None)
+
+        if entry is not None and entry[0] not in SCENE_CALLBACKS:
+            callback_ids = self._node_callbacks.get(entry[1])
+            if callback_ids and callback_id in callback_ids:
+                callback_ids.remove(callback_id)
@@ -0,0 +1,1032 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Image sequence assembly.
+
+Reference plates are written out as one numbered sequence, a frame per
+camera, by copying, hardlinking or symlinking each source image through a
+bounded thread pool. Output paths are built from a pattern such as
+``/shots/ref/plate.<frame>.<ext>``, see :func:`expand_path`.
+
+Every frame written is recorded in a :class:`Manifest` next to the
+sequence, with the source's path, size, modification time and, for copies
+made with ``checksum``, content hash. Re-runs skip frames whose source is
+unchanged and still in place, and an interrupted run is resumed from the
+manifest's journal. The output can be checked against the manifest with
+:func:`verify`.
+"""
+
+import os
+import re
+import json
+import errno
+import shutil
+import hashlib
+import logging
+import threading
+from timeit import default_timer
+from multiprocessing.pool import ThreadPool
+
+from CameraSequencer import scan
+
+log = logging.getLogger("CameraSequencer")
+
+MODES = ("copy", "hardlink", "symlink")
+
+FRAME_TOKEN = "<frame>"
+EXT_TOKEN = "<ext>"
+DEFAULT_PADDING = 4
+
+MANIFEST_VERSION = 1
+HASH_NAME = "sha1"
+HASH_CHUNK = 1024 * 1024
+
+# Bytes handed to copy_file_range or sendfile per call. Large requests let
+# the kernel, and NFS servers that support server side copy, move a whole
+# plate in a few calls.
+COPY_CHUNK = 64 * 1024 * 1024
+
+# Errors that mean a copy syscall is not supported for this pair of files,
+# rather than that the copy failed.
+COPY_FALLBACK_ERRORS = set(
+    getattr(errno, name)
+    for name in (
+        "EXDEV",
+        "ENOSYS",
+        "EINVAL",
+        "EBADF",
+        "EPERM",
+        "ENOTSOCK",
+        "ENOTSUP",
+        "EOPNOTSUPP",
+        "ESPIPE",
+    )
+    if hasattr(errno, name)
+)
+
+# Statuses of frames that are in place after a run.
+OK_STATUSES = ("copied", "linked", "skipped", "verified", "generated")
+
+# Frame placeholders other than <frame>: a run of hashes or printf padding.
+HASH_PATTERN = re.compile(r"#+")
+PRINTF_PATTERN = re.compile(r"%0?(\d*)d")
+
+# Last number in a file name, the one an image plane's frame extension
+# replaces.
+FRAME_NUMBER_PATTERN = re.compile(r"(\d+)(\D*)$")
+
+# Errors that mean hardlinks are not possible here rather than a bad frame.
+# os.link is missing on Python 2 for Windows, which raises AttributeError.
+LINK_ERRORS = (
+    None,
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EMLINK,
+    getattr(errno, "ENOTSUP", errno.EPERM),
+)
+
+
+def default_workers():
+    """
+    :return: thread count for file transfers, which are I/O bound
+    :rtype: int
+    """
+    try:
+        cpus = os.cpu_count()
+    except AttributeError:
+        import multiprocessing
+
+        cpus = multiprocessing.cpu_count()
+
+    return min(32, (cpus or 1) + 4)
+
+
+def expand_path(pattern, frame, ext, padding=DEFAULT_PADDING):
+    """
+    Builds the output path of one frame.
+
+    ``<frame>`` is replaced by the frame number padded to ``padding``
+    digits, a run of ``#`` or a ``%04d`` style token by the frame padded to
+    its own width, and ``<ext>`` by the source image's extension. A pattern
+    without a frame placeholder gets ``.<frame>.<ext>`` appended.
+
+    :param pattern(str): output path pattern
+    :param frame(int): frame number
+    :param ext(str): extension, without the dot
+    :param padding(int): digits for ``<frame>``
+
+    :raises: None
+
+    :return: output path
+    :rtype: str
+    """
+    if FRAME_TOKEN in pattern:
+        path = pattern.replace(FRAME_TOKEN, "%0*d" % (padding, frame))
+
+    elif HASH_PATTERN.search(pattern):
+        path = HASH_PATTERN.sub(
+            lambda match: "%0*d" % (len(match.group(0)), frame), pattern
+        )
+
+    elif PRINTF_PATTERN.search(pattern):
+        path = PRINTF_PATTERN.sub(
+            lambda match: "%0*d" % (int(match.group(1) or 0), frame), pattern
+        )
+
+    else:
+        path = "%s.%0*d.%s" % (pattern, padding, frame, EXT_TOKEN)
+
+    return path.replace(EXT_TOKEN, ext)
+
+
+def frame_path(image, frame):
+    """
+    Finds the file a frame extension image plane reads for a frame, the
+    last number of the image's file name being replaced by the frame
+    padded to the same width.
+
+    :param image(str): any frame of the sequence
+    :param frame(int): frame number
+
+    :raises: None
+
+    :return: path of the frame, image itself if its name has no number
+    :rtype: str
+    """
+    directory, name = os.path.split(image)
+    match = FRAME_NUMBER_PATTERN.search(name)
+
+    if match is None:
+        return image
+
+    return os.path.join(
+        directory,
+        "%s%0*d%s"
+        % (
+            name[: match.start()],
+            len(match.group(1)),
+            frame,
+            match.group(2),
+        ),
+    )
+
+
+def split_ext(path):
+    """
+    :return: extension of an image path without the dot
+    :rtype: str
+    """
+    return os.path.splitext(path)[1].lstrip(".")
+
+
+class FrameResult(object):
+    """
+    Outcome of writing one frame.
+
+    ``status`` is ``copied``, ``linked``, ``skipped`` when the manifest
+    shows the frame is already in place, ``missing`` when the camera has no
+    image or the image does not exist, or ``failed``. :func:`verify`
+    reports ``verified``, ``missing`` or ``changed``, and
+    :mod:`CameraSequencer.proxies` reports ``generated``, or
+    ``unsupported`` for an image no available converter reads.
+
+    ``method`` is how the frame was written: ``copy_file_range``,
+    ``sendfile`` or ``userspace`` for copies, ``hardlink`` or
+    ``symlink``. ``transferred`` counts the bytes copied and ``seconds``
+    the time spent writing the frame.
+    """
+
+    __slots__ = (
+        "frame",
+        "source",
+        "destination",
+        "status",
+        "error",
+        "size",
+        "method",
+        "transferred",
+        "seconds",
+    )
+
+    def __init__(
+        self,
+        frame,
+        source,
+        destination,
+        status,
+        error=None,
+        size=0,
+        method=None,
+        transferred=0,
+        seconds=0.0,
+    ):
+        self.frame = frame
+        self.source = source
+        self.destination = destination
+        self.status = status
+        self.error = error
+        self.size = size
+        self.method = method
+        self.transferred = transferred
+        self.seconds = seconds
+
+    def __repr__(self):
+        return "<%s %s %s>" % (self.__class__.__name__, self.frame, self.status)
+
+    @property
+    def ok(self):
+        return self.status in OK_STATUSES
+
+    @property
+    def throughput(self):
+        """
+        :return: bytes copied per second
+        :rtype: float
+        """
+        if not self.seconds:
+            return 0.0
+        return self.transferred / self.seconds
+
+
+class SequenceResult(object):
+    """
+    Per-frame outcomes of one :func:`assemble` run, in frame order.
+    """
+
+    def __init__(self, pattern, mode, frames, removed=None, seconds=0.0):
+        self.pattern = pattern
+        self.mode = mode
+        self.frames = frames
+        self.removed = removed or []
+        self.seconds = seconds
+
+    def __repr__(self):
+        return "<%s %s %d/%d frames>" % (
+            self.__class__.__name__,
+            self.mode,
+            len(self.succeeded),
+            len(self.frames),
+        )
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    @property
+    def ok(self):
+        return all(frame.ok for frame in self.frames)
+
+    @property
+    def succeeded(self):
+        return [frame for frame in self.frames if frame.ok]
+
+    @property
+    def failed(self):
+        return [frame for frame in self.frames if not frame.ok]
+
+    @property
+    def first(self):
+        """
+        :return: path of the first frame written, None if none were
+        :rtype: str
+        """
+        for frame in self.frames:
+            if frame.ok:
+                return frame.destination
+
+    @property
+    def size(self):
+        return sum(frame.size for frame in self.frames)
+
+    @property
+    def transferred(self):
+        return sum(frame.transferred for frame in self.frames)
+
+    @property
+    def throughput(self):
+        """
+        :return: bytes copied per second of wall time across all workers
+        :rtype: float
+        """
+        if not self.seconds:
+            return 0.0
+        return self.transferred / self.seconds
+
+    def methods(self):
+        """
+        :return: number of frames written by each method
+        :rtype: dict
+        """
+        counts = {}
+        for frame in self.frames:
+            if frame.method:
+                counts[frame.method] = counts.get(frame.method, 0) + 1
+        return counts
+
+    def summary(self):
+        """
+        :return: one line describing the run
+        :rtype: str
+        """
+        counts = {}
+        for frame in self.frames:
+            counts[frame.status] = counts.get(frame.status, 0) + 1
+
+        summary = "%s %d frames to %s: %s" % (
+            self.mode,
+            len(self.frames),
+            self.pattern,
+            ", ".join(
+                "%d %s" % (count, status)
+                for status, count in sorted(counts.items())
+            ),
+        )
+
+        if self.transferred:
+            summary += ", %.1f MB in %.2fs (%.1f MB/s)" % (
+                self.transferred / 1e6,
+                self.seconds,
+                self.throughput / 1e6,
+            )
+
+        return summary
+
+
+def _replace(write, destination):
+    """
+    Writes to a temporary name next to the destination and moves it into
+    place, so an interrupted run never leaves a partial frame behind.
+    """
+    temp = destination + ".tmp"
+
+    if os.path.lexists(temp):
+        os.remove(temp)
+
+    try:
+        value = write(temp)
+        _rename(temp, destination)
+        return value
+    except BaseException:
+        if os.path.lexists(temp):
+            os.remove(temp)
+        raise
+
+
+def _rename(source, destination):
+    try:
+        os.replace(source, destination)
+    except AttributeError:
+        # Python 2, where rename does not overwrite on Windows.
+        if os.name == "nt" and os.path.lexists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
+
+
+def _copy_file_range(source, destination, offset, size):
+    while offset < size:
+        count = os.copy_file_range(
+            source, destination, min(COPY_CHUNK, size - offset)
+        )
+        if not count:
+            break
+        offset += count
+
+    return offset
+
+
+def _sendfile(source, destination, offset, size):
+    while offset < size:
+        count = os.sendfile(
+            destination, source, offset, min(COPY_CHUNK, size - offset)
+        )
+        if not count:
+            break
+        offset += count
+
+    return offset
+
+
+# Kernel copies tried in order, each one picking up from the offset the
+# previous one reached.
+KERNEL_COPIES = (
+    ("copy_file_range", _copy_file_range),
+    ("sendfile", _sendfile),
+)
+
+
+def copy_file(source, destination, digest=None):
+    """
+    Copies a file in the kernel where the platform allows it.
+
+    ``os.copy_file_range`` is tried first, then ``os.sendfile``, and the
+    rest is copied through user space if neither is available or supported
+    between the two files. A file being hashed is copied through user
+    space, so it is read only once.
+
+    :param source(str): file to copy
+    :param destination(str): file to write
+    :param digest(hashlib.Hash): hash updated with the copied bytes
+
+    :raises: ``OSError`` or ``IOError`` when the copy fails
+
+    :return: method that finished the copy and the bytes copied
+    :rtype: tuple
+    """
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        if digest is not None:
+            for chunk in iter(lambda: src.read(COPY_CHUNK), b""):
+                digest.update(chunk)
+                dst.write(chunk)
+
+            return "userspace", dst.tell()
+
+        size = os.fstat(src.fileno()).st_size
+        offset = 0
+
+        for method, func in KERNEL_COPIES:
+            try:
+                func(src.fileno(), dst.fileno(), offset, size)
+            except AttributeError:
+                continue
+            except OSError as e:
+                if e.errno not in COPY_FALLBACK_ERRORS:
+                    raise
+                log.debug("%s unsupported for %s: %s" % (method, source, e))
+            finally:
+                # Both calls advance the destination's position by what
+                # they wrote, so it is where the next method carries on,
+                # even after a failure part way through.
+                offset = os.lseek(dst.fileno(), 0, os.SEEK_CUR)
+
+            if offset >= size:
+                return method, offset
+
+        src.seek(offset)
+        dst.seek(offset)
+        shutil.copyfileobj(src, dst, COPY_CHUNK)
+
+        return "userspace", dst.tell()
+
+
+def transfer(source, destination, mode, digest=None):
+    """
+    Writes one frame.
+
+    Hardlinks fall back to a copy when the source is on another device or
+    the filesystem does not support them.
+
+    :param source(str): source image
+    :param destination(str): output frame
+    :param mode(str): one of :data:`MODES`
+    :param digest(hashlib.Hash): hash updated with the bytes copied, left
+        alone when the frame is linked
+
+    :raises: ``OSError`` or ``IOError`` when the frame cannot be written
+
+    :return: ``copied`` or ``linked``, the method used and the bytes copied
+    :rtype: tuple
+    """
+    if mode == "symlink":
+        source = os.path.abspath(source)
+        _replace(lambda temp: os.symlink(source, temp), destination)
+        return "linked", "symlink", 0
+
+    if mode == "hardlink":
+        try:
+            _replace(lambda temp: os.link(source, temp), destination)
+            return "linked", "hardlink", 0
+        except (OSError, AttributeError) as e:
+            if getattr(e, "errno", None) not in LINK_ERRORS:
+                raise
+            log.debug("Cannot hardlink %s, copying: %s" % (source, e))
+
+    method, copied = _replace(
+        lambda temp: copy_file(source, temp, digest), destination
+    )
+    return "copied", method, copied
+
+
+def file_hash(path):
+    """
+    :return: hex digest of a file's content
+    :rtype: str
+    """
+    digest = hashlib.new(HASH_NAME)
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def manifest_path(pattern):
+    """
+    Names the manifest of a sequence after the part of its pattern before
+    the frame number, ``/out/plate.<frame>.<ext>`` being recorded in
+    ``/out/plate.manifest.json``.
+
+    :param pattern(str): output path pattern
+
+    :raises: None
+
+    :return: manifest path
+    :rtype: str
+    """
+    directory, name = os.path.split(pattern)
+
+    for token in (FRAME_TOKEN, HASH_PATTERN, PRINTF_PATTERN):
+        if hasattr(token, "search"):
+            match = token.search(name)
+            index = match.start() if match else -1
+        else:
+            index = name.find(token)
+
+        if index >= 0:
+            name = name[:index]
+            break
+
+    name = name.rstrip("._-") or "sequence"
+
+    return os.path.join(directory, name + ".manifest.json")
+
+
+class Manifest(object):
+    """
+    Record of the frames written to one sequence.
+
+    Frames are journaled to ``<manifest>.journal`` as they complete and
+    folded into the manifest by :meth:`save`. A journal left behind by an
+    interrupted run is replayed by :meth:`load`, so its finished frames are
+    skipped on the next run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.frames = {}
+        self.resumed = False
+        self._journal = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<%s %s %d frames>" % (
+            self.__class__.__name__,
+            self.path,
+            len(self.frames),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a manifest and replays its journal.
+
+        :param path(str): manifest path
+
+        :raises: None
+
+        :return: the manifest, empty if there is none or it is unreadable
+        :rtype: Manifest
+        """
+        manifest = cls(path)
+
+        if os.path.isfile(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    manifest.frames = dict(
+                        (int(frame), entry)
+                        for frame, entry in data["frames"].items()
+                    )
+            except (ValueError, KeyError, AttributeError, IOError) as e:
+                log.warning("Ignoring unreadable manifest %s: %s" % (path, e))
+
+        if os.path.isfile(manifest.journal_path):
+            replayed = 0
+
+            with open(manifest.journal_path) as f:
+                for line in f:
+                    # The last line of a crashed run can be partial.
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+
+                    manifest.frames[int(entry.pop("frame"))] = entry
+                    replayed += 1
+
+            manifest.resumed = True
+            log.info(
+                "Resuming from %s, %d frames were already written."
+                % (manifest.journal_path, replayed)
+            )
+
+        return manifest
+
+    def get(self, frame):
+        return self.frames.get(frame)
+
+    def record(self, frame, entry):
+        """
+        Journals a written frame. Safe to call from worker threads.
+        """
+        with self._lock:
+            self.frames[frame] = entry
+
+            if self._journal is None:
+                self._journal = open(self.journal_path, "a")
+
+            line = dict(entry)
+            line["frame"] = frame
+            self._journal.write(json.dumps(line) + "\n")
+            self._journal.flush()
+
+    def discard(self, frame):
+        with self._lock:
+            return self.frames.pop(frame, None)
+
+    def save(self):
+        """
+        Writes the manifest and removes the journal.
+        """
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+            data = {
+                "version": MANIFEST_VERSION,
+                "hash": HASH_NAME,
+                "frames": dict(
+                    (str(frame), entry)
+                    for frame, entry in sorted(self.frames.items())
+                ),
+            }
+
+            def write(temp):
+                with open(temp, "w") as f:
+                    json.dump(data, f, indent=1, sort_keys=True)
+
+            _replace(write, self.path)
+
+            if os.path.isfile(self.journal_path):
+                os.remove(self.journal_path)
+
+
+def _in_place(entry, source, stat, destination, mode, listed):
+    """
+    Checks a manifest entry against the source and what is on disk,
+    ``listed`` being the destination's kind in its directory's listing.
+    """
+    if (
+        listed is None
+        or entry.get("source") != source
+        or entry.get("destination") != destination
+        or entry.get("mode") != mode
+        or entry.get("size") != stat.st_size
+        or entry.get("mtime") != stat.st_mtime
+    ):
+        return False
+
+    if mode == "symlink":
+        return listed == scan.LINK and os.readlink(
+            destination
+        ) == os.path.abspath(source)
+
+    if listed == scan.LINK:
+        return False
+
+    try:
+        written = os.stat(destination)
+    except OSError:
+        return False
+
+    if entry.get("status") == "linked":
+        return written.st_ino == stat.st_ino and written.st_dev == stat.st_dev
+
+    return written.st_size == stat.st_size
+
+
+def _write_frame(job):
+    """
+    :return: the frame's outcome and its manifest entry, None when nothing
+        was written
+    :rtype: tuple
+    """
+    frame, source, destination, mode, previous, checksum, listed = job
+
+    if not source or listed[0] is None:
+        return FrameResult(frame, source, destination, "missing"), None
+
+    try:
+        stat = os.stat(source)
+
+        if previous and _in_place(
+            previous, source, stat, destination, mode, listed[1]
+        ):
+            return (
+                FrameResult(
+                    frame, source, destination, "skipped", size=stat.st_size
+                ),
+                None,
+            )
+
+        # Copies are hashed as they are written. A link is the source
+        # itself, so reading it back only to hash it is left out.
+        digest = hashlib.new(HASH_NAME) if checksum else None
+
+        start = default_timer()
+        status, method, transferred = transfer(
+            source, destination, mode, digest
+        )
+        seconds = default_timer() - start
+
+        if status != "copied":
+            digest = None
+
+    except (OSError, IOError) as e:
+        return (
+            FrameResult(frame, source, destination, "failed", str(e)),
+            None,
+        )
+
+    entry = {
+        "source": source,
+        "destination": destination,
+        "mode": mode,
+        "status": status,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "hash": digest.hexdigest() if digest is not None else None,
+    }
+
+    return (
+        FrameResult(
+            frame,
+            source,
+            destination,
+            status,
+            size=stat.st_size,
+            method=method,
+            transferred=transferred,
+            seconds=seconds,
+        ),
+        entry,
+    )
+
+
+def _map(func, jobs, workers=None):
+    """
+    Runs func over jobs on a bounded thread pool, keeping their order.
+    """
+    workers = max(1, min(workers or default_workers(), len(jobs) or 1))
+
+    if workers == 1:
+        return [func(job) for job in jobs]
+
+    pool = ThreadPool(workers)
+    try:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        return pool.map(func, jobs, chunksize)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def plan(sources, pattern, start_frame=1001, padding=DEFAULT_PADDING):
+    """
+    Maps source images to output frames.
+
+    :param sources(list): source image per frame, None where there is none
+    :param pattern(str): output path pattern, see :func:`expand_path`
+    :param start_frame(int): frame of the first source
+    :param padding(int): digits for ``<frame>``
+
+    :raises: None
+
+    :return: frame, source and destination of every frame
+    :rtype: list
+    """
+    jobs = []
+
+    for frame, source in enumerate(sources, start_frame):
+        ext = split_ext(source) if source else ""
+        jobs.append((frame, source, expand_path(pattern, frame, ext, padding)))
+
+    return jobs
+
+
+def assemble(
+    sources,
+    pattern,
+    start_frame=1001,
+    mode="copy",
+    padding=DEFAULT_PADDING,
+    workers=None,
+    manifest=True,
+    checksum=False,
+):
+    """
+    Writes source images out as a numbered sequence.
+
+    With ``manifest`` frames whose source is unchanged since the last run
+    and whose output is still in place are skipped, and frames the manifest
+    tracked that are no longer part of the sequence are removed.
+
+    :param sources(list): source image per frame, None where there is none
+    :param pattern(str): output path pattern, see :func:`expand_path`
+    :param start_frame(int): frame of the first source
+    :param mode(str): ``copy``, ``hardlink`` or ``symlink``
+    :param padding(int): digits for ``<frame>``
+    :param workers(int): transfer threads, see :func:`default_workers`
+    :param manifest(bool): sync against the sequence's manifest
+    :param checksum(bool): record a content hash of each copied frame,
+        computed while it is copied, which copies through user space
+        instead of the kernel
+
+    :raises: ``RuntimeError`` for an unknown mode or an output directory
+        that cannot be created
+
+    :return: per-frame outcomes
+    :rtype: SequenceResult
+    """
+    if mode not in MODES:
+        msg = "Unknown image mode %s, use one of %s." % (mode, ", ".join(MODES))
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    planned = plan(sources, pattern, start_frame, padding)
+
+    for directory in set(os.path.dirname(job[2]) for job in planned):
+        if directory and not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                if not os.path.isdir(directory):
+                    msg = "Cannot create %s: %s" % (directory, e)
+                    log.error(msg)
+                    raise RuntimeError(msg)
+
+    record = Manifest.load(manifest_path(pattern)) if manifest else None
+
+    # One listing per directory finds missing sources and outputs already
+    # written, rather than a stat per frame.
+    sources_listed = scan.lookup([source for _, source, _ in planned])
+    destinations_listed = (
+        scan.lookup([destination for _, _, destination in planned])
+        if record
+        else [None] * len(planned)
+    )
+
+    jobs = [
+        (
+            frame,
+            source,
+            destination,
+            mode,
+            record.get(frame) if record else None,
+            checksum,
+            listed,
+        )
+        for (frame, source, destination), listed in zip(
+            planned, zip(sources_listed, destinations_listed)
+        )
+    ]
+
+    def work(job):
+        result, entry = _write_frame(job)
+
+        if record is not None and entry is not None:
+            record.record(result.frame, entry)
+
+        return result
+
+    start = default_timer()
+    frames = _map(work, jobs, workers)
+    seconds = default_timer() - start
+    removed = []
+
+    if record is not None:
+        removed = _remove_stale(record, planned)
+        record.save()
+
+    result = SequenceResult(pattern, mode, frames, removed, seconds)
+
+    for frame in result.failed:
+        if frame.status == "failed":
+            log.warning(
+                "Frame %d from %s failed: %s"
+                % (frame.frame, frame.source, frame.error)
+            )
+
+    log.info(result.summary())
+
+    return result
+
+
+def _remove_stale(record, planned):
+    """
+    Deletes outputs the manifest tracked that this run did not write to.
+
+    :return: removed paths
+    :rtype: list
+    """
+    destinations = set(destination for _, _, destination in planned)
+    frames = set(frame for frame, _, _ in planned)
+    removed = []
+
+    for frame, entry in list(record.frames.items()):
+        destination = entry.get("destination")
+
+        if frame in frames and destination in destinations:
+            continue
+
+        record.discard(frame)
+
+        if destination not in destinations and os.path.lexists(destination):
+            try:
+                os.remove(destination)
+                removed.append(destination)
+            except OSError as e:
+                log.warning("Cannot remove %s: %s" % (destination, e))
+
+    if removed:
+        log.info("Removed %d frames no longer in the sequence." % len(removed))
+
+    return removed
+
+
+def _verify_frame(job):
+    frame, entry, checksum, listed = job
+    source = entry.get("source")
+    destination = entry.get("destination")
+
+    if listed is None:
+        return FrameResult(frame, source, destination, "missing")
+
+    try:
+        size = os.path.getsize(destination)
+
+        if size != entry.get("size"):
+            return FrameResult(
+                frame, source, destination, "changed", "size %d" % size
+            )
+
+        if checksum and entry.get("hash"):
+            digest = file_hash(destination)
+            if digest != entry["hash"]:
+                return FrameResult(
+                    frame, source, destination, "changed", "hash " + digest
+                )
+
+    except (OSError, IOError) as e:
+        return FrameResult(frame, source, destination, "missing", str(e))
+
+    return FrameResult(frame, source, destination, "verified", size=size)
+
+
+def verify(pattern, workers=None, checksum=True):
+    """
+    Checks a sequence's frames against its manifest in parallel.
+
+    :param pattern(str): output path pattern the sequence was written with
+    :param workers(int): threads, see :func:`default_workers`
+    :param checksum(bool): compare content hashes, not only sizes
+
+    :raises: ``RuntimeError`` if the sequence has no manifest
+
+    :return: ``verified``, ``missing`` or ``changed`` for every frame
+    :rtype: SequenceResult
+    """
+    path = manifest_path(pattern)
+
+    if not os.path.isfile(path):
+        msg = "No manifest for %s at %s." % (pattern, path)
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    record = Manifest.load(path)
+    frames = sorted(record.frames.items())
+    listed = scan.lookup(
+        [entry.get("destination") for _, entry in frames], refresh=True
+    )
+    jobs = [
+        (frame, entry, checksum, kind)
+        for (frame, entry), kind in zip(frames, listed)
+    ]
+
+    result = SequenceResult(
+        pattern, "verify", _map(_verify_frame, jobs, workers)
+    )
+
+    for frame in result.failed:
+        log.warning(
+            "Frame %d %s: %s" % (frame.frame, frame.status, frame.destination)
+        )
+
+    log.info(result.summary())
+
+    return result
@@ -0,0 +1,243 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Lightweight instrumentation for the api layer.
+
+Stages are wrapped in named :func:`span` blocks and sizes are recorded with
+:func:`count`, both grouped under the :func:`run` they happen in. While
+instrumentation is disabled every call returns a shared no-op object, so
+the cost is a global lookup and an attribute check.
+
+Enable it with :func:`enable` or by setting ``CAMERASEQUENCER_INSTRUMENT=1``
+before import. Each finished run is summarised through the
+``CameraSequencer`` logger, and every span, count and finished run is
+passed to the callbacks registered with :func:`subscribe`.
+"""
+
+import os
+import logging
+from timeit import default_timer
+from collections import OrderedDict, namedtuple
+
+log = logging.getLogger("CameraSequencer")
+
+Event = namedtuple("Event", ["kind", "name", "value", "run"])
+
+_enabled = os.environ.get("CAMERASEQUENCER_INSTRUMENT", "") not in ("", "0")
+_subscribers = []
+_runs = []
+
+
+class _Null(object):
+    """
+    Stands in for spans and runs while instrumentation is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL = _Null()
+
+
+class Run(object):
+    """
+    Spans and counters collected during one api call.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = OrderedDict()
+        self.counters = OrderedDict()
+        self.seconds = 0.0
+        self._start = None
+
+    def __repr__(self):
+        return "<%s %s %.4fs>" % (
+            self.__class__.__name__,
+            self.name,
+            self.seconds,
+        )
+
+    def __enter__(self):
+        _runs.append(self)
+        self._start = default_timer()
+        return self
+
+    def __exit__(self, *args):
+        self.seconds = default_timer() - self._start
+        _runs.remove(self)
+
+        log.info(self.summary())
+        _emit("run", self.name, self.seconds, self)
+
+        return False
+
+    def summary(self):
+        """
+        :return: one line describing the run
+        :rtype: str
+        """
+        parts = ["%s %.4fs" % (self.name, self.seconds)]
+
+        if self.spans:
+            parts.append(
+                ", ".join(
+                    "%s %.4fs" % (name, seconds)
+                    for name, seconds in self.spans.items()
+                )
+            )
+
+        if self.counters:
+            parts.append(
+                ", ".join(
+                    "%s=%s" % (name, value)
+                    for name, value in self.counters.items()
+                )
+            )
+
+        return " | ".join(parts)
+
+
+class Span(object):
+    """
+    Times a named stage of the current run.
+    """
+
+    __slots__ = ("name", "run", "_start")
+
+    def __init__(self, name):
+        self.name = name
+        self.run = _runs[-1] if _runs else None
+        self._start = None
+
+    def __enter__(self):
+        self._start = default_timer()
+        return self
+
+    def __exit__(self, *args):
+        seconds = default_timer() - self._start
+
+        if self.run is not None:
+            spans = self.run.spans
+            spans[self.name] = spans.get(self.name, 0.0) + seconds
+
+        _emit("span", self.name, seconds, self.run)
+
+        return False
+
+
+def _emit(kind, name, value, run):
+    if not _subscribers:
+        return
+
+    event = Event(kind, name, value, run)
+
+    for callback in list(_subscribers):
+        try:
+            callback(event)
+        except Exception as e:
+            log.warning("Instrumentation subscriber failed: %s" % e)
+
+
+def enable(value=True):
+    """
+    Turns instrumentation on or off.
+
+    :param value(bool): enable when True
+
+    :raises: None
+
+    :return: None
+    :rtype: NoneType
+    """
+    global _enabled
+    _enabled = bool(value)
+
+
+def disable():
+    enable(False)
+
+
+def enabled():
+    return _enabled
+
+
+def subscribe(callback):
+    """
+    Registers a callback for every span, count and finished run.
+
+    :param callback(callable): called with an :class:`Event`
+
+    :raises: None
+
+    :return: the callback, so it can be used as a decorator
+    :rtype: callable
+    """
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+    return callback
+
+
+def unsubscribe(callback):
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def run(name):
+    """
+    Groups the spans and counters of one api call.
+
+    :param name(str): run name, usually the api function
+
+    :raises: None
+
+    :return: context manager yielding the :class:`Run`, or a no-op
+    """
+    if not _enabled:
+        return _NULL
+    return Run(name)
+
+
+def span(name):
+    """
+    Times a stage.
+
+    :param name(str): stage name
+
+    :raises: None
+
+    :return: context manager
+    """
+    if not _enabled:
+        return _NULL
+    return Span(name)
+
+
+def count(name, value=1):
+    """
+    Adds to a counter on the current run.
+
+    :param name(str): counter name
+    :param value(int): amount to add
+
+    :raises: None
+
+    :return: None
+    :rtype: NoneType
+    """
+    if not _enabled:
+        return
+
+    current = _runs[-1] if _runs else None
+
+    if current is not None:
+        current.counters[name] = current.counters.get(name, 0) + value
+
+    _emit("count", name, value, current)
@@ -0,0 +1,248 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import OrderedDict
+
+from CameraSequencer.backends import get_backend
+
+log = logging.getLogger("CameraSequencer")
+
+
+class CurveBuffer(object):
+    """
+    Times and values gathered for a single node attribute.
+    """
+
+    __slots__ = ("node", "attribute", "times", "values")
+
+    def __init__(self, node, attribute):
+        self.node = node
+        self.attribute = attribute
+        self.times = []
+        self.values = []
+
+    def __repr__(self):
+        return "<%s %s.%s (%d keys)>" % (
+            self.__class__.__name__,
+            self.node,
+            self.attribute,
+            len(self.times),
+        )
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, time, value):
+        self.times.append(time)
+        self.values.append(value)
+
+    def sorted_keys(self):
+        """
+        Returns the buffered keys ordered by time.
+
+        Later values win when the same time was keyed twice, which is
+        what repeated ``cmds.setKeyframe`` calls would have produced.
+
+        :raises: None
+
+        :return: times and values
+        :rtype: tuple
+        """
+        times = self.times
+
+        if all(times[i] < times[i + 1] for i in range(len(times) - 1)):
+            return list(times), list(self.values)
+
+        keys = dict(zip(times, self.values))
+        ordered = sorted(keys)
+
+        return ordered, [keys[t] for t in ordered]
+
+
+def set_keyframe(
+    node, attribute, time, value, in_tangent="spline", out_tangent="spline"
+):
+    """
+    Sets a single key.
+
+    :param node(str): node to key
+    :param attribute(str): attribute name
+    :param time(float): frame to key
+    :param value(float): value to key
+    :param in_tangent(str): in tangent type
+    :param out_tangent(str): out tangent type
+
+    :raises: None
+
+    :return: None
+    :rtype: NoneType
+    """
+    get_backend().set_keyframe(
+        node, attribute, time, value, in_tangent, out_tangent
+    )
+
+
+def write_curve(
+    node, attribute, times, values, in_tangent="spline", out_tangent="spline"
+):
+    """
+    Builds an animCurve for an attribute in one shot.
+
+    The backend creates the curve directly and writes all keys at once,
+    replacing any animCurve already driving the attribute.
+
+    :param node(str): node to key
+    :param attribute(str): attribute name
+    :param times(float list): frames to key, ascending
+    :param values(float list): value for each frame
+    :param in_tangent(str): in tangent type
+    :param out_tangent(str): out tangent type
+
+    :raises: ``RuntimeError`` if times and values differ in length
+
+    :return: name of the new animCurve
+    :rtype: str
+    """
+    count = len(times)
+
+    if count != len(values):
+        log.error(
+            "%s.%s got %d times for %d values."
+            % (node, attribute, count, len(values))
+        )
+        raise RuntimeError(
+            "%s.%s got %d times for %d values."
+            % (node, attribute, count, len(values))
+        )
+
+    return get_backend().write_curve(
+        node, attribute, times, values, in_tangent, out_tangent
+    )
+
+
+class KeyWriter(object):
+    """
+    Collects keys per node attribute and writes each attribute's
+    animCurve in a single pass on :meth:`flush`.
+
+    With ``bulk=False`` every key goes straight through the backend's
+    ``set_keyframe`` as it is added, which is the original behaviour.
+    """
+
+    def __init__(self, bulk=True, in_tangent="spline", out_tangent="spline"):
+        self.bulk = bulk
+        self.in_tangent = in_tangent
+        self.out_tangent = out_tangent
+        self.curves = OrderedDict()
+
+    def __repr__(self):
+        return "<%s instance (%d curves)>" % (
+            self.__class__.__name__,
+            len(self.curves),
+        )
+
+    def add(self, node, attribute, time, value):
+        """
+        Adds a key.
+
+        :param node(str): node to key
+        :param attribute(str): attribute name
+        :param time(float): frame to key
+        :param value(float): value to key
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        if not self.bulk:
+            set_keyframe(
+                node, attribute, time, value, self.in_tangent, self.out_tangent
+            )
+            return
+
+        key = (node, attribute)
+        curve = self.curves.get(key)
+
+        if curve is None:
+            curve = self.curves[key] = CurveBuffer(node, attribute)
+
+        curve.append(time, value)
+
+    def extend(self, node, attribute, times, values):
+        """
+        Adds a column of keys for one attribute.
+
+        :param node(str): node to key
+        :param attribute(str): attribute name
+        :param times(float list): frames to key
+        :param values(float list): value for each frame
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        if not self.bulk:
+            for time, value in zip(times, values):
+                self.add(node, attribute, time, value)
+            return
+
+        key = (node, attribute)
+        curve = self.curves.get(key)
+
+        if curve is None:
+            curve = self.curves[key] = CurveBuffer(node, attribute)
+
+        curve.times.extend(times)
+        curve.values.extend(values)
+
+    def flush(self):
+        """
+        Writes every buffered curve.
+
+        A curve that fails to write in bulk is keyed again one key at a
+        time so a single bad attribute does not lose the sequence.
+
+        :raises: None
+
+        :return: names of the animCurves written in bulk
+        :rtype: list
+        """
+        written = []
+
+        for curve in self.curves.values():
+            times, values = curve.sorted_keys()
+
+            try:
+                written.append(
+                    write_curve(
+                        curve.node,
+                        curve.attribute,
+                        times,
+                        values,
+                        self.in_tangent,
+                        self.out_tangent,
+                    )
+                )
+
+            except RuntimeError as e:
+                log.warning(
+                    "Bulk keying %s.%s failed (%s), falling back to "
+                    "setKeyframe." % (curve.node, curve.attribute, e)
+                )
+
+                for time, value in zip(times, values):
+                    set_keyframe(
+                        curve.node,
+                        curve.attribute,
+                        time,
+                        value,
+                        self.in_tangent,
+                        self.out_tangent,
+                    )
+
+        self.curves = OrderedDict()
+
+        return written
@@ -0,0 +1,270 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Readahead for scrubbing an image plane.
+
+A :class:`Prefetcher` follows the current time and warms the OS page cache
+with the images of the frames around it, the frames ahead in the direction
+of travel first and then those behind. Files are warmed with
+``posix_fadvise(WILLNEED)``, which has the kernel read them in the
+background, or by reading them through on platforms without it.
+
+Every time change replaces the frames still queued, so moving on or
+turning around never waits on readahead for frames that are no longer
+near. Each window stops once its files would exceed the memory budget,
+and files warmed recently are not read again while they fit within it.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict, deque
+
+from CameraSequencer.backends import get_backend
+
+log = logging.getLogger("CameraSequencer")
+
+DEFAULT_RADIUS = 24
+DEFAULT_BUDGET = 2 * 1024 * 1024 * 1024
+DEFAULT_WORKERS = 4
+
+READ_CHUNK = 1024 * 1024
+
+
+def warm(path):
+    """
+    Asks the OS to read a file into its page cache.
+
+    :param path(str): file to warm
+
+    :raises: ``OSError`` or ``IOError`` when the file cannot be read
+
+    :return: how the file was warmed, ``fadvise`` or ``read``
+    :rtype: str
+    """
+    advise = getattr(os, "posix_fadvise", None)
+
+    if advise is not None:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            advise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+        return "fadvise"
+
+    with open(path, "rb") as f:
+        while f.read(READ_CHUNK):
+            pass
+
+    return "read"
+
+
+class Prefetcher(object):
+    """
+    Warms the files of the frames around the current time.
+
+    :param frame_path(callable): returns the file of a frame
+    :param first(int): first frame with a file
+    :param last(int): last frame with a file
+    :param radius(int): frames warmed on each side of the current one
+    :param budget(int): bytes warmed per window, and remembered as warm
+    :param workers(int): warming threads
+    """
+
+    def __init__(
+        self,
+        frame_path,
+        first,
+        last,
+        radius=DEFAULT_RADIUS,
+        budget=DEFAULT_BUDGET,
+        workers=DEFAULT_WORKERS,
+    ):
+        self.frame_path = frame_path
+        self.first = first
+        self.last = last
+        self.radius = radius
+        self.budget = budget
+        self.workers = workers
+
+        self.frame = None
+        self.direction = 1
+        self.warmed = 0
+
+        self._pending = deque()
+        self._window_bytes = 0
+        self._warm = OrderedDict()
+        self._warm_bytes = 0
+        self._condition = threading.Condition()
+        self._threads = []
+        self._callback_id = None
+        self._stopped = True
+
+    def __repr__(self):
+        return "<%s frame %s, %d pending>" % (
+            self.__class__.__name__,
+            self.frame,
+            len(self._pending),
+        )
+
+    @property
+    def running(self):
+        return not self._stopped
+
+    def start(self, follow=True):
+        """
+        Starts the warming threads.
+
+        :param follow(bool): follow the scene's current time
+
+        :raises: None
+
+        :return: the prefetcher
+        :rtype: Prefetcher
+        """
+        if not self._stopped:
+            return self
+
+        self._stopped = False
+
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name="CameraSequencer prefetch %d" % index
+            )
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+        if follow:
+            backend = get_backend()
+            self._callback_id = backend.add_time_changed_callback(self.update)
+            self.update(backend.get_time())
+
+        return self
+
+    def stop(self):
+        """
+        Stops following the time and drops the queued frames.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        if self._callback_id is not None:
+            get_backend().remove_callback(self._callback_id)
+            self._callback_id = None
+
+        with self._condition:
+            self._stopped = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def window(self, frame, direction=1):
+        """
+        :param frame(int): current frame
+        :param direction(int): 1 when moving forward, -1 backward
+
+        :return: frames to warm, nearest ahead first then nearest behind
+        :rtype: list
+        """
+        frames = []
+
+        for sign in (direction, -direction):
+            for step in range(1, self.radius + 1):
+                other = frame + sign * step
+                if self.first <= other <= self.last:
+                    frames.append(other)
+
+        if self.first <= frame <= self.last:
+            frames.insert(0, frame)
+
+        return frames
+
+    def update(self, frame):
+        """
+        Moves the window to a frame, replacing everything still queued.
+        Cheap enough to call from a time changed callback.
+
+        :param frame(float): current frame
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        frame = int(round(frame))
+
+        if frame == self.frame:
+            return
+
+        if self.frame is not None:
+            direction = 1 if frame > self.frame else -1
+            if direction != self.direction:
+                log.debug("Prefetch reversed at frame %d" % frame)
+            self.direction = direction
+
+        self.frame = frame
+        paths = [self.frame_path(f) for f in self.window(frame, self.direction)]
+
+        with self._condition:
+            self._pending = deque(paths)
+            self._window_bytes = 0
+            self._condition.notify_all()
+
+    def _next(self):
+        with self._condition:
+            while not self._pending and not self._stopped:
+                self._condition.wait()
+
+            if self._stopped:
+                return None
+
+            return self._pending.popleft(), self._pending
+
+    def _work(self):
+        while True:
+            job = self._next()
+            if job is None:
+                return
+
+            path, window = job
+
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+
+            with self._condition:
+                if path in self._warm:
+                    # Still warm, keep it the most recent.
+                    self._warm[path] = self._warm.pop(path)
+                    continue
+
+                if window is not self._pending:
+                    continue
+
+                if self._window_bytes + size > self.budget:
+                    # Frames further out do not fit either.
+                    self._pending.clear()
+                    continue
+
+                self._window_bytes += size
+
+            try:
+                warm(path)
+            except (IOError, OSError) as e:
+                log.debug("Could not prefetch %s: %s" % (path, e))
+                continue
+
+            with self._condition:
+                self.warmed += 1
+                self._warm[path] = size
+                self._warm_bytes += size
+
+                while self._warm_bytes > self.budget:
+                    self._warm_bytes -= self._warm.popitem(last=False)[1]
@@ -0,0 +1,248 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Checks run on the queued cameras before a sequence is built.
+
+Every camera is checked in one batch before any node is created: that it
+still exists, that its attributes can be read, that it has an image plane
+and that the image plane's file is on disk. The scene is read on the
+calling thread, as Maya's is not safe to read from others, and the plate
+directories are then listed in parallel, one listing per directory.
+
+The cameras' state is captured while they are checked, so a sequence
+built from :attr:`PreflightReport.snapshots` does not read the scene
+again.
+"""
+
+import os
+import logging
+from timeit import default_timer
+
+from CameraSequencer import images, resolver, scan, snapshot
+from CameraSequencer.backends import get_backend
+
+log = logging.getLogger("CameraSequencer")
+
+# Statuses of a camera that can not be sequenced.
+STATUSES = (
+    "deleted",
+    "not_camera",
+    "unreadable",
+    "no_image_plane",
+    "no_image",
+    "missing_plate",
+)
+
+# Errors the scene raises for nodes and attributes that can not be read.
+SCENE_ERRORS = (RuntimeError, ValueError, TypeError, IndexError)
+
+
+class CameraCheck(object):
+    """
+    Outcome of checking one queued camera.
+
+    ``status`` is ``ok``, ``deleted`` when the node is gone, ``not_camera``,
+    ``unreadable`` when its attributes can not be read, ``no_image_plane``,
+    ``no_image`` when the image plane has no file set or ``missing_plate``
+    when the file is not on disk. ``error`` says why.
+    """
+
+    __slots__ = ("camera", "status", "error", "image_path", "snapshot")
+
+    def __init__(
+        self, camera, status="ok", error=None, image_path=None, snapshot=None
+    ):
+        self.camera = camera
+        self.status = status
+        self.error = error
+        self.image_path = image_path
+        self.snapshot = snapshot
+
+    def __repr__(self):
+        return "<%s %s %s>" % (
+            self.__class__.__name__,
+            self.camera,
+            self.status,
+        )
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+
+class PreflightReport(object):
+    """
+    Checks of every queued camera, in queue order.
+    """
+
+    def __init__(self, checks, seconds=0.0):
+        self.checks = checks
+        self.seconds = seconds
+
+    def __repr__(self):
+        return "<%s %d/%d cameras ok>" % (
+            self.__class__.__name__,
+            len(self.checks) - len(self.failed),
+            len(self.checks),
+        )
+
+    def __len__(self):
+        return len(self.checks)
+
+    def __iter__(self):
+        return iter(self.checks)
+
+    @property
+    def ok(self):
+        return all(check.ok for check in self.checks)
+
+    @property
+    def failed(self):
+        return [check for check in self.checks if not check.ok]
+
+    @property
+    def snapshots(self):
+        """
+        :return: state of every camera that passed, in order
+        :rtype: list
+        """
+        return [check.snapshot for check in self.checks if check.ok]
+
+    def by_status(self):
+        """
+        :return: cameras of each status but ``ok``
+        :rtype: dict
+        """
+        statuses = {}
+        for check in self.failed:
+            statuses.setdefault(check.status, []).append(check.camera)
+        return statuses
+
+    def summary(self, limit=5):
+        """
+        :param limit(int): cameras named per status
+
+        :return: one line describing the checks
+        :rtype: str
+        """
+        if self.ok:
+            return "%d cameras ready in %.2fs." % (
+                len(self.checks),
+                self.seconds,
+            )
+
+        parts = []
+        for status, cameras in sorted(self.by_status().items()):
+            names = ", ".join(cameras[:limit])
+            if len(cameras) > limit:
+                names += " and %d more" % (len(cameras) - limit)
+            parts.append("%d %s (%s)" % (len(cameras), status, names))
+
+        return "%d of %d cameras can not be sequenced: %s." % (
+            len(self.failed),
+            len(self.checks),
+            "; ".join(parts),
+        )
+
+
+def _nodes(camera):
+    """
+    :return: transform and shape of a models.Camera, a snapshot or a node
+        name, the shape being None for names
+    :rtype: tuple
+    """
+    if isinstance(camera, snapshot.CameraSnapshot):
+        return camera.name, camera.shape
+
+    if hasattr(camera, "transform"):
+        return camera.transform, camera.shape
+
+    return camera, None
+
+
+def _failure(backend, transform, shape):
+    """
+    :return: why a camera could not be read
+    :rtype: str
+    """
+    if not backend.exists(transform) or (shape and not backend.exists(shape)):
+        return "deleted"
+
+    if shape is None:
+        return "not_camera"
+
+    return "unreadable"
+
+
+def _check_camera(backend, camera, check_images):
+    transform, shape = _nodes(camera)
+
+    try:
+        if shape is None:
+            transform, shape = snapshot.resolve_camera(transform)
+
+        state = snapshot.capture(transform, shape)
+
+    except SCENE_ERRORS as e:
+        # Only cameras that can not be read are looked at more closely, so
+        # the ones that can cost no more than a snapshot.
+        return CameraCheck(
+            transform, _failure(backend, transform, shape), str(e)
+        )
+
+    if check_images:
+        if not resolver.image_planes(shape):
+            return CameraCheck(
+                transform, "no_image_plane", "%s has no image plane" % shape
+            )
+
+        if not state.image_path:
+            return CameraCheck(
+                transform, "no_image", "%s's image plane has no file" % shape
+            )
+
+    return CameraCheck(transform, image_path=state.image_path, snapshot=state)
+
+
+def run(cameras, check_images=True, workers=None):
+    """
+    Checks every camera before sequencing, without changing the scene.
+
+    :param cameras(list): models.Camera or snapshot.CameraSnapshot objects,
+        or camera node names
+    :param check_images(bool): require an image plane with a file on disk
+    :param workers(int): threads listing plate directories
+
+    :raises: None
+
+    :return: one check per camera, in order
+    :rtype: PreflightReport
+    """
+    start = default_timer()
+    backend = get_backend()
+
+    checks = [_check_camera(backend, cam, check_images) for cam in cameras]
+
+    if check_images:
+        pending = [check for check in checks if check.ok]
+        directories = list(
+            set(os.path.dirname(check.image_path) for check in pending)
+        )
+        listings = dict(
+            zip(directories, images._map(scan.index, directories, workers))
+        )
+
+        for check in pending:
+            directory, name = os.path.split(check.image_path)
+            kind = listings[directory].get(name)
+
+            if kind is None:
+                check.status = "missing_plate"
+                check.error = "%s does not exist" % check.image_path
+
+            # Only links are followed, the listing has the rest.
+            elif kind == scan.LINK and not os.path.exists(check.image_path):
+                check.status = "missing_plate"
+                check.error = "%s is a broken link" % check.image_path
+
+    return PreflightReport(checks, default_timer() - start)
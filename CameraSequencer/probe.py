@@ -0,0 +1,461 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Header-only image probing.
+
+Reads the resolution, channel count and pixel aspect of PNG, JPEG, TIFF,
+DPX and EXR plates from their headers, never decoding pixels, so a plate
+costs a few small reads. Results are cached per path and reused while the
+file's size and modification time are unchanged, which makes probing the
+same plates again a ``stat`` per file.
+
+:func:`probe_many` fans files out over a thread pool, and
+:func:`check_filmback` compares a plate with the filmback of the camera
+it belongs to.
+"""
+
+import os
+import struct
+import logging
+import threading
+
+from CameraSequencer import images
+
+log = logging.getLogger("CameraSequencer")
+
+# Relative difference between a plate's aspect ratio and its camera's
+# filmback allowed by check_filmback.
+ASPECT_TOLERANCE = 0.01
+
+# Bytes read up front, enough for every header but JPEGs with large
+# metadata segments, which are followed by seeking.
+HEADER_SIZE = 4096
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+EXR_MAGIC = b"\x76\x2f\x31\x01"
+
+# Channels of each PNG color type.
+PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+
+# Channels of the DPX image element descriptors.
+DPX_CHANNELS = {
+    1: 1,
+    2: 1,
+    3: 1,
+    4: 1,
+    6: 1,
+    50: 3,
+    51: 4,
+    52: 4,
+    100: 2,
+    101: 3,
+    102: 4,
+    103: 4,
+}
+DPX_UNDEFINED = 0xFFFFFFFF
+
+# JPEG start of frame markers, the ones that carry the image size.
+JPEG_SOF = set(range(0xC0, 0xD0)) - set((0xC4, 0xC8, 0xCC))
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class ImageInfo(object):
+    """
+    What a plate's header says about it.
+
+    ``error`` is set, and the other fields are None, when the file is
+    missing, of an unknown format or its header cannot be read.
+    """
+
+    __slots__ = (
+        "path",
+        "format",
+        "width",
+        "height",
+        "channels",
+        "pixel_aspect",
+        "error",
+    )
+
+    def __init__(
+        self,
+        path,
+        format=None,
+        width=None,
+        height=None,
+        channels=None,
+        pixel_aspect=1.0,
+        error=None,
+    ):
+        self.path = path
+        self.format = format
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.pixel_aspect = pixel_aspect
+        self.error = error
+
+    def __repr__(self):
+        if self.error:
+            return "<%s %s %s>" % (
+                self.__class__.__name__,
+                self.path,
+                self.error,
+            )
+
+        return "<%s %s %s %dx%d>" % (
+            self.__class__.__name__,
+            self.path,
+            self.format,
+            self.width,
+            self.height,
+        )
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def resolution(self):
+        return self.width, self.height
+
+    @property
+    def aspect(self):
+        """
+        :return: display aspect ratio, width over height with the pixel
+            aspect applied
+        :rtype: float
+        """
+        if not self.ok or not self.height:
+            return None
+        return self.width * self.pixel_aspect / float(self.height)
+
+
+class PlateCheck(object):
+    """
+    Outcome of checking one camera's plate against its filmback.
+
+    ``status`` is ``ok``, ``missing`` when the camera has no plate or the
+    file does not exist, ``unreadable``, ``filmback`` when the plate's
+    aspect does not match the filmback or ``resolution`` when it differs
+    from the other plates of the sequence.
+    """
+
+    __slots__ = ("camera", "path", "info", "filmback", "status")
+
+    def __init__(self, camera, path, info, filmback, status):
+        self.camera = camera
+        self.path = path
+        self.info = info
+        self.filmback = filmback
+        self.status = status
+
+    def __repr__(self):
+        return "<%s %s %s>" % (
+            self.__class__.__name__,
+            self.camera,
+            self.status,
+        )
+
+    @property
+    def ok(self):
+        return self.status == "ok"
+
+    @property
+    def filmback_aspect(self):
+        horizontal, vertical = self.filmback
+        if not vertical:
+            return None
+        return horizontal / float(vertical)
+
+
+def _png(header, f):
+    if header[12:16] != b"IHDR":
+        raise ValueError("PNG without an IHDR chunk")
+
+    width, height, depth, color = struct.unpack(">IIBB", header[16:26])
+    return width, height, PNG_CHANNELS.get(color), 1.0
+
+
+def _jpeg(header, f):
+    channels = None
+    pixel_aspect = 1.0
+    offset = 2
+
+    while True:
+        f.seek(offset)
+        marker = f.read(4)
+
+        if len(marker) < 4 or marker[0:1] != b"\xff":
+            raise ValueError("JPEG without a frame header")
+
+        code = ord(marker[1:2])
+        length = struct.unpack(">H", marker[2:4])[0]
+
+        if code == 0xFF:
+            # Fill byte before a marker.
+            offset += 1
+            continue
+
+        if code == 0xE0:
+            segment = f.read(length - 2)
+            if segment[:5] == b"JFIF\x00" and len(segment) >= 12:
+                units, x_density, y_density = struct.unpack(
+                    ">BHH", segment[7:12]
+                )
+                # Without units the densities only give the pixel aspect.
+                if units == 0 and x_density and y_density:
+                    pixel_aspect = y_density / float(x_density)
+
+        elif code in JPEG_SOF:
+            segment = f.read(6)
+            height, width, channels = struct.unpack(">HHB", segment[1:6])
+            return width, height, channels, pixel_aspect
+
+        elif code in (0xD9, 0xDA):
+            raise ValueError("JPEG without a frame header")
+
+        offset += 2 + length
+
+
+def _tiff(header, f):
+    endian = "<" if header[:2] == b"II" else ">"
+    offset = struct.unpack(endian + "I", header[4:8])[0]
+
+    f.seek(offset)
+    count = struct.unpack(endian + "H", f.read(2))[0]
+    entries = f.read(count * 12)
+
+    # Type sizes, for values stored inline in the entry.
+    formats = {3: "H", 4: "I"}
+    tags = {}
+
+    for index in range(count):
+        tag, kind, number, value = struct.unpack(
+            endian + "HHI4s", entries[index * 12 : index * 12 + 12]
+        )
+
+        if kind in formats and number == 1:
+            tags[tag] = struct.unpack(
+                endian + formats[kind],
+                value[: struct.calcsize(formats[kind])],
+            )[0]
+
+        elif kind == 5:
+            # Rationals are stored at an offset.
+            tags[tag] = struct.unpack(endian + "I", value)[0], "rational"
+
+    def rational(tag):
+        entry = tags.get(tag)
+        if not isinstance(entry, tuple):
+            return None
+        f.seek(entry[0])
+        numerator, denominator = struct.unpack(endian + "II", f.read(8))
+        return numerator / float(denominator) if denominator else None
+
+    if 256 not in tags or 257 not in tags:
+        raise ValueError("TIFF without a size")
+
+    pixel_aspect = 1.0
+    x_resolution, y_resolution = rational(282), rational(283)
+    if x_resolution and y_resolution:
+        pixel_aspect = y_resolution / x_resolution
+
+    return tags[256], tags[257], tags.get(277, 1), pixel_aspect
+
+
+def _dpx(header, f):
+    endian = ">" if header[:4] == b"SDPX" else "<"
+
+    width, height = struct.unpack(endian + "II", header[772:780])
+    descriptor = ord(header[800:801])
+
+    pixel_aspect = 1.0
+    horizontal, vertical = struct.unpack(endian + "II", header[1628:1636])
+    if horizontal not in (0, DPX_UNDEFINED) and vertical not in (
+        0,
+        DPX_UNDEFINED,
+    ):
+        pixel_aspect = horizontal / float(vertical)
+
+    return width, height, DPX_CHANNELS.get(descriptor), pixel_aspect
+
+
+def _exr(header, f):
+    f.seek(8)
+    window = None
+    channels = None
+    pixel_aspect = 1.0
+
+    while True:
+        name = _read_string(f)
+        if not name:
+            break
+
+        kind = _read_string(f)
+        size = struct.unpack("<i", f.read(4))[0]
+        value = f.read(size)
+
+        if name == "dataWindow" and kind == "box2i":
+            window = struct.unpack("<iiii", value)
+
+        elif name == "channels" and kind == "chlist":
+            # Null terminated names, each followed by 16 bytes of layout.
+            channels = 0
+            index = 0
+            while index < len(value) and value[index : index + 1] != b"\x00":
+                index = value.index(b"\x00", index) + 17
+                channels += 1
+
+        elif name == "pixelAspectRatio" and kind == "float":
+            pixel_aspect = struct.unpack("<f", value)[0]
+
+    if window is None:
+        raise ValueError("EXR without a data window")
+
+    x_min, y_min, x_max, y_max = window
+    return x_max - x_min + 1, y_max - y_min + 1, channels, pixel_aspect
+
+
+def _read_string(f, limit=256):
+    chars = []
+
+    for _ in range(limit):
+        char = f.read(1)
+        if not char or char == b"\x00":
+            break
+        chars.append(char)
+
+    return b"".join(chars).decode("ascii", "replace")
+
+
+def _format(header):
+    if header.startswith(PNG_MAGIC):
+        return "png", _png
+    if header.startswith(b"\xff\xd8"):
+        return "jpeg", _jpeg
+    if header[:4] in (b"II*\x00", b"MM\x00*"):
+        return "tiff", _tiff
+    if header[:4] in (b"SDPX", b"XPDS"):
+        return "dpx", _dpx
+    if header.startswith(EXR_MAGIC):
+        return "exr", _exr
+    return None, None
+
+
+def read_header(path):
+    """
+    Reads a plate's header, bypassing the cache.
+
+    :param path(str): image file
+
+    :raises: None
+
+    :return: the header's contents, with ``error`` set if it is unreadable
+    :rtype: ImageInfo
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            name, parse = _format(header)
+
+            if parse is None:
+                return ImageInfo(path, error="unknown format")
+
+            width, height, channels, pixel_aspect = parse(header, f)
+
+    except (IOError, OSError) as e:
+        return ImageInfo(path, error=str(e))
+
+    except (ValueError, struct.error, IndexError) as e:
+        return ImageInfo(path, name, error="bad header: %s" % e)
+
+    if not width or not height:
+        return ImageInfo(
+            path, name, error="bad header: %dx%d image" % (width, height)
+        )
+
+    return ImageInfo(path, name, width, height, channels, pixel_aspect)
+
+
+def probe(path):
+    """
+    Reads a plate's header, or returns the cached result while the file is
+    unchanged.
+
+    :param path(str): image file
+
+    :raises: None
+
+    :return: the header's contents, with ``error`` set if it is unreadable
+    :rtype: ImageInfo
+    """
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        return ImageInfo(path, error=str(e))
+
+    key = stat.st_size, stat.st_mtime
+
+    with _cache_lock:
+        cached = _cache.get(path)
+
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    info = read_header(path)
+
+    with _cache_lock:
+        _cache[path] = key, info
+
+    return info
+
+
+def probe_many(paths, workers=None):
+    """
+    Probes plates on a thread pool.
+
+    :param paths(list): image files, each distinct path is read once
+    :param workers(int): threads
+
+    :raises: None
+
+    :return: one result per path, in order
+    :rtype: list
+    """
+    unique = list(dict.fromkeys(path for path in paths if path))
+    infos = dict(zip(unique, images._map(probe, unique, workers)))
+
+    return [
+        infos[path] if path else ImageInfo(path, error="no image")
+        for path in paths
+    ]
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def check_filmback(info, filmback, tolerance=ASPECT_TOLERANCE):
+    """
+    :param info(ImageInfo): probed plate
+    :param filmback(tuple): horizontal and vertical film aperture
+    :param tolerance(float): allowed relative aspect difference
+
+    :raises: None
+
+    :return: True when the plate's display aspect matches the filmback's
+    :rtype: bool
+    """
+    horizontal, vertical = filmback
+
+    aspect = info.aspect
+
+    if aspect is None or not vertical:
+        return False
+
+    expected = horizontal / float(vertical)
+    return abs(aspect - expected) <= tolerance * expected
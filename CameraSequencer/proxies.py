@@ -0,0 +1,542 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Reduced resolution proxies for image plane playback.
+
+Proxies of a sequence are written as JPEGs next to it, in ``proxy_half``
+and ``proxy_quarter`` directories, keeping the frame numbers of the
+original names so a frame extension image plane can switch between them,
+see :func:`CameraSequencer.api.set_image_resolution`.
+
+PNG, JPEG and TIFF frames are decoded and resized with Pillow in a process
+pool when it is installed. Pillow cannot read EXR or DPX, so those, and
+every frame without Pillow, go to ``oiiotool``, or Maya's ``imconvert``,
+run once per frame from a thread pool, each conversion being its own
+process. Frames no available converter reads are reported
+``unsupported``. Proxies newer than their source are skipped.
+:func:`generate_async` runs the whole job on a background thread so the
+caller, usually Maya's main thread, never waits on it.
+"""
+
+import os
+import sys
+import logging
+import threading
+import subprocess
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer
+
+from CameraSequencer import images, probe
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+log = logging.getLogger("CameraSequencer")
+
+RESOLUTIONS = ("full", "half", "quarter")
+
+# Divisor of each proxy resolution.
+SCALES = {"half": 2, "quarter": 4}
+
+PROXY_EXT = "jpg"
+JPEG_QUALITY = 90
+
+# Formats, as named by :mod:`CameraSequencer.probe`, that Pillow decodes.
+PIL_FORMATS = ("png", "jpeg", "tiff")
+
+# Command line converters, in order of preference, and how they are run.
+COMMANDS = (
+    ("oiiotool", "{source} --resize {percent}% -o {destination}"),
+    ("imconvert", "-resize {percent}% {source} {destination}"),
+)
+
+
+def proxy_path(path, resolution):
+    """
+    :param path(str): full resolution image
+    :param resolution(str): one of :data:`RESOLUTIONS`
+
+    :raises: ``RuntimeError`` for an unknown resolution
+
+    :return: path of the image at that resolution
+    :rtype: str
+    """
+    if resolution == "full":
+        return path
+
+    if resolution not in SCALES:
+        msg = "Unknown resolution %s, use one of %s." % (
+            resolution,
+            ", ".join(RESOLUTIONS),
+        )
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    directory, name = os.path.split(path)
+
+    return os.path.join(
+        directory,
+        "proxy_%s" % resolution,
+        "%s.%s" % (os.path.splitext(name)[0], PROXY_EXT),
+    )
+
+
+def find_command():
+    """
+    Looks for a command line converter on the ``PATH`` and in Maya's
+    ``bin`` directory.
+
+    :raises: None
+
+    :return: the executable and its argument template, None if there is
+        neither oiiotool nor imconvert
+    :rtype: tuple
+    """
+    search = os.environ.get("PATH", "").split(os.pathsep)
+    if os.environ.get("MAYA_LOCATION"):
+        search.append(os.path.join(os.environ["MAYA_LOCATION"], "bin"))
+
+    for name, template in COMMANDS:
+        for directory in search:
+            for executable in (name, name + ".exe"):
+                path = os.path.join(directory, executable)
+                if os.path.isfile(path) and os.access(path, os.X_OK):
+                    return path, template
+
+    return None
+
+
+def find_converter(image_format=None, command=False):
+    """
+    Picks how proxies of one image format are made.
+
+    :param image_format(str): format of the source as named by
+        :func:`CameraSequencer.probe.probe`, None when unknown
+    :param command(tuple|bool): command line converter already found by
+        :func:`find_command`, None if there is none, False to look for one
+
+    :raises: ``RuntimeError`` if no available converter reads the format
+
+    :return: ``pil`` with None, or ``command`` with the executable and its
+        argument template
+    :rtype: tuple
+    """
+    if Image is not None and image_format in PIL_FORMATS:
+        return "pil", None
+
+    if command is False:
+        command = find_command()
+
+    if command is not None:
+        return "command", command
+
+    # Unknown formats are still worth a try, Pillow tells what it can't read.
+    if Image is not None and image_format is None:
+        return "pil", None
+
+    if Image is None:
+        msg = "Proxies need Pillow, oiiotool or imconvert."
+    else:
+        msg = "Unsupported format: %s proxies need oiiotool or imconvert." % (
+            image_format
+        )
+    log.error(msg)
+    raise RuntimeError(msg)
+
+
+def is_current(source, destination):
+    """
+    :return: True when the proxy exists and is newer than its source
+    :rtype: bool
+    """
+    try:
+        proxy = os.stat(destination)
+    except OSError:
+        return False
+
+    return proxy.st_size > 0 and proxy.st_mtime >= os.stat(source).st_mtime
+
+
+def _temp_path(destination):
+    # Converters pick the format from the extension, so keep it last.
+    stem, ext = os.path.splitext(destination)
+    return "%s.tmp%s" % (stem, ext)
+
+
+def _convert_pil(job):
+    """
+    Resizes one frame with Pillow. Runs in a worker process.
+    """
+    source, destination, factor = job
+    temp = _temp_path(destination)
+
+    image = Image.open(source)
+    width, height = image.size
+    size = (max(1, width // factor), max(1, height // factor))
+
+    # JPEG can decode straight to a reduced size, skipping most of the work.
+    image.draft("RGB", size)
+    image = image.convert("RGB")
+    if image.size != size:
+        image = image.resize(size, Image.BILINEAR)
+
+    image.save(temp, "JPEG", quality=JPEG_QUALITY)
+    images._rename(temp, destination)
+
+
+def _convert_command(job, command):
+    source, destination, factor = job
+    temp = _temp_path(destination)
+    executable, template = command
+
+    args = [executable] + [
+        arg.format(source=source, destination=temp, percent=100.0 / factor)
+        for arg in template.split()
+    ]
+
+    subprocess.check_call(args)
+    images._rename(temp, destination)
+
+
+def _convert(job, convert):
+    """
+    Converts one frame, reporting failures instead of raising them.
+    """
+    start = default_timer()
+
+    try:
+        convert(job)
+    except Exception as e:
+        temp = _temp_path(job[1])
+        if os.path.exists(temp):
+            os.remove(temp)
+        return job[1], str(e), default_timer() - start
+
+    return job[1], None, default_timer() - start
+
+
+def _pil_worker(job):
+    return _convert(job, _convert_pil)
+
+
+def _process_pool(processes):
+    """
+    Starts worker processes with the Python interpreter rather than the
+    host application, which inside Maya means ``mayapy``.
+    """
+    try:
+        context = multiprocessing.get_context("spawn")
+    except AttributeError:
+        context = multiprocessing
+
+    executable = os.path.basename(sys.executable).lower()
+
+    if executable.startswith("maya") and not executable.startswith("mayapy"):
+        mayapy = os.path.join(
+            os.path.dirname(sys.executable),
+            "mayapy.exe" if os.name == "nt" else "mayapy",
+        )
+        if os.path.isfile(mayapy):
+            context.set_executable(mayapy)
+
+    return context.Pool(processes)
+
+
+def plan(sources, resolutions=("half", "quarter")):
+    """
+    Lists the proxies to make for a sequence.
+
+    :param sources(list|images.SequenceResult): full resolution images, or
+        the result of writing them
+    :param resolutions(list): proxy resolutions
+
+    :raises: ``RuntimeError`` for an unknown resolution
+
+    :return: frame, source, proxy and divisor of every proxy
+    :rtype: list
+    """
+    if isinstance(sources, images.SequenceResult):
+        frames = [(f.frame, f.destination) for f in sources if f.ok]
+    else:
+        frames = list(enumerate(sources))
+
+    jobs = []
+
+    for resolution in resolutions:
+        if resolution == "full":
+            continue
+
+        for frame, source in frames:
+            if source:
+                jobs.append(
+                    (
+                        frame,
+                        source,
+                        proxy_path(source, resolution),
+                        SCALES[resolution],
+                    )
+                )
+
+    return jobs
+
+
+def _run_pool(pool, worker, jobs, processes, cancel, results, kind):
+    """
+    Hands jobs to a pool until they are done or cancelled.
+
+    :return: True if cancelled
+    :rtype: bool
+    """
+    try:
+        chunksize = max(1, len(jobs) // (processes * 8))
+        for destination, error, seconds in pool.imap_unordered(
+            worker, jobs, chunksize
+        ):
+            results[destination] = error, seconds, kind
+
+            if cancel is not None and cancel.is_set():
+                pool.terminate()
+                return True
+
+        pool.close()
+        return False
+    finally:
+        pool.join()
+
+
+def generate(
+    sources, resolutions=("half", "quarter"), processes=None, cancel=None
+):
+    """
+    Makes proxies of a sequence, using every core.
+
+    :param sources(list|images.SequenceResult): full resolution images, or
+        the result of writing them
+    :param resolutions(list): proxy resolutions
+    :param processes(int): worker count, all cores by default
+    :param cancel(threading.Event): stops handing out frames once set
+
+    :raises: ``RuntimeError`` for an unknown resolution or when there is
+        neither Pillow nor a command line converter
+
+    :return: ``generated``, ``skipped``, ``missing``, ``unsupported`` or
+        ``failed`` for every proxy
+    :rtype: images.SequenceResult
+    """
+    jobs = plan(sources, resolutions)
+    command = find_command()
+
+    if Image is None and command is None:
+        msg = "Proxies need Pillow, oiiotool or imconvert."
+        log.error(msg)
+        raise RuntimeError(msg)
+
+    processes = processes or multiprocessing.cpu_count()
+
+    results = {}
+    pending = {"pil": [], "command": []}
+    converters = {}
+
+    for frame, source, destination, factor in jobs:
+        if not os.path.isfile(source):
+            results[destination] = images.FrameResult(
+                frame, source, destination, "missing"
+            )
+            continue
+
+        if is_current(source, destination):
+            results[destination] = images.FrameResult(
+                frame, source, destination, "skipped"
+            )
+            continue
+
+        image_format = probe.probe(source).format
+
+        if image_format not in converters:
+            try:
+                converters[image_format] = find_converter(image_format, command)
+            except RuntimeError as e:
+                converters[image_format] = str(e)
+
+        converter = converters[image_format]
+
+        if isinstance(converter, tuple):
+            pending[converter[0]].append((source, destination, factor))
+        else:
+            results[destination] = images.FrameResult(
+                frame, source, destination, "unsupported", converter
+            )
+
+    for directory in set(
+        os.path.dirname(job[1]) for kind in pending for job in pending[kind]
+    ):
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+
+    start = default_timer()
+    cancelled = False
+
+    if pending["pil"]:
+        cancelled = _run_pool(
+            _process_pool(processes),
+            _pil_worker,
+            pending["pil"],
+            processes,
+            cancel,
+            results,
+            "pil",
+        )
+
+    if pending["command"] and not cancelled:
+        _run_pool(
+            ThreadPool(processes),
+            lambda job: _convert(
+                job, lambda job: _convert_command(job, command)
+            ),
+            pending["command"],
+            processes,
+            cancel,
+            results,
+            "command",
+        )
+
+    frames = []
+
+    for frame, source, destination, factor in jobs:
+        outcome = results.get(destination)
+
+        if isinstance(outcome, images.FrameResult):
+            frames.append(outcome)
+        elif outcome is None:
+            frames.append(
+                images.FrameResult(
+                    frame, source, destination, "failed", "cancelled"
+                )
+            )
+        else:
+            error, seconds, kind = outcome
+            frames.append(
+                images.FrameResult(
+                    frame,
+                    source,
+                    destination,
+                    "failed" if error else "generated",
+                    error,
+                    method=kind,
+                    seconds=seconds,
+                )
+            )
+
+    result = images.SequenceResult(
+        ", ".join(resolutions), "proxy", frames, seconds=default_timer() - start
+    )
+    log.info(result.summary())
+
+    return result
+
+
+def _main_thread(callback, *args):
+    """
+    Runs a callback on Maya's main thread, or directly outside Maya.
+    """
+    try:
+        from maya import utils
+
+        utils.executeDeferred(callback, *args)
+
+    except ImportError:
+        callback(*args)
+
+
+class ProxyJob(object):
+    """
+    Proxy generation running on a background thread.
+
+    The callback, if any, is called with the :class:`images.SequenceResult`
+    once the job finishes, on Maya's main thread when running in Maya.
+    """
+
+    def __init__(
+        self,
+        sources,
+        resolutions=("half", "quarter"),
+        processes=None,
+        callback=None,
+    ):
+        self.sources = sources
+        self.resolutions = resolutions
+        self.processes = processes
+        self.callback = callback
+        self.result = None
+        self.error = None
+
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="CameraSequencer proxies"
+        )
+        self._thread.daemon = True
+
+    def __repr__(self):
+        return "<%s %s %s>" % (
+            self.__class__.__name__,
+            ", ".join(self.resolutions),
+            "done" if self.done() else "running",
+        )
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.result = generate(
+                self.sources, self.resolutions, self.processes, self._cancel
+            )
+        except Exception as e:
+            self.error = e
+            log.warning("Proxy generation failed: %s" % e)
+            return
+
+        if self.callback is not None:
+            _main_thread(self.callback, self.result)
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the job finishes.
+
+        :param timeout(float): seconds to wait, forever by default
+
+        :raises: None
+
+        :return: the result, None if the job is still running or failed
+        :rtype: images.SequenceResult
+        """
+        self._thread.join(timeout)
+        return self.result
+
+    def cancel(self):
+        self._cancel.set()
+
+
+def generate_async(
+    sources, resolutions=("half", "quarter"), processes=None, callback=None
+):
+    """
+    Starts :func:`generate` on a background thread.
+
+    :raises: None
+
+    :return: the running job
+    :rtype: ProxyJob
+    """
+    return ProxyJob(sources, resolutions, processes, callback).start()
@@ -0,0 +1,379 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Image plane path resolution.
+
+Reads every image plane on a camera once and turns its ``imageName`` into
+concrete per-frame file paths. Environment variables are expanded,
+relative paths resolve from the workspace root, and a frame is found
+through a ``<f>``, ``<frame>``, ``#`` or ``%04d`` token or, with
+``useFrameExtension``, by replacing the last number of the file name.
+
+What is read is cached per camera shape. One scene wide listener drops
+the entry when an image plane is connected to or disconnected from the
+camera, or edited, and when the camera or an image plane is deleted or
+renamed. Everything is dropped when a scene is opened or a new one made.
+"""
+
+import os
+import re
+import logging
+import threading
+
+from CameraSequencer import images
+from CameraSequencer.backends import get_backend
+
+log = logging.getLogger("CameraSequencer")
+
+# Frame placeholders in an imageName.
+TOKEN_PATTERN = re.compile(r"<f>|<frame>|#+|%0?\d*d", re.IGNORECASE)
+
+# Image plane attributes that change the paths it resolves to.
+IMAGE_PLANE_ATTRIBUTES = ("imageName", "useFrameExtension", "frameOffset")
+
+
+class ImagePlane(object):
+    """
+    An image plane's image, resolved to an absolute path.
+
+    Frames are the image plane's own frame numbers. The one shown at the
+    current time is read by :meth:`current`.
+    """
+
+    __slots__ = (
+        "node",
+        "image_name",
+        "path",
+        "use_frame_extension",
+        "frame_offset",
+    )
+
+    def __init__(
+        self, node, image_name, path, use_frame_extension=False, frame_offset=0
+    ):
+        self.node = node
+        self.image_name = image_name
+        self.path = path
+        self.use_frame_extension = use_frame_extension
+        self.frame_offset = frame_offset
+
+    def __repr__(self):
+        return "<%s %s %s>" % (self.__class__.__name__, self.node, self.path)
+
+    @property
+    def is_sequence(self):
+        return bool(self.use_frame_extension or self.has_token)
+
+    @property
+    def has_token(self):
+        return bool(self.path and TOKEN_PATTERN.search(self.path))
+
+    def frame(self, frame):
+        """
+        :param frame(int): image frame number
+
+        :raises: None
+
+        :return: file shown for the frame, None without an image
+        :rtype: str
+        """
+        if not self.path:
+            return None
+
+        frame = int(round(frame))
+
+        if self.has_token:
+            return TOKEN_PATTERN.sub(
+                lambda match: _pad(match.group(0), frame), self.path
+            )
+
+        if self.use_frame_extension:
+            return images.frame_path(self.path, frame)
+
+        return self.path
+
+    def frames(self, first, last):
+        """
+        :return: files shown from frame first to last, inclusive
+        :rtype: list
+        """
+        return [self.frame(frame) for frame in range(first, last + 1)]
+
+    def current(self):
+        """
+        :raises: None
+
+        :return: file shown at the current time, None without an image
+        :rtype: str
+        """
+        if not self.is_sequence:
+            return self.path
+
+        extension = get_backend().get_attr("%s.frameExtension" % self.node)
+        return self.frame(extension + self.frame_offset)
+
+
+def _pad(token, frame):
+    if token.startswith("#"):
+        return "%0*d" % (len(token), frame)
+
+    if token.startswith("%"):
+        return "%0*d" % (int(token[1:-1].lstrip("0") or 0), frame)
+
+    return "%0*d" % (images.DEFAULT_PADDING, frame)
+
+
+def resolve_path(path, root=None):
+    """
+    :param path(str): path as stored in the scene
+    :param root(str): directory relative paths resolve from, the
+        workspace root by default
+
+    :raises: None
+
+    :return: absolute, normalized path, None for an empty one
+    :rtype: str
+    """
+    if not path:
+        return None
+
+    path = os.path.expanduser(os.path.expandvars(path))
+
+    if not os.path.isabs(path):
+        if root is None:
+            root = get_backend().workspace_root()
+        path = os.path.join(root, path)
+
+    return os.path.normpath(path)
+
+
+class Resolver(object):
+    """
+    Cache of the image planes on each camera shape.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        # Camera shapes each watched node's changes drop.
+        self._owners = {}
+        self._lock = threading.RLock()
+        self._backend = None
+        self._scene_callbacks = []
+
+    def __repr__(self):
+        return "<%s %d cameras>" % (self.__class__.__name__, len(self._cache))
+
+    def _check_backend(self, backend):
+        if backend is self._backend:
+            return
+
+        # Callbacks stay with the backend being replaced, only what was read
+        # through it is dropped.
+        self._cache.clear()
+        self._owners.clear()
+        self._backend = backend
+        self._scene_callbacks = [
+            backend.add_scene_callback(event, self.clear)
+            for event in ("before_open", "before_new")
+        ]
+
+        # Entries are kept by name, so they go with the node, or with the
+        # name, rather than outliving it for a new node called the same.
+        self._scene_callbacks.append(
+            backend.add_node_removed_callback(self._removed, node_type="camera")
+        )
+        self._scene_callbacks.append(
+            backend.add_node_renamed_callback(self._renamed)
+        )
+
+        # One listener for the scene, however many cameras are cached.
+        self._scene_callbacks.append(
+            backend.add_plug_changed_callback(self._changed)
+        )
+
+    def image_planes(self, shape):
+        """
+        :param shape(str): camera shape
+
+        :raises: None
+
+        :return: every image plane on the camera, in connection order
+        :rtype: list
+        """
+        backend = get_backend()
+
+        with self._lock:
+            self._check_backend(backend)
+            entry = self._cache.get(shape)
+
+            if entry is not None:
+                return entry[0]
+
+            planes = []
+            watched = [shape]
+
+            for img_plane in backend.list_connections(shape, type="imagePlane"):
+                node = backend.list_relatives(img_plane)[0]
+                image_name = backend.get_attr("%s.imageName" % node)
+                plane = ImagePlane(
+                    node,
+                    image_name,
+                    resolve_path(image_name),
+                    bool(backend.get_attr("%s.useFrameExtension" % node)),
+                )
+
+                if plane.is_sequence:
+                    plane.frame_offset = backend.get_attr(
+                        "%s.frameOffset" % node
+                    )
+
+                planes.append(plane)
+                watched.append(node)
+
+            for node in watched:
+                self._owners.setdefault(node, set()).add(shape)
+
+            self._cache[shape] = planes, watched
+
+            return planes
+
+    def _changed(self, node, attribute):
+        if node not in self._owners:
+            return
+
+        name = attribute.split("[")[0]
+        if name in IMAGE_PLANE_ATTRIBUTES or name == "imagePlane":
+            self._drop_node(node)
+
+    def _removed(self, uuid, name):
+        self.invalidate(name)
+
+    def _renamed(self, uuid, old_name, new_name):
+        self._drop_node(old_name)
+        self._drop_node(new_name)
+
+    def _drop_node(self, node):
+        with self._lock:
+            for shape in list(self._owners.get(node, ())):
+                self.invalidate(shape)
+
+    def invalidate(self, shape):
+        """
+        Drops what was read for a camera shape.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        with self._lock:
+            entry = self._cache.pop(shape, None)
+
+            if entry is None:
+                return
+
+            for node in entry[1]:
+                shapes = self._owners.get(node)
+                if shapes is not None:
+                    shapes.discard(shape)
+                    if not shapes:
+                        del self._owners[node]
+
+    def clear(self):
+        """
+        Drops everything.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        with self._lock:
+            self._cache.clear()
+            self._owners.clear()
+
+    def reset(self):
+        """
+        Drops everything and lets go of the backend, which is watched
+        again on next use.
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        with self._lock:
+            self.clear()
+
+            for callback_id in self._scene_callbacks:
+                self._remove_callback(callback_id)
+
+            self._scene_callbacks = []
+            self._backend = None
+
+    def _remove_callback(self, callback_id):
+        try:
+            self._backend.remove_callback(callback_id)
+        except RuntimeError:
+            # The scene, and its callbacks, are already gone.
+            pass
+
+
+_resolver = Resolver()
+
+
+def image_planes(shape):
+    """
+    :param shape(str): camera shape
+
+    :raises: None
+
+    :return: resolved image planes of the camera, cached
+    :rtype: list
+    """
+    return _resolver.image_planes(shape)
+
+
+def image_paths(shape):
+    """
+    :param shape(str): camera shape
+
+    :raises: None
+
+    :return: file shown by each image plane at the current time
+    :rtype: list
+    """
+    return [plane.current() for plane in image_planes(shape)]
+
+
+def image_path(shape):
+    """
+    :param shape(str): camera shape
+
+    :raises: None
+
+    :return: file shown by the first image plane at the current time,
+        None if the camera has none
+    :rtype: str
+    """
+    planes = image_planes(shape)
+
+    if planes:
+        return planes[0].current()
+
+    return None
+
+
+def invalidate(shape=None):
+    """
+    Drops cached image planes of one camera shape, or of every camera.
+
+    :raises: None
+
+    :return: None
+    :rtype: NoneType
+    """
+    if shape is None:
+        _resolver.reset()
+    else:
+        _resolver.invalidate(shape)
@@ -0,0 +1,465 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Sequence-aware directory listings.
+
+A directory is listed with one ``os.scandir`` pass and its files grouped
+into frame sequences by the last number in their names, so which frames
+exist, which are missing and which are there twice under a different
+padding is answered from memory instead of with a ``stat`` per frame.
+
+Listings are cached per directory and reused while its modification time
+is unchanged. :func:`lookup` and :func:`present` check many paths at once,
+listing each of their directories a single time.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+
+log = logging.getLogger("CameraSequencer")
+
+# Prefix, frame number and suffix of a file name, the frame being its last
+# number as for an image plane's frame extension.
+FRAME_PATTERN = re.compile(r"^(.*?)(\d+)(\D*)$")
+
+# A listing is only reused when it was taken at least this long after the
+# directory last changed, as files added within the same modification time
+# tick would otherwise go unnoticed.
+RACY_SECONDS = 2.0
+
+# Kinds of directory entries.
+FILE = "file"
+LINK = "link"
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class FileSequence(object):
+    """
+    Files of one directory sharing a prefix and suffix around a frame
+    number, ``plate.1001.exr`` to ``plate.1100.exr`` for instance.
+
+    ``frames`` maps each frame to its file name. ``duplicates`` holds the
+    frames found more than once, each with all of its names.
+    """
+
+    __slots__ = (
+        "directory",
+        "prefix",
+        "suffix",
+        "padding",
+        "frames",
+        "duplicates",
+        "_sorted",
+    )
+
+    def __init__(self, directory, prefix, suffix, padding=1):
+        self.directory = directory
+        self.prefix = prefix
+        self.suffix = suffix
+        self.padding = padding
+        self.frames = {}
+        self.duplicates = {}
+        self._sorted = None
+
+    def __repr__(self):
+        if not self.frames:
+            return "<%s %s empty>" % (self.__class__.__name__, self.pattern)
+
+        return "<%s %s %d-%d, %d frames>" % (
+            self.__class__.__name__,
+            self.pattern,
+            self.first,
+            self.last,
+            len(self.frames),
+        )
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, frame):
+        return frame in self.frames
+
+    def __iter__(self):
+        return iter(self.sorted_frames)
+
+    def _add(self, frame, name):
+        existing = self.frames.get(frame)
+
+        if existing is None:
+            self.frames[frame] = name
+            return
+
+        self.duplicates.setdefault(frame, [existing]).append(name)
+
+        # The name with the sequence's own padding is the one kept.
+        if len(name) < len(existing):
+            self.frames[frame] = name
+
+    @property
+    def pattern(self):
+        """
+        :return: path with a run of ``#`` for the frame number
+        :rtype: str
+        """
+        return os.path.join(
+            self.directory, self.prefix + "#" * self.padding + self.suffix
+        )
+
+    @property
+    def sorted_frames(self):
+        if self._sorted is None:
+            self._sorted = sorted(self.frames)
+        return self._sorted
+
+    @property
+    def first(self):
+        return self.sorted_frames[0] if self.frames else None
+
+    @property
+    def last(self):
+        return self.sorted_frames[-1] if self.frames else None
+
+    @property
+    def frame_range(self):
+        return self.first, self.last
+
+    def path(self, frame):
+        """
+        :param frame(int): frame number
+
+        :raises: None
+
+        :return: path of the frame's file, None if it is not on disk
+        :rtype: str
+        """
+        name = self.frames.get(frame)
+        if name is None:
+            return None
+        return os.path.join(self.directory, name)
+
+    def paths(self, first=None, last=None):
+        """
+        :return: paths of the frames on disk from first to last
+        :rtype: list
+        """
+        return [
+            os.path.join(self.directory, self.frames[frame])
+            for frame in self.between(first, last)
+        ]
+
+    def between(self, first=None, last=None):
+        """
+        :return: frames on disk from first to last, inclusive
+        :rtype: list
+        """
+        frames = self.sorted_frames
+
+        if first is not None:
+            frames = [frame for frame in frames if frame >= first]
+        if last is not None:
+            frames = [frame for frame in frames if frame <= last]
+
+        return frames
+
+    def missing(self, first=None, last=None):
+        """
+        :param first(int): first frame expected, the sequence's first by
+            default
+        :param last(int): last frame expected, the sequence's last by
+            default
+
+        :raises: None
+
+        :return: frames from first to last that are not on disk
+        :rtype: list
+        """
+        first = self.first if first is None else first
+        last = self.last if last is None else last
+
+        if first is None or last is None:
+            return []
+
+        return [
+            frame
+            for frame in range(first, last + 1)
+            if frame not in self.frames
+        ]
+
+    def gaps(self, first=None, last=None):
+        """
+        :return: first and last frame of each run of missing frames
+        :rtype: list
+        """
+        return _runs(self.missing(first, last))
+
+    def ranges(self):
+        """
+        :return: first and last frame of each run of frames on disk
+        :rtype: list
+        """
+        return _runs(self.sorted_frames)
+
+
+def _runs(frames):
+    runs = []
+
+    for frame in frames:
+        if runs and frame == runs[-1][1] + 1:
+            runs[-1][1] = frame
+        else:
+            runs.append([frame, frame])
+
+    return [tuple(run) for run in runs]
+
+
+class DirectoryIndex(object):
+    """
+    One listing of a directory.
+
+    ``entries`` maps the name of every file, and of every symlink, to its
+    kind, ``file`` or ``link``. Subdirectories are left out.
+    """
+
+    def __init__(self, directory, entries=None, mtime=None, listed=None):
+        self.directory = directory
+        self.entries = entries or {}
+        self.mtime = mtime
+        self.listed = listed
+        self._sequences = None
+
+    def __repr__(self):
+        return "<%s %s %d files>" % (
+            self.__class__.__name__,
+            self.directory,
+            len(self.entries),
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    @classmethod
+    def scan(cls, directory):
+        """
+        Lists a directory, bypassing the cache.
+
+        :param directory(str): directory to list
+
+        :raises: None
+
+        :return: the listing, empty if the directory cannot be read
+        :rtype: DirectoryIndex
+        """
+        entries = {}
+        mtime = None
+
+        try:
+            mtime = os.stat(directory).st_mtime
+            listed = time.time()
+
+            for entry in _scandir(directory):
+                if entry.is_symlink():
+                    entries[entry.name] = LINK
+                elif not entry.is_dir(follow_symlinks=False):
+                    entries[entry.name] = FILE
+
+        except OSError as e:
+            log.debug("Cannot list %s: %s" % (directory, e))
+            entries = {}
+            mtime = None
+            listed = time.time()
+
+        return cls(directory, entries, mtime, listed)
+
+    def get(self, name):
+        """
+        :return: ``file`` or ``link``, None if there is no such file
+        :rtype: str
+        """
+        return self.entries.get(name)
+
+    @property
+    def sequences(self):
+        """
+        :return: the directory's frame sequences, by prefix and suffix
+        :rtype: dict
+        """
+        if self._sequences is None:
+            self._sequences = self._group()
+        return self._sequences
+
+    @property
+    def singles(self):
+        """
+        :return: names of the files without a frame number
+        :rtype: list
+        """
+        return sorted(
+            name for name in self.entries if not FRAME_PATTERN.match(name)
+        )
+
+    def _group(self):
+        sequences = {}
+
+        for name in self.entries:
+            match = FRAME_PATTERN.match(name)
+            if match is None:
+                continue
+
+            prefix, digits, suffix = match.groups()
+            sequence = sequences.get((prefix, suffix))
+
+            if sequence is None:
+                sequence = FileSequence(
+                    self.directory, prefix, suffix, len(digits)
+                )
+                sequences[prefix, suffix] = sequence
+
+            # Numbers wider than the padding are frames that overflowed it,
+            # unless zero padded, so the narrowest width is the padding.
+            sequence.padding = min(sequence.padding, len(digits))
+            sequence._add(int(digits), name)
+
+        return sequences
+
+    def sequence(self, name):
+        """
+        :param name(str): name, or path, of any frame of the sequence
+
+        :raises: None
+
+        :return: the sequence the file belongs to, None if there is none
+        :rtype: FileSequence
+        """
+        match = FRAME_PATTERN.match(os.path.basename(name))
+        if match is None:
+            return None
+
+        prefix, digits, suffix = match.groups()
+        return self.sequences.get((prefix, suffix))
+
+
+def _scandir(directory):
+    try:
+        scandir = os.scandir
+    except AttributeError:
+        # Python 2 in older Mayas, without d_type the kinds cost a stat.
+        return [_Entry(directory, name) for name in os.listdir(directory)]
+
+    return scandir(directory)
+
+
+class _Entry(object):
+    def __init__(self, directory, name):
+        self.name = name
+        self.path = os.path.join(directory, name)
+
+    def is_symlink(self):
+        return os.path.islink(self.path)
+
+    def is_dir(self, follow_symlinks=True):
+        return os.path.isdir(self.path)
+
+
+def index(directory, refresh=False):
+    """
+    Lists a directory, or returns the cached listing while the directory is
+    unchanged, which costs one ``stat``.
+
+    :param directory(str): directory to list
+    :param refresh(bool): list it again even if it seems unchanged
+
+    :raises: None
+
+    :return: the listing, empty if the directory cannot be read
+    :rtype: DirectoryIndex
+    """
+    directory = os.path.abspath(directory)
+
+    if not refresh:
+        with _cache_lock:
+            cached = _cache.get(directory)
+
+        if cached is not None:
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                mtime = None
+
+            if (
+                mtime is not None
+                and mtime == cached.mtime
+                and cached.listed - mtime > RACY_SECONDS
+            ):
+                return cached
+
+    listing = DirectoryIndex.scan(directory)
+
+    with _cache_lock:
+        _cache[directory] = listing
+
+    return listing
+
+
+def lookup(paths, refresh=False):
+    """
+    Finds many files, listing each of their directories once.
+
+    :param paths(list): file paths, None entries are ignored
+    :param refresh(bool): list the directories again
+
+    :raises: None
+
+    :return: ``file``, ``link`` or None for every path, in order
+    :rtype: list
+    """
+    listings = {}
+    kinds = []
+
+    for path in paths:
+        if not path:
+            kinds.append(None)
+            continue
+
+        directory, name = os.path.split(path)
+        listing = listings.get(directory)
+
+        if listing is None:
+            listing = index(directory or os.curdir, refresh)
+            listings[directory] = listing
+
+        kinds.append(listing.get(name))
+
+    return kinds
+
+
+def present(paths, refresh=False):
+    """
+    :return: whether each path exists, in order
+    :rtype: list
+    """
+    return [kind is not None for kind in lookup(paths, refresh)]
+
+
+def sequence(path, refresh=False):
+    """
+    :param path(str): any frame of a sequence
+
+    :raises: None
+
+    :return: the sequence on disk, None if the file has no frame number
+    :rtype: FileSequence
+    """
+    return index(os.path.dirname(os.path.abspath(path)), refresh).sequence(path)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
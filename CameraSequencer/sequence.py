@@ -0,0 +1,395 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import logging
+
+from CameraSequencer.snapshot import CameraSnapshot
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+log = logging.getLogger("CameraSequencer")
+
+
+class CameraSequence(object):
+    """
+    Columnar, NumPy-backed sequence of camera states.
+
+    Poses are held as ``N x 3`` translation and rotation arrays, focal
+    lengths as an ``N`` vector and filmbacks as ``N x 2``. Image paths are
+    interned: each camera stores an index into :attr:`image_table`, with
+    ``-1`` meaning no image. Slicing, reordering and transforms operate on
+    whole columns and return new sequences; no per-camera objects are built
+    unless a single camera is indexed or the sequence is iterated.
+    """
+
+    __slots__ = (
+        "names",
+        "shapes",
+        "translation",
+        "rotation",
+        "focal_length",
+        "filmback",
+        "image_index",
+        "image_table",
+    )
+
+    def __init__(
+        self,
+        names,
+        translation,
+        rotation,
+        focal_length,
+        filmback,
+        image_paths=None,
+        shapes=None,
+    ):
+        if numpy is None:
+            log.error("CameraSequence requires numpy.")
+            raise RuntimeError("CameraSequence requires numpy.")
+
+        count = len(names)
+
+        self.names = numpy.asarray(names, dtype=object).reshape(count)
+        self.shapes = numpy.asarray(
+            names if shapes is None else shapes, dtype=object
+        ).reshape(count)
+        self.translation = numpy.asarray(translation, dtype=float).reshape(
+            count, 3
+        )
+        self.rotation = numpy.asarray(rotation, dtype=float).reshape(count, 3)
+        self.focal_length = numpy.asarray(focal_length, dtype=float).reshape(
+            count
+        )
+        self.filmback = numpy.asarray(filmback, dtype=float).reshape(count, 2)
+
+        if image_paths is None:
+            image_paths = [None] * count
+
+        self.image_index, self.image_table = intern_paths(image_paths)
+
+    def __repr__(self):
+        return "<%s instance (%d cameras)>" % (
+            self.__class__.__name__,
+            len(self),
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.camera(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, numpy.integer)):
+            return self.camera(key)
+
+        return self.take(key)
+
+    def __add__(self, other):
+        return self.concatenate([self, other])
+
+    @classmethod
+    def _from_columns(
+        cls,
+        names,
+        shapes,
+        translation,
+        rotation,
+        focal_length,
+        filmback,
+        image_index,
+        image_table,
+    ):
+        sequence = cls.__new__(cls)
+        sequence.names = names
+        sequence.shapes = shapes
+        sequence.translation = translation
+        sequence.rotation = rotation
+        sequence.focal_length = focal_length
+        sequence.filmback = filmback
+        sequence.image_index = image_index
+        sequence.image_table = image_table
+
+        return sequence
+
+    @classmethod
+    def from_cameras(cls, cameras):
+        """
+        Builds a sequence from cameras or snapshots.
+
+        :param cameras(list): models.Camera or snapshot.CameraSnapshot objects
+
+        :raises: ``RuntimeError`` if numpy is unavailable
+
+        :return: new sequence
+        :rtype: CameraSequence
+        """
+        cameras = [
+            cam if isinstance(cam, CameraSnapshot) else cam.snapshot()
+            for cam in cameras
+        ]
+
+        return cls(
+            [cam.name for cam in cameras],
+            [cam.translation for cam in cameras],
+            [cam.rotation for cam in cameras],
+            [cam.focal_length for cam in cameras],
+            [cam.filmback for cam in cameras],
+            [cam.image_path for cam in cameras],
+            shapes=[cam.shape for cam in cameras],
+        )
+
+    @classmethod
+    def empty(cls):
+        return cls([], [], [], [], [])
+
+    @classmethod
+    def concatenate(cls, sequences):
+        """
+        Joins sequences end to end.
+
+        :param sequences(CameraSequence list): sequences to join
+
+        :raises: None
+
+        :return: new sequence
+        :rtype: CameraSequence
+        """
+        sequences = list(sequences)
+
+        if not sequences:
+            return cls.empty()
+
+        table = []
+        lookup = {}
+        indexes = []
+
+        for sequence in sequences:
+            remap = numpy.empty(
+                len(sequence.image_table) + 1, dtype=numpy.int32
+            )
+            remap[-1] = -1
+
+            for i, path in enumerate(sequence.image_table):
+                if path not in lookup:
+                    lookup[path] = len(table)
+                    table.append(path)
+                remap[i] = lookup[path]
+
+            indexes.append(remap[sequence.image_index])
+
+        return cls._from_columns(
+            numpy.concatenate([s.names for s in sequences]),
+            numpy.concatenate([s.shapes for s in sequences]),
+            numpy.concatenate([s.translation for s in sequences]),
+            numpy.concatenate([s.rotation for s in sequences]),
+            numpy.concatenate([s.focal_length for s in sequences]),
+            numpy.concatenate([s.filmback for s in sequences]),
+            numpy.concatenate(indexes),
+            tuple(table),
+        )
+
+    @property
+    def image_paths(self):
+        table = self.image_table + (None,)
+        return [table[i] for i in self.image_index]
+
+    def camera(self, index):
+        """
+        Returns one camera as a snapshot.
+
+        :param index(int): camera index
+
+        :raises: ``IndexError`` if out of range
+
+        :return: snapshot of the camera
+        :rtype: snapshot.CameraSnapshot
+        """
+        image = self.image_index[index]
+
+        return CameraSnapshot(
+            self.names[index],
+            self.shapes[index],
+            self.translation[index].tolist(),
+            self.rotation[index].tolist(),
+            float(self.focal_length[index]),
+            self.filmback[index].tolist(),
+            self.image_table[image] if image >= 0 else None,
+        )
+
+    def take(self, indices):
+        """
+        Selects cameras by slice, index array or boolean mask.
+
+        Also used to reorder the sequence by passing a permutation.
+
+        :param indices(slice|array): cameras to keep, in output order
+
+        :raises: None
+
+        :return: new sequence
+        :rtype: CameraSequence
+        """
+        if not isinstance(indices, slice):
+            indices = numpy.asarray(indices)
+
+        return self._from_columns(
+            self.names[indices],
+            self.shapes[indices],
+            self.translation[indices],
+            self.rotation[indices],
+            self.focal_length[indices],
+            self.filmback[indices],
+            self.image_index[indices],
+            self.image_table,
+        )
+
+    reorder = take
+
+    def offset(self, translation=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0)):
+        """
+        Adds a constant translation and rotation to every camera.
+
+        :param translation(float list): xyz offset, or an N x 3 array
+        :param rotation(float list): xyz rotation offset, or an N x 3 array
+
+        :raises: None
+
+        :return: new sequence
+        :rtype: CameraSequence
+        """
+        return self._from_columns(
+            self.names,
+            self.shapes,
+            self.translation + numpy.asarray(translation, dtype=float),
+            self.rotation + numpy.asarray(rotation, dtype=float),
+            self.focal_length,
+            self.filmback,
+            self.image_index,
+            self.image_table,
+        )
+
+    def scale(self, factor, pivot=(0.0, 0.0, 0.0)):
+        """
+        Scales camera positions about a pivot.
+
+        :param factor(float|float list): uniform or xyz scale
+        :param pivot(float list): point to scale about
+
+        :raises: None
+
+        :return: new sequence
+        :rtype: CameraSequence
+        """
+        pivot = numpy.asarray(pivot, dtype=float)
+        factor = numpy.asarray(factor, dtype=float)
+
+        return self._from_columns(
+            self.names,
+            self.shapes,
+            (self.translation - pivot) * factor + pivot,
+            self.rotation,
+            self.focal_length,
+            self.filmback,
+            self.image_index,
+            self.image_table,
+        )
+
+    def columns(self):
+        """
+        Returns the keyable channels as plain lists.
+
+        :raises: None
+
+        :return: attribute name to per-camera values
+        :rtype: dict
+        """
+        return channel_columns(
+            self.translation.T.tolist(),
+            self.rotation.T.tolist(),
+            self.focal_length.tolist(),
+            self.filmback.T.tolist(),
+        )
+
+
+def channel_columns(translation, rotation, focal_length, filmback):
+    """
+    Maps each keyable uber camera attribute to its column of values.
+
+    :param translation(list): x, y and z columns
+    :param rotation(list): x, y and z columns
+    :param focal_length(list): focal length column
+    :param filmback(list): horizontal and vertical aperture columns
+
+    :raises: None
+
+    :return: attribute name to per-camera values
+    :rtype: dict
+    """
+    columns = {}
+
+    for i, direction in enumerate(["X", "Y", "Z"]):
+        columns["translate%s" % direction] = list(translation[i])
+        columns["rotate%s" % direction] = list(rotation[i])
+
+    columns["focalLength"] = list(focal_length)
+    columns["horizontalFilmAperture"] = list(filmback[0])
+    columns["verticalFilmAperture"] = list(filmback[1])
+
+    return columns
+
+
+def snapshot_columns(cameras):
+    """
+    Transposes snapshots into keyable columns without numpy.
+
+    :param cameras(snapshot.CameraSnapshot list): cameras to transpose
+
+    :raises: None
+
+    :return: attribute name to per-camera values
+    :rtype: dict
+    """
+    if not cameras:
+        return channel_columns([[], [], []], [[], [], []], [], [[], []])
+
+    return channel_columns(
+        list(zip(*[cam.translation for cam in cameras])),
+        list(zip(*[cam.rotation for cam in cameras])),
+        [cam.focal_length for cam in cameras],
+        list(zip(*[cam.filmback for cam in cameras])),
+    )
+
+
+def intern_paths(paths):
+    """
+    Replaces repeated paths with indexes into a table of unique paths.
+
+    :param paths(str list): paths, None for missing
+
+    :raises: None
+
+    :return: index array (-1 for None) and the unique paths
+    :rtype: tuple
+    """
+    table = []
+    lookup = {}
+    index = numpy.empty(len(paths), dtype=numpy.int32)
+
+    for i, path in enumerate(paths):
+        if path is None:
+            index[i] = -1
+            continue
+
+        code = lookup.get(path)
+        if code is None:
+            code = lookup[path] = len(table)
+            table.append(path)
+
+        index[i] = code
+
+    return index, tuple(table)
@@ -0,0 +1,162 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import logging
+
+from CameraSequencer import resolver
+from CameraSequencer.backends import get_backend
+
+log = logging.getLogger("CameraSequencer")
+
+
+class CameraSnapshot(object):
+    """
+    Immutable record of a camera's state at the time it was captured.
+
+    Exposes the same attributes as :class:`CameraSequencer.ui.models.Camera`
+    so either can be handed to the :mod:`CameraSequencer.api` functions, but
+    reading them never touches the scene.
+    """
+
+    __slots__ = (
+        "name",
+        "shape",
+        "translation",
+        "rotation",
+        "focal_length",
+        "filmback",
+        "image_path",
+    )
+
+    def __init__(
+        self,
+        name,
+        shape,
+        translation,
+        rotation,
+        focal_length,
+        filmback,
+        image_path=None,
+    ):
+        setter = super(CameraSnapshot, self).__setattr__
+        setter("name", name)
+        setter("shape", shape)
+        setter("translation", tuple(translation))
+        setter("rotation", tuple(rotation))
+        setter("focal_length", focal_length)
+        setter("filmback", tuple(filmback))
+        setter("image_path", image_path)
+
+    def __repr__(self):
+        return "<%s instance of %s>" % (self.__class__.__name__, self.shape)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % self.__class__.__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is immutable" % self.__class__.__name__)
+
+    def __getstate__(self):
+        return self.astuple()
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            super(CameraSnapshot, self).__setattr__(name, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, CameraSnapshot):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    @property
+    def transform(self):
+        return self.name
+
+    def astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def asdict(self):
+        return dict(zip(self.__slots__, self.astuple()))
+
+
+def resolve_camera(node):
+    """
+    Finds the transform and shape of a camera from either node.
+
+    :param node(str): camera transform or shape
+
+    :raises: ``RuntimeError`` if node is not a camera
+
+    :return: transform and shape
+    :rtype: tuple
+    """
+    backend = get_backend()
+    node_type = backend.node_type(node)
+
+    if node_type == "camera":
+        return backend.list_relatives(node, parent=True)[0], node
+
+    if node_type == "transform":
+        shapes = backend.list_relatives(node, type="camera")
+        if shapes:
+            return node, shapes[0]
+
+    log.error("%s is not a camera" % node)
+    raise RuntimeError("%s is not a camera" % node)
+
+
+def capture(transform, shape):
+    """
+    Reads a camera's state from the scene in one pass.
+
+    :param transform(str): camera transform
+    :param shape(str): camera shape
+
+    :raises: None
+
+    :return: snapshot of the camera
+    :rtype: CameraSnapshot
+    """
+    backend = get_backend()
+    translation = backend.world_translation(transform)
+    rotation = backend.world_rotation(transform)
+    focal_length = backend.get_attr(shape + ".focalLength")
+    filmback = backend.get_attr(shape + ".filmAperture")[0]
+
+    image_path = resolver.image_path(shape)
+
+    return CameraSnapshot(
+        transform,
+        shape,
+        translation,
+        rotation,
+        focal_length,
+        filmback,
+        image_path,
+    )
+
+
+def snapshots(cameras):
+    """
+    Snapshots every camera that is not already a snapshot.
+
+    :param cameras(list): models.Camera or CameraSnapshot objects
+
+    :raises: None
+
+    :return: one snapshot per camera, in order
+    :rtype: list
+    """
+    return [
+        cam if isinstance(cam, CameraSnapshot) else cam.snapshot()
+        for cam in cameras
+    ]
@@ -1,9 +1,7 @@
 import logging
 
-try:
-    from maya import cmds, OpenMaya
-except ImportError:
-    pass
+from CameraSequencer import resolver, snapshot
+from CameraSequencer.backends import get_backend
 
 log = logging.getLogger("CameraSequencer")
 
@@ -14,35 +12,66 @@ class Camera(object):
     """
 
     def __init__(self, camera="perspShape"):
-        if cmds.nodeType(camera) == "transform":
+        node_type = get_backend().node_type(camera)
+
+        if node_type == "transform":
             self.transform = camera
             self.shape = self.getShape(camera)
 
-        elif cmds.nodeType(camera) == "camera":
+        elif node_type == "camera":
             self.shape = camera
-            self.transform = cmds.listRelatives(camera, parent=True)[0]
+            self.transform = get_backend().list_relatives(camera, parent=True)[
+                0
+            ]
 
         else:
             log.error("%s is not a camera" % camera)
             raise RuntimeError("%s is not a camera" % camera)
 
+        # Identifies the camera however it is renamed.
+        self.uuid = get_backend().node_uuid(self.transform)
+
+    @classmethod
+    def from_nodes(cls, transform, shape, uuid):
+        """
+        Makes a camera from nodes already looked up, without querying the
+        scene.
+
+        :param transform(str): camera transform
+        :param shape(str): camera shape
+        :param uuid(str): transform's UUID
+
+        :raises: None
+
+        :return: the camera
+        :rtype: Camera
+        """
+        camera = cls.__new__(cls)
+        camera.transform = transform
+        camera.shape = shape
+        camera.uuid = uuid
+        return camera
+
     def __repr__(self):
         return "<%s instance of %s>" % (self.__class__.__name__, self.shape)
 
-    def __mobject__(self):
-        msel = OpenMaya.MSelectionList()
-        msel.add(self.transform, 0)
+    def __eq__(self, other):
+        if not isinstance(other, Camera):
+            return NotImplemented
+        return self.uuid == other.uuid
 
-        mobject = OpenMaya.MObject()
-        msel.getDependNode(0, mobject)
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
 
-        return mobject
+    def __hash__(self):
+        return hash(self.uuid)
 
     def getShape(self, transform):
         try:
-            shape = cmds.listRelatives(transform, children=True, type="camera")[
-                0
-            ]
+            shape = get_backend().list_relatives(transform, type="camera")[0]
 
             return shape
 
@@ -59,34 +88,157 @@ class Camera(object):
         self.transform = value
         self.shape = self.getShape(value)
 
+    @property
+    def exists(self):
+        return get_backend().node_from_uuid(self.uuid) is not None
+
+    def update_name(self):
+        """
+        Picks up the camera's current name from its UUID, after it was
+        renamed.
+
+        :raises: ``RuntimeError`` if the camera was deleted
+
+        :return: the camera's name
+        :rtype: str
+        """
+        name = get_backend().node_from_uuid(self.uuid)
+
+        if name is None:
+            log.error("%s no longer exists" % self.transform)
+            raise RuntimeError("%s no longer exists" % self.transform)
+
+        if name != self.transform:
+            self.name = name
+
+        return name
+
+    def snapshot(self):
+        """
+        Captures the camera's current state in one pass.
+
+        :raises: None
+
+        :return: immutable copy of the camera's state
+        :rtype: snapshot.CameraSnapshot
+        """
+        return snapshot.capture(self.transform, self.shape)
+
     @property
     def focal_length(self):
-        return cmds.getAttr(self.name + ".focalLength")
+        return get_backend().get_attr(self.shape + ".focalLength")
 
     @property
     def filmback(self):
         return [
-            cmds.getAttr(self.name + ".horizontalFilmAperture"),
-            cmds.getAttr(self.name + ".verticalFilmAperture"),
+            get_backend().get_attr(self.shape + ".horizontalFilmAperture"),
+            get_backend().get_attr(self.shape + ".verticalFilmAperture"),
         ]
 
     @property
     def translation(self):
-        return cmds.xform(
-            self.transform, query=True, worldSpace=True, translation=True
-        )
+        return get_backend().world_translation(self.transform)
 
     @property
     def rotation(self):
-        return cmds.xform(
-            self.transform, query=True, worldSpace=True, rotation=True
-        )
+        return get_backend().world_rotation(self.transform)
+
+    @property
+    def image_planes(self):
+        """
+        :return: every image plane on the camera, resolved and cached
+        :rtype: list
+        """
+        return resolver.image_planes(self.shape)
+
+    @property
+    def image_paths(self):
+        return resolver.image_paths(self.shape)
 
     @property
     def image_path(self):
-        img_planes = cmds.listConnections(self.shape, type="imagePlane")
+        """
+        :return: file shown by the first image plane at the current time
+        :rtype: str
+        """
+        return resolver.image_path(self.shape)
+
+
+def selected_cameras(exclude=None):
+    """
+    Makes a camera of every selected camera and every camera under a
+    selected group, with one scene query whatever is selected.
+
+    :param exclude(CameraRegistry): cameras to leave out
+
+    :raises: None
+
+    :return: one camera per camera node, in selection order
+    :rtype: list
+    """
+    cameras = []
+    seen = set()
+
+    for transform, shape, uuid in get_backend().selected_cameras():
+        if uuid in seen or (exclude is not None and uuid in exclude):
+            continue
+
+        seen.add(uuid)
+        cameras.append(Camera.from_nodes(transform, shape, uuid))
+
+    return cameras
+
+
+class CameraRegistry(object):
+    """
+    Entries of a camera list by camera UUID, so finding a camera's entry
+    does not depend on its name or on walking the list.
+
+    Cameras can be looked up by :class:`Camera` or by UUID.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def __repr__(self):
+        return "<%s %d cameras>" % (self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, camera):
+        return _uuid(camera) in self._entries
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    def get(self, camera, default=None):
+        return self._entries.get(_uuid(camera), default)
+
+    def add(self, camera, entry):
+        """
+        :param camera(Camera): listed camera
+        :param entry(object): its list entry
+
+        :raises: None
+
+        :return: False if the camera was already registered
+        :rtype: bool
+        """
+        uuid = _uuid(camera)
+
+        if uuid in self._entries:
+            return False
+
+        self._entries[uuid] = entry
+        return True
+
+    def pop(self, camera, default=None):
+        return self._entries.pop(_uuid(camera), default)
+
+    def clear(self):
+        self._entries.clear()
 
-        if img_planes:
-            img_planeshape = cmds.listRelatives(img_planes[0], children=True)[0]
 
-            return cmds.getAttr(img_planeshape + ".imageName")
+def _uuid(camera):
+    return getattr(camera, "uuid", camera)
@@ -4,15 +4,11 @@
 import os
 import logging
 from CameraSequencer.ui.widgets import CameraList, ObjectItem, LineEditWidget
-from CameraSequencer.ui.models import Camera
-
-try:
-    from maya import cmds, OpenMaya
-except ImportError:
-    pass
+from CameraSequencer.ui.models import CameraRegistry, selected_cameras
+from CameraSequencer.backends import SCENE_EVENTS, get_backend
 
 from functools import partial
-from collections import defaultdict
+from collections import OrderedDict
 
 try:
     from CameraSequencer.packages.Qt import QtWidgets, QtCore
@@ -48,8 +44,13 @@ class UI(QtWidgets.QDialog):
         self.layout = QtWidgets.QVBoxLayout()
         self.layout.setContentsMargins(10, 10, 10, 10)
 
+        # Listed cameras' items, by camera UUID.
+        self.registry = CameraRegistry()
+
         self.maya_hooks = MayaHooks(parent=self)
         self.maya_hooks.before_scene_changed.connect(self.clear_lists)
+        self.maya_hooks.cameras_removed.connect(self.remove_cameras)
+        self.maya_hooks.cameras_renamed.connect(self.rename_cameras)
 
         self.create_layout()
         self.create_connections()
@@ -95,6 +96,15 @@ class UI(QtWidgets.QDialog):
         self.dir_path.setMinimumHeight(25)
         self.dir_path.setText("Path to sequence images")
 
+        self.image_mode = QtWidgets.QComboBox()
+        self.image_mode.setMinimumHeight(25)
+        self.image_mode.addItems(["copy", "hardlink", "symlink", "reference"])
+
+        self.resolution = QtWidgets.QComboBox()
+        self.resolution.setMinimumHeight(25)
+        self.resolution.addItems(["full", "half", "quarter"])
+        self.proxy_job = None
+
         self.seq_button = QtWidgets.QPushButton("Sequence Camera")
         self.seq_button.setMinimumHeight(40)
 
@@ -102,9 +112,7 @@ class UI(QtWidgets.QDialog):
         self.start_frame_spnbox = QtWidgets.QSpinBox()
         self.start_frame_spnbox.setMinimum(-999999)
         self.start_frame_spnbox.setMaximum(999999)
-        self.start_frame_spnbox.setValue(
-            int(cmds.playbackOptions(query=True, minTime=True))
-        )
+        self.start_frame_spnbox.setValue(int(get_backend().playback_range()[0]))
         self.start_frame_spnbox.setAlignment(QtCore.Qt.AlignRight)
 
         self.start_frame_spnbox.setMinimumWidth(100)
@@ -136,6 +144,8 @@ class UI(QtWidgets.QDialog):
         self.button_layout.setContentsMargins(5, 0, 0, 0)
 
         self.file_layout.addWidget(self.dir_path, 1)
+        self.file_layout.addWidget(self.image_mode, 0)
+        self.file_layout.addWidget(self.resolution, 0)
         self.file_layout.addWidget(self.browse_button, 0)
 
         self.cam_layout.addWidget(self.cam_list, 1)
@@ -182,6 +192,13 @@ class UI(QtWidgets.QDialog):
         )
         self.add_button.setToolTip("Add all selected camera from list.")
         self.seq_button.setToolTip("Create a sequence camera.")
+        self.image_mode.setToolTip(
+            "Copy the images, or link to them without using disk space.\n"
+            "reference plays the original plates without writing a sequence."
+        )
+        self.resolution.setToolTip(
+            "Image plane resolution, proxies are made in the background."
+        )
         self.cam_list.setToolTip(
             "Cameras added to the list"
             " are in order\n of the camera"
@@ -219,25 +236,26 @@ class UI(QtWidgets.QDialog):
         :rtype: NoneType
         """
         self.maya_hooks.clear_callbacks()
+        self.registry.clear()
         self.cam_list.clear()
 
     def add_clicked(self):
         """
-        Add button
+        Add button, adds the selected cameras and the cameras under
+        selected groups.
 
         :raises: None
 
         :return: None
         :rtype: NoneType
         """
-        nodes = cmds.ls(selection=True)
+        cameras = selected_cameras(exclude=self.registry)
 
-        for node in nodes:
-            if len(self.cam_list.findItems(node, QtCore.Qt.MatchExactly)):
-                log.info("%s already added to the list." % node)
-                continue
+        if not cameras:
+            log.info("No cameras selected that are not already listed.")
+            return
 
-            self.new_obj_item(Camera(node))
+        self.add_cameras(cameras)
 
     def new_obj_item(self, node):
         """
@@ -248,16 +266,26 @@ class UI(QtWidgets.QDialog):
         :return: None
         :rtype: NoneType
         """
-        item = ObjectItem(node)
+        self.add_cameras([node])
+
+    def add_cameras(self, cameras):
+        """
+        Lists cameras, inserting all of their items in one update.
+
+        :param cameras(list): models.Camera objects not already listed
 
-        self.cam_list.addItem(item)
+        :raises: None
 
-        # Add delete callbacks
-        del_callback = partial(self.delete_obj_item, item)
-        ren_callback = partial(self.rename_obj_item, item)
+        :return: None
+        :rtype: NoneType
+        """
+        items = [ObjectItem(camera) for camera in cameras]
 
-        self.maya_hooks.add_about_to_delete_callback(node, del_callback)
-        self.maya_hooks.add_named_changed_callback(node, ren_callback)
+        self.cam_list.add_items(items)
+
+        for camera, item in zip(cameras, items):
+            self.registry.add(camera, item)
+            self.maya_hooks.watch(camera)
 
     def sequence_camera(self):
         """
@@ -270,7 +298,7 @@ class UI(QtWidgets.QDialog):
         """
         camera_nodes = []
 
-        for i in xrange(self.cam_list.count()):
+        for i in range(self.cam_list.count()):
             camera_nodes.append(self.cam_list.item(i).camera)
 
         if not camera_nodes:
@@ -280,93 +308,157 @@ class UI(QtWidgets.QDialog):
         start_img_path = None
         start_frame = self.start_frame_spnbox.value()
 
-        # img_path = self.dir_path.text()
+        img_path = self.dir_path.text()
 
-        # if os.path.isdir(os.path.dirname(img_path)):
-        #     start_img_path = api.sequence_images(
-        #         camera_nodes,
-        #         start_frame=start_frame,
-        #         img_sequence=img_path)
+        link_images = self.image_mode.currentText() == "reference"
+        write_images = not link_images and os.path.isdir(
+            os.path.dirname(img_path)
+        )
 
-        api.sequence_cameras(
-            camera_nodes, start_frame=start_frame, img_sequence=start_img_path
+        # Nothing is created unless every camera can be sequenced.
+        report = api.check_cameras(
+            camera_nodes, check_images=write_images or link_images
         )
 
-    def delete_obj_item(self, item):
+        if not report.ok:
+            msg = report.summary()
+            log.error(msg)
+            raise RuntimeError(msg)
+
+        camera_nodes = report.snapshots
+
+        if write_images:
+            result = api.sequence_images(
+                camera_nodes,
+                start_frame=start_frame,
+                img_sequence=img_path,
+                mode=self.image_mode.currentText(),
+            )
+            start_img_path = result.first
+
+            if not result.ok:
+                log.warning(
+                    "%d of %d frames were not written."
+                    % (len(result.failed), len(result))
+                )
+
+        uber_cam = api.sequence_cameras(
+            camera_nodes,
+            start_frame=start_frame,
+            img_sequence=start_img_path,
+            link_images=link_images,
+        )
+
+        resolution = self.resolution.currentText()
+
+        if start_img_path and resolution != "full":
+            if self.proxy_job is not None:
+                self.proxy_job.cancel()
+
+            self.proxy_job = api.generate_proxies(
+                result,
+                resolutions=[resolution],
+                callback=partial(show_proxies, uber_cam, resolution),
+            )
+
+    def remove_rows(self, rows):
         """
-        Deletes selected items
+        Takes rows off the list in one update, each run of neighbouring
+        rows with a single model change.
+
+        :param rows(list): row numbers
 
         :raises: None
 
         :return: None
         :rtype: NoneType
         """
+        runs = []
+        for row in sorted(set(rows), reverse=True):
+            if runs and row == runs[-1][0] - 1:
+                runs[-1][0] = row
+                runs[-1][1] += 1
+            else:
+                runs.append([row, 1])
+
+        model = self.cam_list.model()
+        self.cam_list.setUpdatesEnabled(False)
         try:
-            self.cam_list.takeItem(self.cam_list.indexFromItem(item).row())
-        except RuntimeError as e:
-            if "Internal C++ object (ObjectItem) already deleted" in str(e):
-                pass
-                raise
+            for row, count in runs:
+                model.removeRows(row, count)
+        finally:
+            self.cam_list.setUpdatesEnabled(True)
 
-    def delete_obj_items(self):
+    def remove_cameras(self, uuids):
         """
-        Deletes selected items
+        Takes cameras deleted from the scene off the list.
+
+        :param uuids(list): UUIDs of the deleted cameras
 
         :raises: None
 
         :return: None
         :rtype: NoneType
         """
-        try:
-            for item in self.cam_list.selectedItems():
-                self.cam_list.takeItem(self.cam_list.indexFromItem(item).row())
-        except RuntimeError as e:
-            if "Internal C++ object (ObjectItem) already deleted" in str(e):
-                pass
-                raise
-
-    def rename_obj_item(self, item, old_name, new_name):
-        try:
-            item.rename(new_name)
+        removed = set(
+            uuid for uuid in uuids if self.registry.pop(uuid) is not None
+        )
 
-        except RuntimeError as e:
-            if "Internal C++ object (ObjectItem) already deleted" in str(e):
-                pass
-                raise
+        if not removed:
+            return
 
-    def move_items_up(self):
+        self.remove_rows(
+            [
+                row
+                for row in range(self.cam_list.count())
+                if self.cam_list.item(row).camera.uuid in removed
+            ]
+        )
+
+    def rename_cameras(self, renames):
         """
-        Moves selected items up
+        Shows the new names of renamed cameras.
+
+        :param renames(dict): latest name of each renamed camera, by UUID
 
         :raises: None
 
         :return: None
         :rtype: NoneType
         """
-        newIndexes = []
-        lastIndex = self.cam_list.count() - 1
-        indexes = sorted(
-            [
-                [self.cam_list.indexFromItem(item).row(), item]
-                for item in self.cam_list.selectedItems()
-            ]
-        )
+        for uuid, name in renames.items():
+            item = self.registry.get(uuid)
+            if item is not None:
+                item.rename(name)
 
-        for oldIndex, item in indexes:
-            newIndex = oldIndex - 1
+    def delete_obj_items(self):
+        """
+        Deletes selected items
 
-            if newIndex < 0:
-                newIndex = lastIndex
+        :raises: None
 
-            newIndexes.append(newIndex)
+        :return: None
+        :rtype: NoneType
+        """
+        rows = self.cam_list.selected_rows()
 
-            if newIndex == self.cam_list.indexFromItem(item).row():
-                continue
+        for row in rows:
+            camera = self.cam_list.item(row).camera
+            self.registry.pop(camera)
+            self.maya_hooks.unwatch(camera)
 
-            self.cam_list.takeItem(oldIndex)
-            self.cam_list.insertItem(newIndex, item)
+        self.remove_rows(rows)
 
-        [self.cam_list.item(ind).setSelected(True) for ind in newIndexes]
+    def move_items_up(self):
+        """
+        Moves selected items up
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.move_rows(-1)
 
     def move_items_down(self):
         """
@@ -377,33 +469,53 @@ class UI(QtWidgets.QDialog):
         :return: None
         :rtype: NoneType
         """
-        newIndexes = []
-        lastIndex = self.cam_list.count() - 1
-        indexes = sorted(
-            [
-                [self.cam_list.indexFromItem(item).row(), item]
-                for item in self.cam_list.selectedItems()
-            ],
-            reverse=True,
-        )
+        self.move_rows(1)
+
+    def move_rows(self, step):
+        """
+        Moves the selected rows one place up or down in a single reorder of
+        the list. Neighbouring selected rows move as a block, and a block
+        already at the end it moves towards wraps round to the other end.
 
-        for oldIndex, item in indexes:
-            newIndex = oldIndex + 1
+        :param step(int): -1 to move up, 1 to move down
 
-            if newIndex > lastIndex:
-                newIndex = 0
+        :raises: None
 
-            newIndexes.append(newIndex)
+        :return: None
+        :rtype: NoneType
+        """
+        count = self.cam_list.count()
+        rows = self.cam_list.selected_rows()
+
+        if not rows or len(rows) == count:
+            return
 
-            if newIndex == self.cam_list.indexFromItem(item).row():
-                continue
+        selected = set(rows)
+        order = list(range(count))
 
-            self.cam_list.takeItem(oldIndex)
-            self.cam_list.insertItem(newIndex, item)
+        # Rows are walked towards the end they move to, so each swaps with
+        # a row that is not moving.
+        edge = 0 if step < 0 else count - 1
+        wrapped = 0
+        while edge - step * wrapped in selected:
+            wrapped += 1
 
-        [self.cam_list.item(ind).setSelected(True) for ind in newIndexes]
+        for row in rows if step < 0 else reversed(rows):
+            if abs(row - edge) >= wrapped:
+                order[row], order[row + step] = order[row + step], order[row]
+
+        if step < 0:
+            order = order[wrapped:] + order[:wrapped]
+        else:
+            order = order[count - wrapped :] + order[: count - wrapped]
+
+        position = dict((row, new) for new, row in enumerate(order))
+        self.cam_list.reorder(order, [position[row] for row in rows])
 
     def closeEvent(self, event):
+        if self.proxy_job is not None:
+            self.proxy_job.cancel()
+
         self.maya_hooks.clear_callbacks()
         self.maya_hooks.clear_scene_callbacks()
         super(UI, self).closeEvent(event)
@@ -418,6 +530,29 @@ class UI(QtWidgets.QDialog):
             event.ignore()
 
 
+def show_proxies(uber_cam, resolution, result):
+    """
+    Switches the uber image plane to its proxies once they are made.
+
+    :param uber_cam(list): uber camera transform and shape
+    :param resolution(str): proxy resolution
+    :param result(images.SequenceResult): proxy generation outcome
+
+    :raises: None
+
+    :return: None
+    :rtype: NoneType
+    """
+    if not result.ok:
+        log.warning(
+            "%d of %d %s proxies were not made."
+            % (len(result.failed), len(result), resolution)
+        )
+        return
+
+    api.set_image_resolution(uber_cam, resolution)
+
+
 class MayaHooks(QtCore.QObject):
     """Manage all Maya Message Callbacks (Hooks)"""
 
@@ -425,20 +560,34 @@ class MayaHooks(QtCore.QObject):
     scene_changed = QtCore.Signal()
     scene_selection_changed = QtCore.Signal()
 
+    # UUIDs of the deleted cameras, and the latest name of each renamed
+    # camera by UUID.
+    cameras_removed = QtCore.Signal(object)
+    cameras_renamed = QtCore.Signal(object)
+
     def __init__(self, parent=None):
         super(MayaHooks, self).__init__(parent=parent)
 
-        self.callback_ids = defaultdict(list)
+        # UUIDs of the watched cameras, looked up by one scene wide removed
+        # and one renamed listener however many cameras are watched.
+        self.watched = set()
+        self.node_callback_ids = []
         self.scene_callback_ids = []
 
-        before_change_messages = [
-            OpenMaya.MSceneMessage.kBeforeOpen,
-            OpenMaya.MSceneMessage.kBeforeNew,
-            OpenMaya.MSceneMessage.kBeforeRemoveReference,
-        ]
-        for i, msg in enumerate(before_change_messages):
-            callback_id = OpenMaya.MSceneMessage.addCallback(
-                msg, self.emit_before_scene_changed
+        # Events since the last flush. Removals are batched and renames
+        # coalesced to each camera's latest name, so a burst of scene
+        # edits is one list update once Maya is idle.
+        self.removed = []
+        self.renamed = OrderedDict()
+
+        self.flush_timer = QtCore.QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(0)
+        self.flush_timer.timeout.connect(self.flush)
+
+        for event in SCENE_EVENTS:
+            callback_id = get_backend().add_scene_callback(
+                event, self.emit_before_scene_changed
             )
             self.scene_callback_ids.append(callback_id)
 
@@ -451,42 +600,77 @@ class MayaHooks(QtCore.QObject):
     def emit_scene_selection_changed(self, *args):
         self.scene_selection_changed.emit()
 
-    def add_named_changed_callback(self, node, callback):
-        mobject = node.__mobject__()
+    def listen(self):
+        """
+        Starts the scene wide node listeners, if they are not running.
+        """
+        if self.node_callback_ids:
+            return
+
+        backend = get_backend()
+        self.node_callback_ids = [
+            backend.add_node_removed_callback(
+                self.node_removed, node_type="transform"
+            ),
+            backend.add_node_renamed_callback(self.node_renamed),
+        ]
 
-        def maya_callback(mobject, old_name, data):
-            new_name = OpenMaya.MFnDependencyNode(mobject).name()
-            callback(old_name, new_name)
+    def watch(self, node):
+        """
+        Reports the camera's deletion and renames.
+        """
+        self.listen()
+        self.watched.add(node.uuid)
 
-        callback_id = OpenMaya.MNodeMessage.addNameChangedCallback(
-            mobject,
-            maya_callback,
-        )
-        self.callback_ids[node].append(callback_id)
+    def unwatch(self, node):
+        """
+        Stops watching one camera.
+        """
+        self.watched.discard(node.uuid)
+        self.renamed.pop(node.uuid, None)
 
-    def add_about_to_delete_callback(self, node, callback):
-        mobject = node.__mobject__()
+    def node_removed(self, uuid, name):
+        if uuid not in self.watched:
+            return
 
-        def maya_callback(depend_node, dg_modifier, data):
-            callback_ids = self.callback_ids.pop(node, None)
-            if callback_ids:
-                for callback_id in callback_ids:
-                    OpenMaya.MMessage.removeCallback(callback_id)
-            callback()
+        self.watched.discard(uuid)
+        self.renamed.pop(uuid, None)
+        self.removed.append(uuid)
+        self.schedule()
 
-        callback_id = OpenMaya.MNodeMessage.addNodeAboutToDeleteCallback(
-            mobject,
-            maya_callback,
-        )
-        self.callback_ids[node].append(callback_id)
+    def node_renamed(self, uuid, old_name, new_name):
+        if uuid not in self.watched:
+            return
+
+        self.renamed[uuid] = new_name
+        self.schedule()
+
+    def schedule(self):
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        """
+        Emits the events queued since the last flush.
+        """
+        removed, self.removed = self.removed, []
+        renamed, self.renamed = self.renamed, OrderedDict()
+
+        if removed:
+            self.cameras_removed.emit(removed)
+        if renamed:
+            self.cameras_renamed.emit(renamed)
 
     def clear_callbacks(self):
-        for node, callback_ids in self.callback_ids.items():
-            for callback_id in callback_ids:
-                OpenMaya.MMessage.removeCallback(callback_id)
-        self.callback_ids = defaultdict(list)
+        for callback_id in self.node_callback_ids:
+            get_backend().remove_callback(callback_id)
+        self.node_callback_ids = []
+        self.watched = set()
+        self.removed = []
+        self.renamed = OrderedDict()
+        self.flush_timer.stop()
 
     def clear_scene_callbacks(self):
         for callback_id in self.scene_callback_ids:
-            OpenMaya.MMessage.removeCallback(callback_id)
+            get_backend().remove_callback(callback_id)
         self.scene_callback_ids = []
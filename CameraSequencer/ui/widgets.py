@@ -36,6 +36,115 @@ class CameraList(QtWidgets.QListWidget):
         self.setFocusPolicy(QtCore.Qt.NoFocus)
         self.setObjectName("cameralist")
 
+        # Rows are all one line of text, so their size is measured once.
+        self.setUniformItemSizes(True)
+
+    def add_items(self, items):
+        """
+        Appends items with a single reset of the view, instead of a row
+        insertion and relayout per item.
+
+        :param items(list): QListWidgetItems to append
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        model = self.model()
+        self.setUpdatesEnabled(False)
+        blocked = model.blockSignals(True)
+
+        try:
+            for item in items:
+                self.addItem(item)
+        finally:
+            model.blockSignals(blocked)
+            # The view did not see the rows arrive, lay it out once.
+            self.reset()
+            self.setUpdatesEnabled(True)
+
+    def reorder(self, order, selected=()):
+        """
+        Puts the rows in a new order with a single reset of the view,
+        instead of a take and insert per moved row.
+
+        :param order(list): current row of each row, in the new order
+        :param selected(list): rows to select afterwards, in the new order
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        model = self.model()
+        self.setUpdatesEnabled(False)
+        blocked = model.blockSignals(True)
+
+        # Selected rows are tracked through every take otherwise.
+        self.clearSelection()
+
+        try:
+            # Taken from the end, so no row has to shift up.
+            items = [
+                self.takeItem(row) for row in range(self.count() - 1, -1, -1)
+            ]
+            items.reverse()
+
+            for row in order:
+                self.addItem(items[row])
+        finally:
+            model.blockSignals(blocked)
+            self.reset()
+            self.setUpdatesEnabled(True)
+
+        self.select_rows(selected)
+
+    def selected_rows(self):
+        """
+        :return: selected row numbers, read from the selection's ranges
+            rather than with selectedRows, which checks every row against
+            every range
+        :rtype: list
+        """
+        rows = []
+
+        for selection_range in self.selectionModel().selection():
+            rows.extend(
+                range(selection_range.top(), selection_range.bottom() + 1)
+            )
+
+        return sorted(set(rows))
+
+    def select_rows(self, rows):
+        """
+        Selects rows in one change of the selection, each run of
+        neighbouring rows as one range.
+
+        :param rows(list): row numbers
+
+        :raises: None
+
+        :return: None
+        :rtype: NoneType
+        """
+        model = self.model()
+        selection = QtCore.QItemSelection()
+        runs = []
+
+        for row in sorted(set(rows)):
+            if runs and row == runs[-1][1] + 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+
+        for first, last in runs:
+            selection.select(model.index(first, 0), model.index(last, 0))
+
+        self.selectionModel().select(
+            selection, QtCore.QItemSelectionModel.ClearAndSelect
+        )
+
 
 class LineEditWidget(QtWidgets.QLineEdit):
     """
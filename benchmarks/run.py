@@ -0,0 +1,464 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Scalability benchmarks.
+
+Runs the sequencing hot path, camera model reads and the camera list
+operations at increasing camera counts against the in-memory backend, and
+the list operations on an offscreen Qt platform. Results are written as
+JSON and compared against a stored baseline::
+
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 10 1000 --only sequence
+    python benchmarks/run.py --save-baseline
+
+A benchmark fails when it makes more backend calls than the baseline, or
+when its time grows faster than ``N ** 1.5`` between two sizes of the same
+run. Both hold on any machine. The baseline's wall times were measured on
+one machine only, so a run slower than ``--tolerance`` times the baseline
+is only noted. Saving a baseline needs a Qt binding, so the list
+operations are always in it.
+"""
+
+import os
+import sys
+import gc
+import json
+import atexit
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from timeit import default_timer
+from collections import OrderedDict
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+this_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(this_dir))
+
+from CameraSequencer import api, resolver  # noqa: E402
+from CameraSequencer.backends import set_backend  # noqa: E402
+from CameraSequencer.backends.memory_backend import MemoryBackend  # noqa: E402
+
+SIZES = (10, 1000, 10000, 100000)
+BASELINE = os.path.join(this_dir, "baseline.json")
+
+# Times below this are too noisy to compare against a baseline.
+NOISE_FLOOR = 0.005
+
+BENCHMARKS = OrderedDict()
+
+_plates = []
+
+
+def benchmark(name, needs_qt=False, plates=False):
+    """
+    Registers a benchmark.
+
+    The decorated function receives a populated backend and the camera
+    names and returns the callable to time. With ``plates`` every camera's
+    plate exists on disk.
+    """
+
+    def register(func):
+        BENCHMARKS[name] = (func, needs_qt, plates)
+        return func
+
+    return register
+
+
+def plate_directory(count):
+    """
+    :return: temporary directory holding at least count empty plates,
+        removed on exit
+    :rtype: str
+    """
+    if not _plates:
+        directory = tempfile.mkdtemp(prefix="CameraSequencer_bench_")
+        atexit.register(shutil.rmtree, directory, True)
+        _plates[:] = [directory, 0]
+
+    directory, made = _plates
+
+    for i in range(made, count):
+        open(os.path.join(directory, "plate.%06d.exr" % i), "w").close()
+
+    _plates[1] = max(made, count)
+
+    return directory
+
+
+def build_scene(count, plates=False):
+    # Drop what was cached from the previous scene before anything is timed.
+    resolver.invalidate()
+    directory = plate_directory(count) if plates else "/plates"
+
+    backend = MemoryBackend(log_calls=False)
+    set_backend(backend)
+
+    names = []
+    for i in range(count):
+        transform, shape = backend.add_camera(
+            "cam_%06d" % i,
+            translation=(i, 0.5 * i, 0.0),
+            rotation=(0.0, i % 360, 0.0),
+            focal_length=35.0 + i % 50,
+            image_path=os.path.join(directory, "plate.%06d.exr" % i),
+        )
+        names.append(transform)
+
+    return backend, names
+
+
+def cameras(names):
+    from CameraSequencer.ui.models import Camera
+
+    return [Camera(name) for name in names]
+
+
+@benchmark("sequence_cameras.bulk")
+def bench_sequence_bulk(backend, names):
+    cams = cameras(names)
+    return lambda: api.sequence_cameras(cams, start_frame=1001)
+
+
+@benchmark("sequence_cameras.setkeyframe")
+def bench_sequence_setkeyframe(backend, names):
+    cams = cameras(names)
+    return lambda: api.sequence_cameras(cams, start_frame=1001, bulk=False)
+
+
+@benchmark("sequence_cameras.resequence")
+def bench_resequence(backend, names):
+    cams = cameras(names)
+    api.sequence_cameras(cams, start_frame=1001)
+
+    # Drop the first camera and move the last one to the middle.
+    middle = len(cams) // 2
+    order = cams[1:middle] + cams[-1:] + cams[middle:-1]
+    return lambda: api.sequence_cameras(order, start_frame=1001)
+
+
+@benchmark("check_cameras", plates=True)
+def bench_check_cameras(backend, names):
+    cams = cameras(names)
+    return lambda: api.check_cameras(cams)
+
+
+@benchmark("camera.property_reads")
+def bench_property_reads(backend, names):
+    cams = cameras(names)
+
+    def run():
+        for cam in cams:
+            cam.translation
+            cam.rotation
+            cam.focal_length
+            cam.filmback
+            cam.image_path
+
+    return run
+
+
+@benchmark("camera.snapshot")
+def bench_snapshot(backend, names):
+    cams = cameras(names)
+    return lambda: [cam.snapshot() for cam in cams]
+
+
+@benchmark("camera.selected")
+def bench_selected_cameras(backend, names):
+    from CameraSequencer.ui.models import selected_cameras
+
+    backend.select(names)
+    return selected_cameras
+
+
+@benchmark("camera.image_path.cached")
+def bench_cached_image_path(backend, names):
+    cams = cameras(names)
+    for cam in cams:
+        cam.image_path
+
+    return lambda: [cam.image_path for cam in cams]
+
+
+_app = []
+
+
+def build_ui(backend, names, populate=True):
+    from CameraSequencer.packages.Qt import QtWidgets
+    from CameraSequencer.ui import ui
+
+    if not _app:
+        _app.append(
+            QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        )
+
+    dialog = ui.UI()
+
+    if populate:
+        backend.select(names)
+        dialog.add_clicked()
+
+    return dialog
+
+
+@benchmark("ui.add_clicked", needs_qt=True)
+def bench_add_clicked(backend, names):
+    dialog = build_ui(backend, names, populate=False)
+    backend.select(names)
+    return dialog.add_clicked
+
+
+def select_every_other(dialog):
+    dialog.cam_list.select_rows(range(0, dialog.cam_list.count(), 2))
+
+
+@benchmark("ui.move_items_up", needs_qt=True)
+def bench_move_up(backend, names):
+    dialog = build_ui(backend, names)
+    select_every_other(dialog)
+    return dialog.move_items_up
+
+
+@benchmark("ui.move_items_down", needs_qt=True)
+def bench_move_down(backend, names):
+    dialog = build_ui(backend, names)
+    select_every_other(dialog)
+    return dialog.move_items_down
+
+
+@benchmark("ui.delete_obj_items", needs_qt=True)
+def bench_delete_items(backend, names):
+    dialog = build_ui(backend, names)
+    dialog.cam_list.selectAll()
+    return dialog.delete_obj_items
+
+
+def has_qt():
+    try:
+        from CameraSequencer.packages.Qt import QtWidgets  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def measure(setup, count, memory=True, plates=False):
+    """
+    Times one benchmark at one size.
+
+    :return: seconds, backend call counts and peak traced bytes
+    :rtype: dict
+    """
+    backend, names = build_scene(count, plates)
+    run = setup(backend, names)
+
+    gc.collect()
+    backend.reset_calls()
+    start = default_timer()
+    run()
+    seconds = default_timer() - start
+
+    result = {
+        "seconds": seconds,
+        "calls": sum(backend.counts.values()),
+        "call_counts": dict(backend.counts),
+    }
+
+    if memory:
+        backend, names = build_scene(count, plates)
+        run = setup(backend, names)
+
+        gc.collect()
+        tracemalloc.start()
+        run()
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def run_benchmarks(sizes, only=None, budget=60.0, memory=True):
+    results = OrderedDict()
+    qt = has_qt()
+
+    for name, (setup, needs_qt, plates) in BENCHMARKS.items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+
+        results[name] = OrderedDict()
+
+        if needs_qt and not qt:
+            print("%-32s skipped, Qt is not available" % name)
+            continue
+
+        for count in sizes:
+            previous = list(results[name].values())
+            if previous and previous[-1].get("seconds", 0) > budget:
+                results[name][str(count)] = {"skipped": "over budget"}
+                print("%-32s N=%-7d skipped, over budget" % (name, count))
+                continue
+
+            result = measure(setup, count, memory=memory, plates=plates)
+            results[name][str(count)] = result
+
+            print(
+                "%-32s N=%-7d %10.4fs %9d calls %12s"
+                % (
+                    name,
+                    count,
+                    result["seconds"],
+                    result["calls"],
+                    (
+                        "%.1f MB" % (result["peak_bytes"] / 1e6)
+                        if "peak_bytes" in result
+                        else ""
+                    ),
+                )
+            )
+
+    return results
+
+
+def check(results, baseline, tolerance):
+    """
+    Compares results against a baseline and against themselves.
+
+    :return: regression messages, and notes of wall times slower than the
+        baseline, which depend on the machine and fail nothing
+    :rtype: tuple
+    """
+    problems = []
+    notes = []
+
+    for name, sizes in results.items():
+        measured = [
+            (int(count), result)
+            for count, result in sizes.items()
+            if "seconds" in result
+        ]
+
+        for (n0, r0), (n1, r1) in zip(measured, measured[1:]):
+            if r0["seconds"] < NOISE_FLOOR:
+                continue
+
+            allowed = r0["seconds"] * (float(n1) / n0) ** 1.5
+            if r1["seconds"] > allowed:
+                problems.append(
+                    "%s grows faster than N^1.5 from N=%d to N=%d "
+                    "(%.3fs -> %.3fs)"
+                    % (name, n0, n1, r0["seconds"], r1["seconds"])
+                )
+
+        for count, result in measured:
+            base = baseline.get(name, {}).get(str(count), {})
+            if "seconds" not in base:
+                continue
+
+            if (
+                result["seconds"] > NOISE_FLOOR
+                and result["seconds"] > base["seconds"] * tolerance
+            ):
+                notes.append(
+                    "%s N=%d took %.3fs, baseline %.3fs"
+                    % (name, count, result["seconds"], base["seconds"])
+                )
+
+            if result["calls"] > base["calls"]:
+                problems.append(
+                    "%s N=%d made %d backend calls, baseline %d"
+                    % (name, count, result["calls"], base["calls"])
+                )
+
+    return problems, notes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=SIZES, help="camera counts"
+    )
+    parser.add_argument(
+        "--only", nargs="+", help="run benchmarks whose name contains these"
+    )
+    parser.add_argument(
+        "-o", "--output", default="bench_results.json", help="results JSON"
+    )
+    parser.add_argument(
+        "--baseline", default=BASELINE, help="baseline JSON to compare with"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="write the results as the new baseline",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="slowdown against the baseline that is noted, without "
+        "failing the run (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=60.0,
+        help="skip larger sizes once a run takes this many seconds",
+    )
+    parser.add_argument(
+        "--no-memory",
+        dest="memory",
+        action="store_false",
+        help="skip the traced peak memory pass",
+    )
+    args = parser.parse_args(argv)
+
+    # A baseline without the list operations would stop checking them.
+    if args.save_baseline and not has_qt():
+        parser.error(
+            "--save-baseline needs a Qt binding to measure the list "
+            "operations, run it with one installed"
+        )
+
+    results = run_benchmarks(
+        sorted(args.sizes), args.only, args.budget, args.memory
+    )
+
+    report = OrderedDict(
+        [
+            ("python", platform.python_version()),
+            ("platform", platform.platform()),
+            ("results", results),
+        ]
+    )
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print("Saved baseline %s" % args.baseline)
+        return 0
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+
+    problems, notes = check(results, baseline, args.tolerance)
+
+    for note in notes:
+        print("NOTE: %s" % note)
+
+    for problem in problems:
+        print("REGRESSION: %s" % problem)
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Keying of the uber camera, checked against the in-memory backend.
+"""
+
+import unittest
+
+from CameraSequencer import api, resolver, snapshot
+from CameraSequencer.backends import set_backend
+from CameraSequencer.backends.memory_backend import MemoryBackend
+
+SHAPE_ATTRIBUTES = (
+    "focalLength",
+    "horizontalFilmAperture",
+    "verticalFilmAperture",
+)
+
+CHANNELS = len(api.TRANSFORM_ATTRIBUTES) + len(SHAPE_ATTRIBUTES)
+
+
+class SequenceTestCase(unittest.TestCase):
+    def setUp(self):
+        resolver.invalidate()
+        self.backend = set_backend(MemoryBackend(log_calls=False))
+        self.cameras = [
+            self.backend.add_camera(
+                "cam_%03d" % i,
+                translation=(i, 0.5 * i, -i),
+                rotation=(0.0, i % 360, 0.0),
+                focal_length=35.0 + i,
+                filmback=(1.41732 + 0.01 * i, 0.94488),
+            )
+            for i in range(40)
+        ]
+
+    def snapshots(self, indices):
+        return [snapshot.capture(*self.cameras[i]) for i in indices]
+
+    def keys(self, uber_cam):
+        """
+        :return: times and values keyed on every channel of the uber camera
+        :rtype: dict
+        """
+        keys = {}
+
+        for attribute in api.TRANSFORM_ATTRIBUTES:
+            keys[attribute] = self.backend.get_keys(uber_cam[0], attribute)
+
+        for attribute in SHAPE_ATTRIBUTES:
+            keys[attribute] = self.backend.get_keys(uber_cam[1], attribute)
+
+        return keys
+
+
+class TestBulkKeying(SequenceTestCase):
+    def test_one_write_per_channel(self):
+        self.backend.reset_calls()
+        uber_cam = api.sequence_cameras(self.snapshots(range(40)))
+
+        self.assertEqual(self.backend.counts["write_curve"], CHANNELS)
+        self.assertEqual(self.backend.counts["set_keyframe"], 0)
+
+        times, values = self.keys(uber_cam)["focalLength"]
+        self.assertEqual(times, list(range(1001, 1041)))
+        self.assertEqual(values, [35.0 + i for i in range(40)])
+
+    def test_fallback_to_set_keyframe(self):
+        cameras = self.snapshots(range(40))
+        expected = self.keys(
+            api.sequence_cameras(cameras, update=False, name="bulk_cam")
+        )
+
+        failed = []
+
+        def write_curve(node, attribute, *args):
+            failed.append(attribute)
+            raise RuntimeError("%s.%s is locked." % (node, attribute))
+
+        self.backend.write_curve = write_curve
+        self.backend.reset_calls()
+        uber_cam = api.sequence_cameras(cameras, update=False)
+
+        self.assertEqual(len(failed), CHANNELS)
+        self.assertEqual(self.backend.counts["set_keyframe"], CHANNELS * 40)
+        self.assertEqual(self.keys(uber_cam), expected)
+
+
+class TestResequence(SequenceTestCase):
+    def assertResequenced(self, before, after, incremental=True):
+        """
+        Sequences before, then after in place, and checks the keys match
+        sequencing after from scratch.
+        """
+        uber_cam = api.sequence_cameras(self.snapshots(before))
+
+        self.backend.reset_calls()
+        api.sequence_cameras(self.snapshots(after))
+        full_rekey = self.backend.counts["write_curve"] > 0
+        self.assertEqual(full_rekey, not incremental)
+
+        expected = api.sequence_cameras(
+            self.snapshots(after), update=False, name="fresh_cam"
+        )
+        self.assertEqual(self.keys(uber_cam), self.keys(expected))
+        self.assertEqual(
+            api.sequence_info(uber_cam[0]), api.sequence_info(expected[0])
+        )
+
+    def test_move(self):
+        order = list(range(30))
+        order.insert(20, order.pop(5))
+        self.assertResequenced(range(30), order)
+
+    def test_move_later_and_earlier(self):
+        order = list(range(30))
+        order.insert(25, order.pop(2))
+        order.insert(3, order.pop(18))
+        self.assertResequenced(range(30), order)
+
+    def test_insert(self):
+        order = list(range(30))
+        order[10:10] = [31, 32]
+        self.assertResequenced(range(30), order)
+
+    def test_delete(self):
+        order = list(range(30))
+        del order[7]
+        del order[0]
+        self.assertResequenced(range(30), order)
+
+    def test_move_and_add(self):
+        order = list(range(30))
+        order.insert(20, order.pop(5))
+        order += [30, 31]
+        self.assertResequenced(range(30), order)
+
+    def test_short_sequence(self):
+        self.assertResequenced(range(5), [1, 0, 2, 3, 4, 5])
+
+    def test_many_edits_rekey(self):
+        order = list(reversed(range(30)))
+        self.assertResequenced(range(30), order, incremental=False)
+
+
+if __name__ == "__main__":
+    unittest.main()